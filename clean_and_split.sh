@@ -4,9 +4,16 @@
 echo "🧹 Nettoyage et re-découpage intelligent"
 echo "========================================="
 
+# --clean: remove every split file first (otherwise unchanged chapters are kept)
+CLEAN=0
+if [ "$1" = "--clean" ]; then
+    CLEAN=1
+    shift
+fi
+
 # Check if EPUB file is provided
 if [ -z "$1" ]; then
-    echo "Usage: $0 <fichier.epub>"
+    echo "Usage: $0 [--clean] <fichier.epub>"
     echo "Exemple: $0 'La Cite des Dames - Christine de Pizan.epub'"
     exit 1
 fi
@@ -23,17 +30,22 @@ echo ""
 echo "📚 Fichier: $EPUB_FILE"
 echo ""
 
-# Clean old split files
-echo "🗑️  Suppression des anciens fichiers..."
-rm -f output/split/*.epub
-echo "✓ Dossier split nettoyé"
+# Clean old split files only on request: the split manifest keeps unchanged chapters
+if [ "$CLEAN" = "1" ]; then
+    echo "🗑️  Suppression des anciens fichiers..."
+    rm -f output/split/*.epub output/split/.*.split.json
+    echo "✓ Dossier split nettoyé"
+fi
 
 echo ""
 echo "✂️  Découpage intelligent en cours..."
 echo "------------------------------------"
 
 # Run the split with the improved script
-python scripts/split_epub.py "$EPUB_FILE"
+if ! python scripts/split_epub.py "$EPUB_FILE"; then
+    echo "❌ Le découpage a échoué"
+    exit 1
+fi
 
 echo ""
 echo "📊 Résultat du découpage:"
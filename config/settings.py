@@ -17,23 +17,61 @@ class Settings:
     OUTPUT_DIR = BASE_DIR / "output"
     SPLIT_OUTPUT_DIR = OUTPUT_DIR / "split"
     AUDIO_OUTPUT_DIR = OUTPUT_DIR / "audio"
+    CACHE_DIR = Path(os.getenv("CACHE_DIR", str(OUTPUT_DIR / "cache")))
+    STATUS_DIR = Path(os.getenv("STATUS_DIR", str(OUTPUT_DIR / "status")))  # Watch mode status files
+    THROUGHPUT_HISTORY = Path(os.getenv("THROUGHPUT_HISTORY", str(OUTPUT_DIR / "throughput.json")))
     
     # EPUB processing
     MIN_CHAPTER_LENGTH = int(os.getenv("MIN_CHAPTER_LENGTH", "100"))  # Minimum words per chapter
     PRESERVE_IMAGES = os.getenv("PRESERVE_IMAGES", "false").lower() == "true"
+    MAX_CHAPTER_WORDS = int(os.getenv("MAX_CHAPTER_WORDS", "10000"))  # Split longer documents at headings (0 = never)
+    CHAPTER_RULES = os.getenv("CHAPTER_RULES", "")  # Rule packs, e.g. "fr,en" (empty = book language + en)
+    BOOK_CACHE = os.getenv("BOOK_CACHE", "true").lower() == "true"  # Reuse processed books across runs
     
     # TTS settings
     TTS_MODEL = os.getenv("TTS_MODEL", "fr_FR-upmc-medium")  # Piper model name
     TTS_VOICE_SPEED = float(os.getenv("TTS_VOICE_SPEED", "1.0"))  # Speed multiplier
     TTS_SAMPLE_RATE = int(os.getenv("TTS_SAMPLE_RATE", "22050"))  # Audio sample rate
+    TTS_CHARS_PER_SECOND = float(os.getenv("TTS_CHARS_PER_SECOND", "15"))  # Spoken characters per audio second
+    TTS_EXPECTED_RTF = float(os.getenv("TTS_EXPECTED_RTF", "0.5"))  # Wall seconds per audio second
+    
+    # Deadlines and retries
+    TTS_TIMEOUT_FACTOR = float(os.getenv("TTS_TIMEOUT_FACTOR", "4"))  # Deadline = expected time × factor
+    TTS_TIMEOUT_MIN = float(os.getenv("TTS_TIMEOUT_MIN", "60"))  # Minimum deadline in seconds
+    TTS_MAX_RETRIES = int(os.getenv("TTS_MAX_RETRIES", "2"))  # Retries after a failed attempt
+    TTS_RETRY_BACKOFF = float(os.getenv("TTS_RETRY_BACKOFF", "5"))  # Seconds, doubled per retry
+    SPECULATIVE_RETRY = os.getenv("SPECULATIVE_RETRY", "true").lower() == "true"  # Duplicate stragglers
+    SPECULATIVE_AFTER = float(os.getenv("SPECULATIVE_AFTER", "1.5"))  # Straggler = elapsed / expected above this
     
     # Audio settings
     AUDIO_FORMAT = os.getenv("AUDIO_FORMAT", "wav")  # wav or mp3
     AUDIO_BITRATE = os.getenv("AUDIO_BITRATE", "192k")  # For MP3
+    AUDIO_PART_SECONDS = float(os.getenv("AUDIO_PART_SECONDS", "0"))  # Roll over to a new part file (0 = no limit)
+    AUDIO_PART_MB = int(os.getenv("AUDIO_PART_MB", "0"))  # Part size limit in MB (0 = format limit only)
+    AUDIO_CONTAINER = os.getenv("AUDIO_CONTAINER", "wav")  # wav (4 GB max per file) or rf64
+    SPEED_VARIANTS = os.getenv("SPEED_VARIANTS", "")  # Extra speeds time-stretched from one synthesis, e.g. 1.25,1.5
+    BATCH_SMALL_CHARS = int(os.getenv("BATCH_SMALL_CHARS", "1500"))  # Shorter texts share one Piper run (0 = off)
+    BATCH_MAX_CHARS = int(os.getenv("BATCH_MAX_CHARS", "20000"))  # Characters per shared Piper run
     CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "5000"))  # Characters per TTS chunk
     
+    # Scratch storage for intermediate audio
+    SCRATCH_DIR = os.getenv("SCRATCH_DIR", "")  # Fast location (empty = /dev/shm if available)
+    SCRATCH_FALLBACK_DIR = os.getenv("SCRATCH_FALLBACK_DIR", "")  # Once SCRATCH_MAX_MB is used (empty = system temp)
+    SCRATCH_MAX_MB = int(os.getenv("SCRATCH_MAX_MB", "1024"))  # Budget on the fast location
+    SCRATCH_FLAC = os.getenv("SCRATCH_FLAC", "false").lower() == "true"  # Keep waiting chunks as FLAC
+    JOB_JOURNAL = os.getenv("JOB_JOURNAL", "true").lower() == "true"  # Per-book job journals for --resume
+    
     # Processing
     MAX_WORKERS = int(os.getenv("MAX_WORKERS", "4"))  # For parallel processing
+    THREADS_PER_WORKER = int(os.getenv("THREADS_PER_WORKER", "0"))  # 0 = split cores evenly
+    CPU_BUDGET = int(os.getenv("CPU_BUDGET", "0"))  # Cores to use, 0 = all available
+    SHARED_VOICE = os.getenv("SHARED_VOICE", "false").lower() == "true"  # Load voice once, fork workers (needs piper-tts)
+    PHONEME_CACHE = os.getenv("PHONEME_CACHE", "true").lower() == "true"  # Reuse phoneme ids per sentence (SHARED_VOICE only: the Piper CLI always runs espeak)
+    PIN_WORKERS = os.getenv("PIN_WORKERS", "true").lower() == "true"  # CPU affinity per worker
+    QUEUE_LEASE_SECONDS = float(os.getenv("QUEUE_LEASE_SECONDS", "120"))  # Heartbeat age before a claim expires
+    QUEUE_POLL_SECONDS = float(os.getenv("QUEUE_POLL_SECONDS", "5"))  # Idle worker polling interval
+    WATCH_DEBOUNCE_SECONDS = float(os.getenv("WATCH_DEBOUNCE_SECONDS", "10"))  # Unchanged this long = upload finished
+    WATCH_POLL_SECONDS = float(os.getenv("WATCH_POLL_SECONDS", "5"))  # Watch folder rescan interval
     DEBUG_MODE = os.getenv("DEBUG", "false").lower() == "true"
     
     @classmethod
@@ -0,0 +1,329 @@
+"""Streaming WAV output, split into parts by duration or size.
+
+A RIFF/WAV file stores its sizes on 32 bits, so it cannot hold more than
+4 GB of audio (about 27 hours at 22050 Hz, 16-bit mono). Output is written
+incrementally and rolled over to a new part before a limit is crossed;
+each part is renamed into place as soon as it is complete. RF64 keeps a
+whole book in one file for players that support it.
+"""
+
+import os
+import re
+import struct
+import wave
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from config.settings import settings
+
+CONTAINERS = ("wav", "rf64")
+
+# Largest data chunk a RIFF header can describe
+WAV_MAX_DATA_BYTES = (0xFFFFFFFF - 36) & ~1
+
+# Frames copied per read when streaming a WAV file
+COPY_BLOCK_FRAMES = 1 << 16
+
+# Estimated audio length is kept this far below the limit when planning parts
+PART_SAFETY = 0.9
+
+
+def part_path(output_path: Path, number: int) -> Path:
+    """File name of part number (1-based) of an output file."""
+    return output_path.with_name(f"{output_path.stem}_part{number:03d}{output_path.suffix}")
+
+
+def part_limit_bytes(bytes_per_second: int, max_seconds: Optional[float] = None,
+                     max_bytes: Optional[int] = None, container: Optional[str] = None) -> int:
+    """
+    Maximum audio data bytes per part.
+
+    Args:
+        bytes_per_second: Sample rate × channels × sample width
+        max_seconds: Part duration limit (default: settings.AUDIO_PART_SECONDS, 0 = none)
+        max_bytes: Part size limit (default: settings.AUDIO_PART_MB, 0 = none)
+        container: wav or rf64 (default: settings.AUDIO_CONTAINER)
+
+    Returns:
+        Byte limit, or 0 when parts are unlimited
+    """
+    max_seconds = settings.AUDIO_PART_SECONDS if max_seconds is None else max_seconds
+    max_bytes = settings.AUDIO_PART_MB * 1024 * 1024 if max_bytes is None else max_bytes
+    container = container or settings.AUDIO_CONTAINER
+
+    limits = []
+    if max_seconds:
+        limits.append(int(max_seconds * bytes_per_second))
+    if max_bytes:
+        limits.append(int(max_bytes))
+    if container == "wav":
+        limits.append(WAV_MAX_DATA_BYTES)
+    return min(limits) if limits else 0
+
+
+def split_text_into_parts(text: str, speed: float = 1.0, max_seconds: Optional[float] = None,
+                          max_bytes: Optional[int] = None, container: Optional[str] = None,
+                          sample_rate: Optional[int] = None) -> List[str]:
+    """
+    Cut text at sentence ends so that each part's audio stays under the limits.
+
+    Audio length is estimated from TTS_CHARS_PER_SECOND, with a safety margin.
+
+    Args:
+        text: TTS-ready text
+        speed: Speech speed
+        max_seconds: Part duration limit (default: settings)
+        max_bytes: Part size limit (default: settings)
+        container: wav or rf64 (default: settings)
+        sample_rate: Voice sample rate (default: settings.TTS_SAMPLE_RATE)
+
+    Returns:
+        List of texts, a single one when no split is needed
+    """
+    bytes_per_second = (sample_rate or settings.TTS_SAMPLE_RATE) * 2
+    limit = part_limit_bytes(bytes_per_second, max_seconds, max_bytes, container)
+    if not limit:
+        return [text]
+
+    max_chars = int(limit / bytes_per_second * PART_SAFETY * settings.TTS_CHARS_PER_SECOND * speed)
+    if len(text) <= max_chars:
+        return [text]
+
+    parts = []
+    start = 0
+    last_end = None
+    for match in re.finditer(r'(?<=[.!?…])\s+', text):
+        if match.start() - start > max_chars and last_end is not None and last_end[1] > start:
+            parts.append(text[start:last_end[0]])
+            start = last_end[1]
+        last_end = (match.start(), match.end())
+
+    # The last sentences may still need one more cut
+    if len(text) - start > max_chars and last_end is not None and last_end[1] > start:
+        parts.append(text[start:last_end[0]])
+        start = last_end[1]
+    parts.append(text[start:])
+    return [part for part in parts if part.strip()]
+
+
+class FlacReader:
+    """Read a FLAC file through the subset of wave.Wave_read used here."""
+
+    def __init__(self, path: Path):
+        import soundfile
+
+        self._file = soundfile.SoundFile(str(path))
+
+    def getnchannels(self) -> int:
+        return self._file.channels
+
+    def getsampwidth(self) -> int:
+        return 2
+
+    def getframerate(self) -> int:
+        return self._file.samplerate
+
+    def getnframes(self) -> int:
+        return self._file.frames
+
+    def readframes(self, count: int) -> bytes:
+        return self._file.read(count, dtype='int16').tobytes()
+
+    def __enter__(self) -> "FlacReader":
+        return self
+
+    def __exit__(self, *exc):
+        self._file.close()
+
+
+def open_audio(path: Path):
+    """Open a WAV file, or a FLAC file (16-bit) kept by lib.scratch, for reading."""
+    if Path(path).suffix == '.flac':
+        return FlacReader(path)
+    return wave.open(str(path), 'rb')
+
+
+class PCMFileWriter:
+    """One WAV or RF64 file written incrementally; sizes are filled in on close."""
+
+    def __init__(self, path: Path, sample_rate: int, channels: int = 1, sampwidth: int = 2,
+                 container: str = "wav"):
+        """
+        Open the file and write a placeholder header.
+
+        Args:
+            path: File to write
+            sample_rate: Frames per second
+            channels: Channel count
+            sampwidth: Bytes per sample
+            container: wav or rf64
+        """
+        if container not in CONTAINERS:
+            raise ValueError(f"Unknown audio container: {container}")
+        self.path = Path(path)
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sampwidth = sampwidth
+        self.container = container
+        self.data_bytes = 0
+        self._file = open(self.path, 'wb')
+        self._write_header()
+
+    @property
+    def block_align(self) -> int:
+        return self.channels * self.sampwidth
+
+    def _write_header(self):
+        fmt = struct.pack('<HHIIHH', 1, self.channels, self.sample_rate,
+                          self.sample_rate * self.block_align, self.block_align,
+                          self.sampwidth * 8)
+        # RIFF chunks are word aligned: an odd data chunk is followed by a pad byte
+        padded = self.data_bytes + self.data_bytes % 2
+        if self.container == "rf64":
+            frames = self.data_bytes // self.block_align
+            riff_size = 4 + (8 + 28) + (8 + 16) + 8 + padded
+            header = (b'RF64' + struct.pack('<I', 0xFFFFFFFF) + b'WAVE'
+                      + b'ds64' + struct.pack('<IQQQI', 28, riff_size, self.data_bytes, frames, 0)
+                      + b'fmt ' + struct.pack('<I', 16) + fmt
+                      + b'data' + struct.pack('<I', 0xFFFFFFFF))
+        else:
+            header = (b'RIFF' + struct.pack('<I', 36 + padded) + b'WAVE'
+                      + b'fmt ' + struct.pack('<I', 16) + fmt
+                      + b'data' + struct.pack('<I', self.data_bytes))
+        self._file.seek(0)
+        self._file.write(header)
+
+    def write(self, frames: bytes):
+        """Append PCM frames."""
+        if self.container == "wav" and self.data_bytes + len(frames) > WAV_MAX_DATA_BYTES:
+            raise OverflowError(f"{self.path.name} would exceed the 4 GB WAV limit")
+        self._file.write(frames)
+        self.data_bytes += len(frames)
+
+    def close(self):
+        """Write the final sizes and close the file."""
+        if self._file.closed:
+            return
+        if self.data_bytes % 2:
+            self._file.write(b'\x00')
+        self._write_header()
+        self._file.close()
+
+
+class ShardedWavWriter:
+    """Concatenate WAV segments into one or more part files."""
+
+    def __init__(self, output_path: Path, max_seconds: Optional[float] = None,
+                 max_bytes: Optional[int] = None, container: Optional[str] = None,
+                 on_part: Optional[Callable[[Path], None]] = None):
+        """
+        Initialize the writer.
+
+        Audio format is taken from the first segment. A single part is named
+        output_path; otherwise parts are named <stem>_part001.wav, ...
+
+        Args:
+            output_path: Final file (or base name of the parts)
+            max_seconds: Part duration limit (default: settings.AUDIO_PART_SECONDS)
+            max_bytes: Part size limit (default: settings.AUDIO_PART_MB)
+            container: wav or rf64 (default: settings.AUDIO_CONTAINER)
+            on_part: Called with each part path as soon as it is complete
+        """
+        self.output_path = Path(output_path)
+        self.max_seconds = max_seconds
+        self.max_bytes = max_bytes
+        self.container = container or settings.AUDIO_CONTAINER
+        self.on_part = on_part
+        self.parts: List[Path] = []
+        self.params: Optional[Tuple[int, int, int]] = None
+        self.limit = 0
+        self._writer: Optional[PCMFileWriter] = None
+
+    def _open_part(self) -> PCMFileWriter:
+        assert self.params is not None, "audio format is set by the first segment"
+        nchannels, sampwidth, framerate = self.params
+        tmp_path = self.output_path.with_name(
+            f".{self.output_path.stem}.part{len(self.parts) + 1:03d}.partial")
+        self._writer = PCMFileWriter(tmp_path, framerate, nchannels, sampwidth, self.container)
+        return self._writer
+
+    def _finish_part(self, last: bool):
+        writer, self._writer = self._writer, None
+        if writer is None:
+            return
+        writer.close()
+        number = len(self.parts) + 1
+        final_path = self.output_path if last and number == 1 else part_path(self.output_path, number)
+        os.replace(writer.path, final_path)
+        self.parts.append(final_path)
+        if self.on_part:
+            self.on_part(final_path)
+
+    def _write(self, frames: bytes):
+        """Write frames, rolling over mid-segment only if the segment alone is too big."""
+        while frames:
+            writer = self._writer if self._writer is not None else self._open_part()
+            room = (self.limit - writer.data_bytes) if self.limit else len(frames)
+            room -= room % writer.block_align
+            if room <= 0:
+                self._finish_part(last=False)
+                continue
+            writer.write(frames[:room])
+            frames = frames[room:]
+
+    def _reserve(self, segment_bytes: int):
+        """Start a new part if the segment does not fit in the current one."""
+        if (self.limit and self._writer is not None and self._writer.data_bytes
+                and self._writer.data_bytes + segment_bytes > self.limit):
+            self._finish_part(last=False)
+
+    def add_wav(self, path: Path, pause_ms: int = 0):
+        """
+        Append a WAV file (one segment, kept whole when it fits in a part).
+
+        Args:
+            path: WAV (or FLAC) file, read in blocks
+            pause_ms: Silence appended after it
+        """
+        with open_audio(path) as wav_file:
+            params = (wav_file.getnchannels(), wav_file.getsampwidth(), wav_file.getframerate())
+            if self.params is None:
+                self.params = params
+                self.limit = part_limit_bytes(params[0] * params[1] * params[2],
+                                              self.max_seconds, self.max_bytes, self.container)
+            elif params != self.params:
+                raise ValueError(f"{Path(path).name} has a different audio format")
+
+            block_align = params[0] * params[1]
+            pause_bytes = int(pause_ms * params[2] / 1000) * block_align
+            self._reserve(wav_file.getnframes() * block_align + pause_bytes)
+
+            while True:
+                frames = wav_file.readframes(COPY_BLOCK_FRAMES)
+                if not frames:
+                    break
+                self._write(frames)
+
+        if pause_bytes:
+            self._write(b'\x00' * pause_bytes)
+
+    def close(self) -> List[Path]:
+        """
+        Finalize the last part.
+
+        Returns:
+            Paths of all parts, in order
+        """
+        if self._writer is not None:
+            self._finish_part(last=True)
+        return self.parts
+
+    def __enter__(self) -> "ShardedWavWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        elif self._writer is not None:
+            self._writer.close()
+            self._writer.path.unlink(missing_ok=True)
@@ -0,0 +1,156 @@
+"""Persistent cache of processed books, shared by the split and convert stages."""
+
+import hashlib
+import os
+import pickle
+import re
+import tempfile
+import zipfile
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from config.settings import settings
+from lib.chapter_classifier import rules_fingerprint
+from lib.epub_manifest import EPUBManifest
+from lib.text_cleaner import TextCleaner
+
+# Bump when the cached record layout or the chapter logic changes
+CACHE_FORMAT = 5
+
+# OPF <meta> names tying a split chapter EPUB to its cached source book
+META_SOURCE = "tts-scripts:book-cache"
+META_CHAPTER = "tts-scripts:chapter-index"
+# SHA-256 of the split file's documents as written, to detect later edits
+META_CONTENT = "tts-scripts:content-sha256"
+
+# Keys are SHA-256 hex digests (key_for); anything else, e.g. a path read
+# from a crafted EPUB, must never reach the file system or pickle
+KEY_PATTERN = re.compile(r'[0-9a-f]{64}')
+
+
+def documents_hash(documents) -> str:
+    """SHA-256 of a sequence of document contents (bytes)."""
+    digest = hashlib.sha256()
+    for content in documents:
+        digest.update(hashlib.sha256(content).digest())
+    return digest.hexdigest()
+
+
+def file_hash(path: Path, block_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class BookCache:
+    """On-disk store of processed books (zlib-compressed pickles)."""
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Cache directory (default: settings.CACHE_DIR)
+        """
+        self.cache_dir = Path(cache_dir or settings.CACHE_DIR)
+
+    @staticmethod
+    def key_for(epub_path: Path, skip_metadata: bool = True) -> str:
+        """
+        Cache key for a book under the current settings.
+
+        Args:
+            epub_path: Source EPUB file
+            skip_metadata: Whether non-content sections are skipped
+
+        Returns:
+            Hex digest identifying the processed book
+        """
+        fingerprint = f"{file_hash(epub_path)}|{BookCache.settings_fingerprint(skip_metadata)}"
+        return hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def settings_fingerprint(skip_metadata: bool = True) -> str:
+        """Everything besides the source file that affects processed chapters."""
+        return "|".join(str(part) for part in (
+            CACHE_FORMAT,
+            TextCleaner.VERSION,
+            settings.MIN_CHAPTER_LENGTH,
+            settings.MAX_CHAPTER_WORDS,
+            rules_fingerprint(),
+            skip_metadata,
+        ))
+
+    def _path(self, key: str) -> Path:
+        if not isinstance(key, str) or not KEY_PATTERN.fullmatch(key):
+            raise ValueError(f"Invalid book cache key: {key!r}")
+        return self.cache_dir / f"{key}.pkl.z"
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Load a processed book.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Processed book record, or None on a miss, an invalid key or an
+            unreadable entry
+        """
+        try:
+            return pickle.loads(zlib.decompress(self._path(key).read_bytes()))
+        except Exception:
+            # Stale entries can fail in many ways (missing classes, bad data)
+            return None
+
+    def save(self, key: str, data: Dict[str, Any]):
+        """
+        Store a processed book atomically.
+
+        Args:
+            key: Cache key
+            data: Processed book record
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        payload = zlib.compress(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL), 1)
+        fd, tmp_name = tempfile.mkstemp(dir=self.cache_dir, prefix=".tmp-")
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_name, self._path(key))
+
+    def chapter_for_split_file(self, epub_path: Path) -> Optional[Dict[str, Any]]:
+        """
+        Find the cached chapter a split EPUB was written from.
+
+        Only the OPF is read and the chapter HTML hashed, not parsed. A
+        file edited since it was split no longer matches its recorded hash
+        and is not found, so that its own content is used.
+
+        Args:
+            epub_path: Chapter EPUB written by EPUBProcessor.split_into_chapters
+
+        Returns:
+            Cached chapter record, or None if unknown or edited
+        """
+        try:
+            manifest = EPUBManifest(epub_path)
+            meta = manifest.meta
+            key, index = meta[META_SOURCE], int(meta[META_CHAPTER])
+            with zipfile.ZipFile(epub_path) as archive:
+                content = documents_hash(archive.read(entry.href) for entry in manifest.entries)
+        except Exception:
+            return None  # Not a split file we wrote, or unreadable
+
+        if content != meta.get(META_CONTENT):
+            return None
+
+        if not KEY_PATTERN.fullmatch(key):
+            return None
+        data = self.load(key)
+        if not isinstance(data, dict) or not 0 <= index < len(data.get('chapters', ())):
+            return None
+        return data['chapters'][index]
@@ -0,0 +1,244 @@
+"""Section classification from per-language rule packs.
+
+A rule pack (config/rules/<language>.json) lists skip keywords,
+content-start keywords, numbering keywords ("chapitre", "part"...),
+spelled-out numbers ("Chapitre deux") and ordinals ("Deuxième partie").
+The packs in use are compiled once into a single regular expression, so a
+title is classified in one scan.
+"""
+
+import hashlib
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config.settings import settings
+
+RULES_DIR = Path(__file__).parent.parent / "config" / "rules"
+
+# Always combined with the book language: tools often emit English headings
+FALLBACK_LANGUAGE = "en"
+
+# A title with a single skip keyword is only skipped below this many words
+SHORT_METADATA_WORDS = 50
+
+ROMAN_VALUES = {'i': 1, 'v': 5, 'x': 10, 'l': 50, 'c': 100, 'd': 500, 'm': 1000}
+
+# Well-formed roman numerals only, so words like "dix" or "mil" are not read
+# as numbers: the whole word must be roman letters and the match is never empty
+ROMAN_PATTERN = (r'(?=[ivxlcdm]+\b)m{0,3}(?:cm|cd|d?c{0,3})(?:xc|xl|l?x{0,3})(?:ix|iv|v?i{0,3})'
+                 r'(?<=[ivxlcdm])')
+
+
+def available_languages() -> List[str]:
+    """Languages that have a rule pack."""
+    return sorted(path.stem for path in RULES_DIR.glob("*.json"))
+
+
+@lru_cache(maxsize=None)
+def rules_fingerprint() -> str:
+    """Hash of every rule pack, so cached classifications follow rule edits."""
+    digest = hashlib.sha256(settings.CHAPTER_RULES.encode('utf-8'))
+    for path in sorted(RULES_DIR.glob("*.json")):
+        digest.update(path.name.encode('utf-8'))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def load_rule_pack(language: str) -> Dict:
+    """
+    Read a rule pack.
+
+    Args:
+        language: Language code (file name in config/rules)
+
+    Returns:
+        Rule pack dict
+    """
+    return json.loads((RULES_DIR / f"{language}.json").read_text(encoding='utf-8'))
+
+
+def roman_to_int(roman: str) -> int:
+    """Convert Roman numeral to integer."""
+    total = 0
+    prev = 0
+
+    for char in roman.lower()[::-1]:
+        value = ROMAN_VALUES.get(char, 0)
+        if value < prev:
+            total -= value
+        else:
+            total += value
+        prev = value
+
+    return total
+
+
+def _alternation(words: Iterable[str]) -> str:
+    """Regex alternation trying longer words first."""
+    return '|'.join(re.escape(w) for w in sorted(set(words), key=lambda w: (-len(w), w)))
+
+
+class Classification:
+    """What a section title says about the section."""
+
+    def __init__(self, content_start: bool, skip_keywords: int, number: Optional[int]):
+        self.content_start = content_start
+        self.skip_keywords = skip_keywords
+        self.number = number
+
+    def should_skip(self, words: int, min_words: Optional[int] = None) -> bool:
+        """
+        Decide if the section is not book content.
+
+        Args:
+            words: Word count of the section
+            min_words: Minimum words per chapter (default: settings.MIN_CHAPTER_LENGTH)
+
+        Returns:
+            True if the section should be skipped
+        """
+        if min_words is None:
+            min_words = settings.MIN_CHAPTER_LENGTH
+
+        # Only skip if title strongly suggests metadata (multiple keywords)
+        if self.skip_keywords >= 2:
+            return True
+
+        # For single keyword matches, only skip if REALLY short
+        if self.skip_keywords == 1 and words < SHORT_METADATA_WORDS:
+            return True
+
+        # For normal chapters, use the configured minimum
+        return words < min_words and not self.content_start
+
+
+class ChapterClassifier:
+    """Classify section titles with compiled rule packs."""
+
+    def __init__(self, languages: Iterable[str]):
+        """
+        Compile rule packs.
+
+        Args:
+            languages: Rule packs to combine
+        """
+        self.languages = tuple(languages)
+        packs = [load_rule_pack(language) for language in self.languages]
+
+        skip = [k for p in packs for k in p['skip_keywords']]
+        start = [k for p in packs for k in p['content_start_keywords']]
+        numbering = [k for p in packs for k in p['numbering_keywords']]
+        # When a title has several numbers, the chapter's wins over the part's
+        # and the book's (each pack lists its keywords in that order)
+        self.keyword_rank: Dict[str, int] = {}
+        for pack in packs:
+            for rank, keyword in enumerate(pack['numbering_keywords']):
+                self.keyword_rank[keyword] = min(rank, self.keyword_rank.get(keyword, rank))
+        self.numbers: Dict[str, int] = {}
+        ordinals: List[str] = []
+        for pack in packs:
+            self.numbers.update(pack['numbers'])
+            self.numbers.update(pack['ordinals'])
+            ordinals.extend(pack['ordinals'])
+
+        self.skip_keywords = sorted(set(skip))
+        self.content_start_keywords = sorted(set(start))
+
+        spelled = _alternation(self.numbers)
+        number = rf'(?:(?P<digits>\d+)|(?P<spelled>{spelled})|(?P<roman>{ROMAN_PATTERN}))'
+        # Alternatives are tried in order at each position: numbered
+        # headings first, then plain start keywords, then skip keywords
+        self.pattern = re.compile(
+            rf'\b(?:'
+            rf'(?P<keyword>{_alternation(numbering)})\s+{number}\b'
+            rf'|(?P<ordinal>{_alternation(ordinals)})\s+(?P<ordinal_keyword>{_alternation(numbering)})\b'
+            rf'|(?P<start>{_alternation(start)})\b'
+            rf'|(?P<skip>{_alternation(skip)})\b'
+            rf')'
+        )
+
+    def classify(self, title: str) -> Classification:
+        """
+        Classify a section from its title in a single scan.
+
+        Args:
+            title: Section title
+
+        Returns:
+            Classification (content start, skip keyword count, chapter number)
+        """
+        content_start = False
+        skip_hits = set()
+        # (roman, keyword rank, position, number): digits beat roman numerals,
+        # then "chapitre" beats "partie" beats "livre", then the first one
+        numbered = []
+
+        for match in self.pattern.finditer(title.lower()):
+            if match.group('skip'):
+                skip_hits.add(match.group('skip'))
+                continue
+
+            content_start = True
+            if match.group('start'):
+                continue
+            roman = False
+            if match.group('ordinal'):
+                keyword = match.group('ordinal_keyword')
+                value = self.numbers[match.group('ordinal')]
+            else:
+                keyword = match.group('keyword')
+                if match.group('digits'):
+                    value = int(match.group('digits'))
+                elif match.group('spelled'):
+                    value = self.numbers[match.group('spelled')]
+                else:
+                    roman = True
+                    value = roman_to_int(match.group('roman'))
+            # "Chapitre 0" is not a chapter number
+            if value:
+                numbered.append((roman, self.keyword_rank[keyword], match.start(), value))
+
+        number = min(numbered)[3] if numbered else None
+        return Classification(content_start, len(skip_hits), number)
+
+
+def rule_languages(book_language: Optional[str] = None) -> Tuple[str, ...]:
+    """
+    Rule packs to use for a book.
+
+    Args:
+        book_language: Language from the book metadata (e.g. "fr-FR")
+
+    Returns:
+        settings.CHAPTER_RULES if set, else the book language plus English,
+        else every available pack when the language has none
+    """
+    if settings.CHAPTER_RULES:
+        return tuple(part.strip() for part in settings.CHAPTER_RULES.split(',') if part.strip())
+
+    available = available_languages()
+    language = (book_language or '').split('-')[0].split('_')[0].lower()
+    if language not in available:
+        return tuple(available)
+    return tuple(dict.fromkeys((language, FALLBACK_LANGUAGE)))
+
+
+@lru_cache(maxsize=None)
+def _compiled(languages: Tuple[str, ...]) -> ChapterClassifier:
+    return ChapterClassifier(languages)
+
+
+def get_classifier(book_language: Optional[str] = None) -> ChapterClassifier:
+    """
+    Compiled classifier for a book, shared between books of a language.
+
+    Args:
+        book_language: Language from the book metadata
+
+    Returns:
+        ChapterClassifier
+    """
+    return _compiled(rule_languages(book_language))
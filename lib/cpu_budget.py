@@ -0,0 +1,189 @@
+"""CPU thread budgeting for parallel Piper workers."""
+
+import os
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from config.settings import settings
+
+
+def cgroup_cpu_limit() -> Optional[float]:
+    """
+    Read the CPU quota imposed by the current cgroup, if any.
+
+    Returns:
+        Number of CPUs allowed by the quota, or None when unlimited
+    """
+    # cgroup v2: "<quota> <period>" or "max <period>"
+    candidates = [Path("/sys/fs/cgroup/cpu.max")]
+    try:
+        for line in Path("/proc/self/cgroup").read_text().splitlines():
+            if line.startswith("0::"):
+                candidates.insert(0, Path("/sys/fs/cgroup") / line[3:].lstrip("/") / "cpu.max")
+    except OSError:
+        pass
+
+    for cpu_max in candidates:
+        try:
+            quota, period = cpu_max.read_text().split()[:2]
+        except (OSError, ValueError):
+            continue
+        if quota == "max":
+            return None
+        return int(quota) / int(period)
+
+    # cgroup v1
+    try:
+        quota_us = int(Path("/sys/fs/cgroup/cpu/cpu.cfs_quota_us").read_text())
+        period_us = int(Path("/sys/fs/cgroup/cpu/cpu.cfs_period_us").read_text())
+    except (OSError, ValueError):
+        return None
+    if quota_us <= 0 or period_us <= 0:
+        return None
+    return quota_us / period_us
+
+
+def available_cpus() -> List[int]:
+    """
+    List the CPUs this process may use.
+
+    Honours the scheduler affinity mask, the cgroup CPU quota and the
+    CPU_BUDGET setting, whichever is the most restrictive.
+
+    Returns:
+        Sorted list of CPU ids
+    """
+    try:
+        cpus = sorted(os.sched_getaffinity(0))
+    except AttributeError:  # Not available on macOS/Windows
+        cpus = list(range(os.cpu_count() or 1))
+
+    limit = len(cpus)
+    quota = cgroup_cpu_limit()
+    if quota is not None:
+        limit = min(limit, max(1, int(quota)))
+    if settings.CPU_BUDGET > 0:
+        limit = min(limit, settings.CPU_BUDGET)
+
+    return cpus[:limit]
+
+
+class WorkerSlot:
+    """CPU allocation for one synthesis worker."""
+
+    def __init__(self, index: int, cpus: List[int], threads: int):
+        """
+        Initialize a worker slot.
+
+        Args:
+            index: Worker index
+            cpus: CPU ids the worker is pinned to
+            threads: Intra-op threads the worker may use
+        """
+        self.index = index
+        self.cpus = cpus
+        self.threads = threads
+
+    def __repr__(self) -> str:
+        return f"WorkerSlot(index={self.index}, cpus={self.cpus}, threads={self.threads})"
+
+
+class ThreadBudget:
+    """Split the available cores between synthesis workers."""
+
+    def __init__(self, workers: Optional[int] = None,
+                 threads_per_worker: Optional[int] = None,
+                 cpus: Optional[List[int]] = None,
+                 pin: Optional[bool] = None):
+        """
+        Plan how many workers to run and how many threads each gets.
+
+        Args:
+            workers: Number of workers (None or 0 = derive from the budget)
+            threads_per_worker: Threads per worker (None or 0 = derive)
+            cpus: CPU ids to distribute (default: available_cpus())
+            pin: Pin workers to their CPU sets (default: settings.PIN_WORKERS)
+        """
+        self.cpus = list(cpus) if cpus else available_cpus()
+        self.pin = settings.PIN_WORKERS if pin is None else pin
+
+        if workers is None:
+            workers = 0
+        if threads_per_worker is None:
+            threads_per_worker = settings.THREADS_PER_WORKER
+
+        total = len(self.cpus)
+        if workers <= 0 and threads_per_worker <= 0:
+            workers = max(1, min(settings.MAX_WORKERS, total))
+            threads_per_worker = max(1, total // workers)
+        elif workers <= 0:
+            workers = max(1, min(settings.MAX_WORKERS, total // threads_per_worker))
+        elif threads_per_worker <= 0:
+            threads_per_worker = max(1, total // workers)
+
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker
+        self.slots = self._allocate()
+
+    @property
+    def oversubscribed(self) -> bool:
+        """True if the plan asks for more threads than there are cores."""
+        return self.workers * self.threads_per_worker > len(self.cpus)
+
+    def _allocate(self) -> List[WorkerSlot]:
+        """Assign contiguous CPU sets to each worker, wrapping if needed."""
+        total = len(self.cpus)
+        slots = []
+        for index in range(self.workers):
+            start = (index * self.threads_per_worker) % total
+            cpus = [self.cpus[(start + offset) % total]
+                    for offset in range(min(self.threads_per_worker, total))]
+            slots.append(WorkerSlot(index, sorted(set(cpus)), self.threads_per_worker))
+        return slots
+
+    def env_for(self, slot: WorkerSlot) -> Dict[str, str]:
+        """
+        Build the environment for a worker process.
+
+        OMP_NUM_THREADS only bounds OpenMP pools: the Piper CLI does not
+        expose onnxruntime's intra-op thread count, so its inference
+        threads are held to slot.threads by CPU pinning (preexec_for),
+        not by this environment. With PIN_WORKERS off, a Piper process
+        may use more threads than its slot. (Shared voices set the
+        onnxruntime thread count directly, see lib.voice_models.)
+
+        Args:
+            slot: Worker slot
+
+        Returns:
+            Environment mapping limiting the worker's OpenMP thread pools
+        """
+        env = os.environ.copy()
+        env["OMP_NUM_THREADS"] = str(slot.threads)
+        return env
+
+    def preexec_for(self, slot: WorkerSlot) -> Optional[Callable[[], None]]:
+        """
+        Build a subprocess preexec_fn pinning the worker to its CPUs.
+
+        Args:
+            slot: Worker slot
+
+        Returns:
+            Callable for subprocess.Popen, or None if pinning is disabled
+        """
+        if not self.pin or not hasattr(os, "sched_setaffinity"):
+            return None
+
+        cpus = set(slot.cpus)
+        return lambda: os.sched_setaffinity(0, cpus)
+
+    def describe(self) -> str:
+        """Human readable summary of the plan."""
+        summary = (f"{self.workers} worker(s) × {self.threads_per_worker} thread(s) "
+                   f"on {len(self.cpus)} core(s)")
+        if self.pin:
+            summary += ", pinned"
+        if self.oversubscribed:
+            summary += " (oversubscribed)"
+        return summary
@@ -0,0 +1,152 @@
+"""Fast EPUB inspection from the package manifest, without parsing HTML."""
+
+import posixpath
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import unquote
+from xml.etree import ElementTree
+
+# Rough share of an XHTML document that is readable text, and average
+# UTF-8 bytes per word including the following space (French prose).
+TEXT_RATIO = 0.6
+BYTES_PER_WORD = 6.5
+
+NS = {
+    'container': 'urn:oasis:names:tc:opendocument:xmlns:container',
+    'opf': 'http://www.idpf.org/2007/opf',
+    'dc': 'http://purl.org/dc/elements/1.1/',
+    'ncx': 'http://www.daisy.org/z3986/2005/ncx/',
+    'xhtml': 'http://www.w3.org/1999/xhtml',
+    'epub': 'http://www.idpf.org/2007/ops',
+}
+
+
+class ManifestEntry:
+    """A spine document as described by the manifest."""
+
+    def __init__(self, index: int, href: str, title: str, size: int):
+        """
+        Initialize an entry.
+
+        Args:
+            index: Position in the spine
+            href: Document path inside the archive
+            title: Title from the TOC (or file name if not in the TOC)
+            size: Uncompressed document size in bytes
+        """
+        self.index = index
+        self.href = href
+        self.title = title
+        self.size = size
+
+    @property
+    def estimated_words(self) -> int:
+        """Word count estimated from the document size."""
+        return int(self.size * TEXT_RATIO / BYTES_PER_WORD)
+
+
+class EPUBManifest:
+    """Spine, TOC titles and metadata read straight from the OPF."""
+
+    def __init__(self, epub_path: Path):
+        """
+        Read the manifest of an EPUB file.
+
+        Args:
+            epub_path: Path to the EPUB file
+        """
+        self.epub_path = Path(epub_path)
+        self.title: Optional[str] = None
+        self.language: Optional[str] = None
+        self.meta: Dict[str, str] = {}
+        self.entries: List[ManifestEntry] = []
+
+        with zipfile.ZipFile(self.epub_path) as archive:
+            self._read(archive)
+
+    def _read(self, archive: zipfile.ZipFile):
+        container = ElementTree.fromstring(archive.read('META-INF/container.xml'))
+        element = container.find('.//container:rootfile', NS)
+        rootfile = element.get('full-path') if element is not None else None
+        if not rootfile:
+            raise ValueError(f"{self.epub_path.name}: no package document in container.xml")
+        opf_dir = posixpath.dirname(rootfile)
+        opf = ElementTree.fromstring(archive.read(rootfile))
+
+        self.title = opf.findtext('.//dc:title', namespaces=NS)
+        self.language = opf.findtext('.//dc:language', namespaces=NS)
+        for meta in opf.findall('.//opf:metadata/opf:meta', NS):
+            name, content = meta.get('name'), meta.get('content')
+            if name and content is not None:
+                self.meta[name] = content
+
+        items: Dict[str, ElementTree.Element] = {}
+        for element in opf.findall('.//opf:manifest/opf:item', NS):
+            item_id = element.get('id')
+            if item_id:
+                items[item_id] = element
+
+        def resolve(base_dir: str, href: str) -> str:
+            return posixpath.normpath(posixpath.join(base_dir, unquote(href.split('#')[0])))
+
+        titles = self._read_toc(archive, opf, items, opf_dir, resolve)
+        sizes = {info.filename: info.file_size for info in archive.infolist()}
+
+        spine = opf.find('.//opf:spine', NS)
+        for itemref in spine.findall('opf:itemref', NS) if spine is not None else []:
+            item = items.get(itemref.get('idref', ''))
+            if item is None or 'nav' in (item.get('properties') or '').split():
+                continue
+            href = resolve(opf_dir, item.get('href', ''))
+            title = titles.get(href) or posixpath.splitext(posixpath.basename(href))[0]
+            self.entries.append(ManifestEntry(len(self.entries), href, title, sizes.get(href, 0)))
+
+    def _read_toc(self, archive, opf, items, opf_dir, resolve) -> Dict[str, str]:
+        """Map document paths to their first TOC label (EPUB3 nav, then NCX)."""
+        titles: Dict[str, str] = {}
+
+        for item in items.values():
+            if 'nav' not in (item.get('properties') or '').split():
+                continue
+            nav_path = resolve(opf_dir, item.get('href'))
+            nav_dir = posixpath.dirname(nav_path)
+            try:
+                root = ElementTree.fromstring(archive.read(nav_path))
+            except (KeyError, ElementTree.ParseError):
+                continue
+            for nav in root.iter(f"{{{NS['xhtml']}}}nav"):
+                if nav.get(f"{{{NS['epub']}}}type") not in (None, 'toc'):
+                    continue
+                for link in nav.iter(f"{{{NS['xhtml']}}}a"):
+                    label = ' '.join(''.join(link.itertext()).split())
+                    if link.get('href') and label:
+                        titles.setdefault(resolve(nav_dir, link.get('href')), label)
+            if titles:
+                return titles
+
+        spine = opf.find('.//opf:spine', NS)
+        ncx_item = items.get(spine.get('toc')) if spine is not None else None
+        if ncx_item is None:
+            ncx_item = next((i for i in items.values()
+                             if i.get('media-type') == 'application/x-dtbncx+xml'), None)
+        if ncx_item is not None:
+            ncx_path = resolve(opf_dir, ncx_item.get('href'))
+            ncx_dir = posixpath.dirname(ncx_path)
+            try:
+                root = ElementTree.fromstring(archive.read(ncx_path))
+            except (KeyError, ElementTree.ParseError):
+                return titles
+            for point in root.iter(f"{{{NS['ncx']}}}navPoint"):
+                text = point.findtext('ncx:navLabel/ncx:text', namespaces=NS)
+                content = point.find('ncx:content', NS)
+                src = content.get('src') if content is not None else None
+                if text and src:
+                    titles.setdefault(resolve(ncx_dir, src), ' '.join(text.split()))
+
+        return titles
+
+    @property
+    def estimated_words(self) -> int:
+        """Estimated word count of the whole book."""
+        return sum(entry.estimated_words for entry in self.entries)
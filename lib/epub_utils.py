@@ -1,9 +1,14 @@
 """EPUB file manipulation utilities."""
 
 import os
+import posixpath
 import re
 from pathlib import Path
+from urllib.parse import unquote
 from typing import List, Tuple, Optional, Dict
+import json
+import hashlib
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 import ebooklib
 from ebooklib import epub
 from bs4 import BeautifulSoup
@@ -11,188 +16,353 @@ from rich.console import Console
 from rich.progress import track
 
 from lib.text_cleaner import TextCleaner
+from lib.chapter_classifier import get_classifier
+from lib.book_cache import BookCache, META_CHAPTER, META_CONTENT, META_SOURCE, documents_hash
 from config.settings import settings
 
 console = Console()
 
 
+def _analyze_document(content: str, index: int, anchors: Tuple[Tuple[str, str], ...] = (),
+                      max_words: int = 0, min_words: int = 0) -> List[Tuple[str, str, str, int]]:
+    """
+    Parse one spine document (runs in a worker process).
+    
+    Documents over max_words are split into sub-chapters at TOC anchors or
+    h1/h2/h3 headings (see _split_document).
+    
+    Args:
+        content: Document HTML
+        index: Position of the document in the book
+        anchors: (element id, TOC label) pairs pointing inside the document
+        max_words: Split documents longer than this (0 = never split)
+        min_words: Sections shorter than this are merged into the next one
+        
+    Returns:
+        List of tuples (content_html, title, cleaned_text, word_count)
+    """
+    text = TextCleaner.extract_text_from_html(content)
+    word_count = len(text.split())
+    if max_words and word_count > max_words:
+        sections = _split_document(content, index, anchors, max_words, min_words)
+        if len(sections) > 1:
+            return sections
+    
+    soup = BeautifulSoup(content, 'html.parser')
+    title = EPUBProcessor._extract_title(soup, index)
+    return [(content, title, text, word_count)]
+
+
+def _split_document(content: str, index: int, anchors: Tuple[Tuple[str, str], ...],
+                    max_words: int, min_words: int) -> List[Tuple[str, str, str, int]]:
+    """
+    Split an oversized document at TOC anchors, then h1, h2 and h3 headings.
+    
+    The shallowest kind of boundary found is used first; sections still
+    over max_words are split again at the next kind.
+    
+    Args:
+        content: Document HTML
+        index: Position of the document in the book (for fallback titles)
+        anchors: (element id, TOC label) pairs pointing inside the document
+        max_words: Target maximum words per section
+        min_words: Sections shorter than this are merged into the next one
+        
+    Returns:
+        List of tuples (content_html, title, cleaned_text, word_count)
+    """
+    soup = BeautifulSoup(content, 'html.parser')
+    body = soup.body or soup
+    line_starts = [0] + [m.end() for m in re.finditer('\n', content)]
+    
+    def offset(tag) -> int:
+        return line_starts[tag.sourceline - 1] + tag.sourcepos
+    
+    # Section bodies are wrapped in the document's own head and body tags
+    if soup.body is not None:
+        start = content.index('>', offset(soup.body)) + 1
+        end = content.rfind('</body')
+        prefix, suffix = content[:start], content[end:]
+    else:
+        start, end, prefix, suffix = 0, len(content), '', ''
+    
+    # Boundary kinds, from coarsest to finest: [(offset, title), ...]
+    boundaries = []
+    toc_marks = [(offset(tag), label) for fragment, label in anchors
+                 for tag in [body.find(id=fragment)] if tag is not None]
+    boundaries.append(sorted(toc_marks))
+    for level in ('h1', 'h2', 'h3'):
+        boundaries.append([(offset(tag), ' '.join(tag.get_text().split()))
+                           for tag in body.find_all(level)])
+    
+    def analyze(lo: int, hi: int) -> Tuple[str, int]:
+        text = TextCleaner.extract_text_from_html(content[lo:hi])
+        return text, len(text.split())
+    
+    def split(lo: int, hi: int, title: str, kinds: List) -> List[Tuple[int, int, str, str, int]]:
+        text, words = analyze(lo, hi)
+        if words <= max_words:
+            return [(lo, hi, title, text, words)]
+        
+        for depth, marks in enumerate(kinds):
+            inside = [(pos, label) for pos, label in marks if lo < pos < hi]
+            if not inside:
+                continue
+            
+            # Text before the first boundary keeps the enclosing title
+            edges = [(lo, title)] + inside
+            pieces: List[Tuple[int, int, int, str]] = []
+            for (piece_lo, label), (piece_hi, _) in zip(edges, edges[1:] + [(hi, '')]):
+                if pieces and pieces[-1][2] < min_words:
+                    # Merge a too-short section (e.g. a bare part heading) into this one
+                    piece_lo = pieces.pop()[0]
+                pieces.append((piece_lo, piece_hi, analyze(piece_lo, piece_hi)[1], label or title))
+            if len(pieces) > 1 and pieces[-1][2] < min_words:
+                # ...and a too-short tail into the section before it
+                tail = pieces.pop()
+                piece_lo, _, _, label = pieces.pop()
+                pieces.append((piece_lo, tail[1], analyze(piece_lo, tail[1])[1], label))
+            
+            if len(pieces) == 1:
+                return split(lo, hi, title, kinds[depth + 1:])
+            
+            result = []
+            for piece_lo, piece_hi, _, label in pieces:
+                result.extend(split(piece_lo, piece_hi, label, kinds[depth + 1:]))
+            return result
+        
+        return [(lo, hi, title, text, words)]
+    
+    title = EPUBProcessor._extract_title(soup, index)
+    return [(prefix + content[lo:hi] + suffix, label, text, words)
+            for lo, hi, label, text, words in split(start, end, title, boundaries)]
+
+
+def _write_chapter_epub(filename: Path, metadata: Dict, chapter_id: str, title: str,
+                        content: str, marks: Dict[str, str]) -> Path:
+    """
+    Write one chapter as a standalone EPUB (runs in a worker process).
+    
+    Args:
+        filename: Destination EPUB path
+        metadata: Source book metadata (title, creators, language)
+        chapter_id: Chapter ID
+        title: Chapter display title
+        content: Chapter HTML
+        marks: Extra OPF <meta> name/content pairs (the book cache's get a
+               hash of the chapter document added)
+        
+    Returns:
+        Path of the written file
+    """
+    # Create new EPUB for this chapter
+    chapter_book = epub.EpubBook()
+    
+    # Set metadata
+    if metadata['title']:
+        chapter_book.set_title(f"{metadata['title']} - {title}")
+    else:
+        chapter_book.set_title(title)
+    
+    # Copy other metadata if exists
+    for author in metadata['creators']:
+        chapter_book.add_author(author)
+    
+    chapter_book.set_language(metadata['language'] or 'fr')
+    
+    # Create chapter item
+    chapter_item = epub.EpubHtml(
+        title=title,
+        file_name=f'{chapter_id}.xhtml',
+        lang='fr'
+    )
+    chapter_item.content = content.encode('utf-8')
+    
+    # Add chapter to book
+    chapter_book.add_item(chapter_item)
+    
+    if marks:
+        # The document as it will be written, so that edits can be detected
+        marks = {**marks, META_CONTENT: documents_hash([chapter_item.get_content()])}
+    for name, value in marks.items():
+        chapter_book.add_metadata(None, 'meta', '', {'name': name, 'content': value})
+    
+    # Create TOC and spine
+    chapter_book.toc = (epub.Link(f'{chapter_id}.xhtml', title, chapter_id),)
+    chapter_book.spine = ['nav', chapter_item]
+    
+    # Add navigation files
+    chapter_book.add_item(epub.EpubNcx())
+    chapter_book.add_item(epub.EpubNav())
+    
+    # Write EPUB next to its destination, then swap it in
+    tmp_filename = filename.with_name(f".{filename.name}.tmp")
+    epub.write_epub(str(tmp_filename), chapter_book, {})
+    os.replace(tmp_filename, filename)
+    return filename
+
+
+def split_sources(directory: Path) -> Dict[str, str]:
+    """
+    Source book of each chapter EPUB split into a directory.
+    
+    Read from the manifests split_into_chapters leaves next to the files.
+    
+    Args:
+        directory: Directory of split chapter EPUBs
+        
+    Returns:
+        Chapter file name -> stem of the book it was split from
+    """
+    sources: Dict[str, str] = {}
+    for manifest in Path(directory).glob(".*.split.json"):
+        try:
+            names = json.loads(manifest.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            continue
+        book = manifest.name[1:-len(".split.json")]
+        sources.update(dict.fromkeys(names, book))
+    return sources
+
+
 class EPUBProcessor:
     """Handle EPUB file operations."""
     
-    # Keywords to identify non-content sections
-    SKIP_KEYWORDS = [
-        'sommaire', 'table des matières', 'table des noms', 'index',
-        'bibliographie', 'références', 'notes', 'glossaire', 'lexique',
-        'copyright', 'page de titre', 'couverture', 'colophon',
-        'table of contents', 'bibliography', 'references', 'glossary'
-    ]
-    
-    # Keywords to identify real content start
-    CONTENT_START_KEYWORDS = [
-        'introduction', 'préface', 'avant-propos', 'prologue',
-        'chapitre', 'chapter', 'partie', 'part', 'livre', 'book'
-    ]
-    
-    def __init__(self, epub_path: Path):
+    # Below this many documents a process pool costs more than it saves
+    PARALLEL_MIN_DOCUMENTS = 8
+    
+    def __init__(self, epub_path: Path, use_cache: Optional[bool] = None,
+                 workers: Optional[int] = None):
         """
         Initialize EPUB processor.
         
         Args:
             epub_path: Path to the EPUB file
+            use_cache: Reuse processed chapters from the book cache
+                       (default: settings.BOOK_CACHE)
+            workers: Processes used to parse documents (default:
+                     settings.MAX_WORKERS, 1 = parse in this process)
         """
         self.epub_path = Path(epub_path)
-        self.book = epub.read_epub(str(epub_path))
         self.cleaner = TextCleaner()
+        self.use_cache = settings.BOOK_CACHE if use_cache is None else use_cache
+        self.workers = settings.MAX_WORKERS if workers is None else workers
+        self._book = None
+        self._processed: Dict[bool, Dict] = {}
+        
+    @property
+    def book(self) -> epub.EpubBook:
+        """Parsed EPUB, read on first use (cache hits never need it)."""
+        if self._book is None:
+            self._book = epub.read_epub(str(self.epub_path))
+        return self._book
         
-    def _should_skip_section(self, title: str, text: str) -> bool:
+    def get_chapters(self, skip_metadata: bool = True) -> List[Tuple[str, str, str]]:
         """
-        Determine if a section should be skipped.
+        Extract chapters from EPUB intelligently.
         
         Args:
-            title: Section title
-            text: Section text content
+            skip_metadata: Skip non-content sections
             
         Returns:
-            True if section should be skipped
+            List of tuples (chapter_id, title, content_html)
         """
-        title_lower = title.lower()
-        
-        # Check if it's a known skip section (but be less aggressive)
-        skip_count = 0
-        for keyword in self.SKIP_KEYWORDS:
-            if keyword in title_lower:
-                skip_count += 1
-        
-        # Only skip if title strongly suggests metadata (multiple keywords)
-        if skip_count >= 2:
-            return True
-        
-        # For single keyword matches, check content length
-        if skip_count == 1:
-            word_count = len(text.split())
-            # Only skip if REALLY short (less than 50 words for metadata sections)
-            if word_count < 50:
-                return True
-                
-        # For normal chapters, use the configured minimum
-        word_count = len(text.split())
-        if word_count < settings.MIN_CHAPTER_LENGTH and not self._is_content_start(title):
-            return True
-            
-        return False
+        return [(chapter['id'], chapter['title'], chapter['content'])
+                for chapter in self.process(skip_metadata)['chapters']]
     
-    def _is_content_start(self, title: str) -> bool:
+    def process(self, skip_metadata: bool = True) -> Dict:
         """
-        Check if this marks the start of actual content.
+        Classify and clean the book, using the book cache when possible.
         
         Args:
-            title: Section title
+            skip_metadata: Skip non-content sections
             
         Returns:
-            True if this is where content starts
+            Dict with 'key' (cache key or None), 'metadata' (title, creators,
+            language), 'chapters' (id, title, content, text, words) and
+            'skipped' (title, words, reason)
         """
-        title_lower = title.lower()
+        if skip_metadata in self._processed:
+            return self._processed[skip_metadata]
         
-        for keyword in self.CONTENT_START_KEYWORDS:
-            if keyword in title_lower:
-                return True
+        cache = BookCache() if self.use_cache else None
+        key = cache.key_for(self.epub_path, skip_metadata) if cache else None
+        data = cache.load(key) if cache and key else None
         
-        return False
-    
-    def _extract_chapter_number(self, title: str) -> Optional[int]:
-        """
-        Extract chapter number from title if present.
+        if data is not None:
+            console.print(f"[green]Loaded {len(data['chapters'])} chapters from cache[/green]")
+        else:
+            data = self._process(skip_metadata)
+            if cache and key:
+                cache.save(key, data)
         
-        Args:
-            title: Chapter title
-            
-        Returns:
-            Chapter number or None
-        """
-        # Look for patterns like "Chapitre 1", "Chapter I", "Partie 2", etc.
-        patterns = [
-            r'chapitre\s+(\d+)',
-            r'chapter\s+(\d+)',
-            r'partie\s+(\d+)',
-            r'part\s+(\d+)',
-            r'livre\s+(\d+)',
-            r'book\s+(\d+)',
-        ]
-        
-        title_lower = title.lower()
-        for pattern in patterns:
-            match = re.search(pattern, title_lower)
-            if match:
-                return int(match.group(1))
-                
-        # Try Roman numerals
-        roman_pattern = r'(?:chapitre|chapter|partie|part)\s+([IVXLCDM]+)'
-        match = re.search(roman_pattern, title_lower)
-        if match:
-            return self._roman_to_int(match.group(1))
-            
-        return None
-    
-    def _roman_to_int(self, roman: str) -> int:
-        """Convert Roman numeral to integer."""
-        roman_dict = {'I': 1, 'V': 5, 'X': 10, 'L': 50, 'C': 100, 'D': 500, 'M': 1000}
-        total = 0
-        prev = 0
-        
-        for char in roman.upper()[::-1]:
-            value = roman_dict.get(char, 0)
-            if value < prev:
-                total -= value
-            else:
-                total += value
-            prev = value
-            
-        return total
+        data['key'] = key
+        self._processed[skip_metadata] = data
+        return data
     
-    def get_chapters(self, skip_metadata: bool = True) -> List[Tuple[str, str, str]]:
-        """
-        Extract chapters from EPUB intelligently.
-        
-        Args:
-            skip_metadata: Skip non-content sections
-            
-        Returns:
-            List of tuples (chapter_id, title, content_html)
-        """
+    def _process(self, skip_metadata: bool) -> Dict:
+        """Parse, classify and clean every document of the book."""
         chapters = []
+        skipped = []
         content_started = False
         chapter_counter = 0
         
+        titles = self.book.get_metadata('DC', 'title')
+        languages = self.book.get_metadata('DC', 'language')
+        metadata = {
+            'title': titles[0][0] if titles else None,
+            'creators': [author[0] for author in self.book.get_metadata('DC', 'creator')],
+            'language': languages[0][0] if languages else None,
+        }
+        classifier = get_classifier(metadata['language'])
+        
         # Get all items of type DOCUMENT
         items = list(self.book.get_items_of_type(ebooklib.ITEM_DOCUMENT))
+        contents = [item.get_content().decode('utf-8', errors='ignore') for item in items]
         
-        for idx, item in enumerate(items):
-            # Get content
-            content = item.get_content().decode('utf-8', errors='ignore')
-            
-            # Parse to get title and text
-            soup = BeautifulSoup(content, 'html.parser')
-            title = self._extract_title(soup, idx)
-            text = self.cleaner.extract_text_from_html(content)
-            word_count = len(text.split())
+        # Parsing and cleaning are independent per document; the
+        # order-dependent classification below stays sequential
+        toc_anchors = self._toc_anchors()
+        anchors = [tuple(toc_anchors.get(item.get_name(), ())) for item in items]
+        max_words = [settings.MAX_CHAPTER_WORDS] * len(contents)
+        min_words = [settings.MIN_CHAPTER_LENGTH] * len(contents)
+        if self.workers > 1 and len(contents) >= self.PARALLEL_MIN_DOCUMENTS:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(contents))) as executor:
+                analyzed = list(executor.map(_analyze_document, contents, range(len(contents)),
+                                             anchors, max_words, min_words,
+                                             chunksize=max(1, len(contents) // (self.workers * 4))))
+        else:
+            analyzed = list(map(_analyze_document, contents, range(len(contents)),
+                                anchors, max_words, min_words))
+        
+        sections = [section for document in analyzed for section in document]
+        oversized = [document for document in analyzed if len(document) > 1]
+        if oversized:
+            console.print(f"[cyan]Split {len(oversized)} oversized document(s) into "
+                          f"{sum(len(d) for d in oversized)} sections[/cyan]")
+        
+        for content, title, text, word_count in sections:
+            section = classifier.classify(title)
             
             # Check if we should start collecting content
-            if not content_started and self._is_content_start(title):
+            if not content_started and section.content_start:
                 content_started = True
                 console.print(f"[green]Content starts at: {title}[/green]")
             
             # Skip if we haven't reached content yet
             if skip_metadata and not content_started:
                 console.print(f"[yellow]Skipped metadata:[/yellow] {title}")
+                skipped.append({'title': title, 'words': word_count, 'reason': 'metadata'})
                 continue
             
             # Skip non-content sections
-            if skip_metadata and self._should_skip_section(title, text):
+            if skip_metadata and section.should_skip(word_count):
                 console.print(f"[yellow]Skipped section:[/yellow] {title} ({word_count} words)")
+                skipped.append({'title': title, 'words': word_count, 'reason': 'section'})
                 continue
             
-            # Extract chapter number if present
-            chapter_num = self._extract_chapter_number(title)
+            # Chapter number from the title, if present
+            chapter_num = section.number
             
             # Create a proper chapter ID
             if chapter_num is not None:
@@ -204,12 +374,58 @@ class EPUBProcessor:
                 chapter_id = f"ch{chapter_counter:03d}"
                 display_title = f"Chapter {chapter_counter}: {title}"
             
-            chapters.append((chapter_id, display_title, content))
+            chapters.append({
+                'id': chapter_id,
+                'title': display_title,
+                'content': content,
+                'text': text,
+                'words': word_count,
+            })
             console.print(f"[green]Found chapter:[/green] {display_title} ({word_count} words)")
-                
-        return chapters
+        
+        return {'metadata': metadata, 'chapters': chapters, 'skipped': skipped}
+    
+    def _toc_anchors(self) -> Dict[str, List[Tuple[str, str]]]:
+        """
+        TOC entries that point inside a document.
+        
+        Returns:
+            Mapping of document file name to (element id, TOC label) pairs
+        """
+        anchors: Dict[str, List[Tuple[str, str]]] = {}
+        documents = {item.get_name() for item in self.book.get_items_of_type(ebooklib.ITEM_DOCUMENT)}
+        
+        # Document names are relative to the OPF, TOC hrefs to the NCX or
+        # nav file they come from, which may sit in another directory
+        ncx_dirs = [posixpath.dirname(item.get_name()) for item in self.book.get_items()
+                    if isinstance(item, epub.EpubNcx)]
+        nav_dirs = [posixpath.dirname(item.get_name()) for item in self.book.get_items()
+                    if isinstance(item, epub.EpubNav)]
+        
+        def resolve(name: str) -> str:
+            for base in ncx_dirs + [''] + nav_dirs:
+                path = posixpath.normpath(posixpath.join(base, name))
+                if path in documents:
+                    return path
+            return name
+        
+        def walk(entries):
+            if not isinstance(entries, (tuple, list)):
+                entries = [entries]
+            for entry in entries:
+                if isinstance(entry, (tuple, list)):
+                    walk(entry)
+                    continue
+                href = getattr(entry, 'href', None) or ''
+                if '#' in href and entry.title:
+                    name, fragment = href.split('#', 1)
+                    anchors.setdefault(resolve(unquote(name)), []).append((fragment, entry.title))
+        
+        walk(self.book.toc)
+        return anchors
     
-    def _extract_title(self, soup: BeautifulSoup, index: int) -> str:
+    @staticmethod
+    def _extract_title(soup: BeautifulSoup, index: int) -> str:
         """
         Extract chapter title from HTML.
         
@@ -239,17 +455,40 @@ class EPUBProcessor:
         # Fallback to generic title
         return f"Section {index + 1}"
     
+    def chapter_file_stem(self, chapter_id: str, title: str) -> str:
+        """
+        File name (without extension) for a chapter of this book.
+        
+        Args:
+            chapter_id: Chapter ID (e.g. ch001)
+            title: Chapter display title
+            
+        Returns:
+            "<book>_<chapter_id>_<safe_title>"
+        """
+        safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).rstrip()
+        safe_title = safe_title[:50]  # Limit length
+        safe_title = re.sub(r'\s+', '_', safe_title)  # Replace spaces with underscores
+        return f"{self.epub_path.stem}_{chapter_id}_{safe_title}"
+    
     def split_into_chapters(self, output_dir: Optional[Path] = None, 
-                           skip_metadata: bool = True) -> List[Path]:
+                           skip_metadata: bool = True,
+                           executor: Optional[Executor] = None) -> List[Path]:
         """
         Split EPUB into individual chapter files with intelligent naming.
         
+        Chapter files whose content is unchanged since the previous split
+        are left untouched; files from the previous split that no longer
+        correspond to a chapter are removed.
+        
         Args:
             output_dir: Directory to save split files
             skip_metadata: Skip non-content sections
+            executor: Executor writing the files (default: a process pool
+                      of self.workers processes)
             
         Returns:
-            List of paths to created EPUB files
+            List of paths to the chapter EPUB files
         """
         if output_dir is None:
             output_dir = settings.SPLIT_OUTPUT_DIR
@@ -257,63 +496,70 @@ class EPUBProcessor:
         output_dir = Path(output_dir)
         output_dir.mkdir(parents=True, exist_ok=True)
         
-        # Get base name without extension
-        base_name = self.epub_path.stem
-        
+        processed = self.process(skip_metadata=skip_metadata)
         chapters = self.get_chapters(skip_metadata=skip_metadata)
-        created_files = []
+        metadata = processed['metadata']
+        fingerprint = BookCache.settings_fingerprint(skip_metadata)
+        
+        # Hashes of the files written by the previous split of this book
+        manifest_path = output_dir / f".{self.epub_path.stem}.split.json"
+        try:
+            previous = json.loads(manifest_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            previous = {}
         
         console.print(f"\n[bold blue]Splitting {len(chapters)} chapters from {self.epub_path.name}[/bold blue]")
         
-        for chapter_id, title, content in track(chapters, description="Creating EPUB files"):
-            # Create new EPUB for this chapter
-            chapter_book = epub.EpubBook()
-            
-            # Set metadata
-            original_title = self.book.get_metadata('DC', 'title')
-            if original_title:
-                chapter_book.set_title(f"{original_title[0][0]} - {title}")
-            else:
-                chapter_book.set_title(title)
-            
-            # Copy other metadata if exists
-            for author in self.book.get_metadata('DC', 'creator'):
-                chapter_book.add_author(author[0])
-            
-            chapter_book.set_language(self.book.get_metadata('DC', 'language')[0][0] 
-                                     if self.book.get_metadata('DC', 'language') else 'fr')
-            
-            # Create chapter item
-            chapter_item = epub.EpubHtml(
-                title=title,
-                file_name=f'{chapter_id}.xhtml',
-                lang='fr'
-            )
-            chapter_item.content = content.encode('utf-8')
-            
-            # Add chapter to book
-            chapter_book.add_item(chapter_item)
-            
-            # Create TOC and spine
-            chapter_book.toc = (epub.Link(f'{chapter_id}.xhtml', title, chapter_id),)
-            chapter_book.spine = ['nav', chapter_item]
-            
-            # Add navigation files
-            chapter_book.add_item(epub.EpubNcx())
-            chapter_book.add_item(epub.EpubNav())
-            
+        current = {}
+        created_files = []
+        to_write = []
+        for index, (chapter_id, title, content) in enumerate(chapters):
             # Generate filename with clean chapter ID and safe title
-            safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).rstrip()
-            safe_title = safe_title[:50]  # Limit length
-            safe_title = re.sub(r'\s+', '_', safe_title)  # Replace spaces with underscores
-            
-            filename = output_dir / f"{base_name}_{chapter_id}_{safe_title}.epub"
+            filename = output_dir / f"{self.chapter_file_stem(chapter_id, title)}.epub"
             
-            # Write EPUB
-            epub.write_epub(str(filename), chapter_book, {})
+            digest = hashlib.sha256(json.dumps(
+                [fingerprint, metadata, index, chapter_id, title, content],
+                ensure_ascii=False).encode('utf-8')).hexdigest()
+            current[filename.name] = digest
             created_files.append(filename)
             
-        console.print(f"[bold green]✓ Created {len(created_files)} EPUB files in {output_dir}[/bold green]")
+            if previous.get(filename.name) == digest and filename.exists():
+                continue
+            
+            # Let the convert stage find this chapter in the book cache
+            marks = {META_SOURCE: processed['key'], META_CHAPTER: str(index)} if processed['key'] else {}
+            to_write.append((filename, metadata, chapter_id, title, content, marks))
+        
+        if to_write:
+            own_executor = executor is None
+            pool: Executor
+            if executor is not None:
+                pool = executor
+            elif self.workers > 1 and len(to_write) > 1:
+                pool = ProcessPoolExecutor(max_workers=min(self.workers, len(to_write)))
+            else:
+                pool = ThreadPoolExecutor(1)
+            try:
+                futures = [pool.submit(_write_chapter_epub, *args) for args in to_write]
+                for future in track(as_completed(futures), total=len(futures),
+                                    description="Creating EPUB files"):
+                    future.result()
+            finally:
+                if own_executor:
+                    pool.shutdown()
+        
+        # Remove chapter files that disappeared from this book
+        removed = 0
+        for name in set(previous) - set(current):
+            if (output_dir / name).exists():
+                (output_dir / name).unlink()
+                removed += 1
+        
+        manifest_path.write_text(json.dumps(current, indent=2, ensure_ascii=False), encoding='utf-8')
+        
+        unchanged = len(created_files) - len(to_write)
+        console.print(f"[bold green]✓ {len(to_write)} EPUB files written, {unchanged} unchanged"
+                      f"{f', {removed} removed' if removed else ''} in {output_dir}[/bold green]")
         return created_files
     
     def extract_full_text(self, skip_metadata: bool = True) -> str:
@@ -327,11 +573,9 @@ class EPUBProcessor:
             Full text content
         """
         full_text = []
-        chapters = self.get_chapters(skip_metadata=skip_metadata)
         
-        for chapter_id, title, content in chapters:
-            text = self.cleaner.extract_text_from_html(content)
-            if text:
-                full_text.append(f"# {title}\n\n{text}")
+        for chapter in self.process(skip_metadata=skip_metadata)['chapters']:
+            if chapter['text']:
+                full_text.append(f"# {chapter['title']}\n\n{chapter['text']}")
                 
         return "\n\n".join(full_text)
\ No newline at end of file
@@ -0,0 +1,270 @@
+"""Watch a folder for new or modified EPUB files.
+
+Files are reported once they have stopped changing for a debounce delay,
+so a book still being copied is never picked up half-written. On Linux,
+inotify wakes the watcher as soon as something happens in the folder;
+the folder is also rescanned periodically, which is the only mechanism
+elsewhere and also catches writes inotify cannot see (NFS/SMB shares
+written from another machine).
+"""
+
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import threading
+import time
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from config.settings import settings
+from lib.work_queue import write_json_atomic
+
+# inotify event masks (linux/inotify.h)
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+# File state: (size, mtime in nanoseconds)
+Signature = Tuple[int, int]
+
+
+class Inotify:
+    """Minimal inotify wrapper (ctypes, no dependency) for one directory."""
+
+    def __init__(self, directory: Path):
+        """
+        Start watching a directory.
+
+        Raises:
+            OSError: If inotify is unavailable (not Linux, watch limit reached)
+        """
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError("inotify is not available on this system")
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(str(directory)), WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"Cannot watch {directory}")
+
+    def wait(self, timeout: float) -> List[str]:
+        """
+        Wait for events.
+
+        Args:
+            timeout: Seconds to wait at most
+
+        Returns:
+            Names of the files that changed (empty on timeout)
+        """
+        readable, _, _ = select.select([self.fd], [], [], max(0.0, timeout))
+        if not readable:
+            return []
+        names = []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            names.append(data[offset:offset + length].rstrip(b'\0').decode(errors='replace'))
+            offset += length
+        return names
+
+    def close(self):
+        """Stop watching."""
+        os.close(self.fd)
+
+
+class FolderWatcher:
+    """Report EPUB files of a folder that are new or changed, once stable."""
+
+    def __init__(self, directory: Path, state_path: Optional[Path] = None,
+                 debounce: Optional[float] = None, poll_interval: Optional[float] = None,
+                 use_inotify: bool = True, pattern: str = "*.epub"):
+        """
+        Initialize the watcher.
+
+        Args:
+            directory: Folder to watch
+            state_path: JSON file remembering processed files across restarts
+            debounce: Seconds a file must stay unchanged (default: WATCH_DEBOUNCE_SECONDS)
+            poll_interval: Seconds between rescans (default: WATCH_POLL_SECONDS)
+            use_inotify: Wake up on inotify events when available
+            pattern: Glob of the files to watch
+        """
+        self.directory = Path(directory)
+        self.state_path = Path(state_path) if state_path else None
+        self.debounce = settings.WATCH_DEBOUNCE_SECONDS if debounce is None else debounce
+        self.poll_interval = settings.WATCH_POLL_SECONDS if poll_interval is None else poll_interval
+        self.pattern = pattern
+
+        self.processed: Dict[str, Signature] = {}
+        if self.state_path and self.state_path.exists():
+            try:
+                state = json.loads(self.state_path.read_text(encoding='utf-8'))
+                self.processed = {name: tuple(sig) for name, sig in state.items()}
+            except ValueError:
+                pass
+
+        # name -> (signature last seen, monotonic time it last changed)
+        self._seen: Dict[str, Tuple[Signature, float]] = {}
+
+        self.inotify = None
+        if use_inotify:
+            try:
+                self.inotify = Inotify(self.directory)
+            except OSError:
+                self.inotify = None
+
+    @property
+    def mode(self) -> str:
+        """'inotify' or 'polling'."""
+        return 'inotify' if self.inotify else 'polling'
+
+    def _signature(self, path: Path) -> Optional[Signature]:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def scan(self, now: Optional[float] = None) -> List[Path]:
+        """
+        Rescan the folder.
+
+        Args:
+            now: Current monotonic time (for tests)
+
+        Returns:
+            Files that changed since they were last processed and have been
+            stable for the debounce delay
+        """
+        now = time.monotonic() if now is None else now
+        ready = []
+        names = set()
+        for path in sorted(self.directory.glob(self.pattern)):
+            if path.name.startswith('.'):
+                continue
+            signature = self._signature(path)
+            if signature is None:
+                continue
+            names.add(path.name)
+            if self.processed.get(path.name) == signature:
+                continue
+
+            seen = self._seen.get(path.name)
+            if seen is None or seen[0] != signature:
+                # New or still being written: the debounce delay runs from its
+                # last modification (clamped, in case of clock skew on shares)
+                age = min(max(0.0, time.time() - signature[1] / 1e9), self.debounce)
+                seen = self._seen[path.name] = (signature, now - age)
+            if now - seen[1] >= self.debounce and zipfile.is_zipfile(path):
+                ready.append(path)
+
+        for name in set(self._seen) - names:
+            del self._seen[name]
+        return ready
+
+    def _remaining(self, now: float) -> List[float]:
+        """Seconds left of the debounce delay of each changed file."""
+        return [since + self.debounce - now for signature, since in self._seen.values()
+                if since + self.debounce > now]
+
+    def pending(self) -> int:
+        """Number of changed files still waiting for the debounce delay."""
+        return len(self._remaining(time.monotonic()))
+
+    def mark_processed(self, path: Path):
+        """Remember a file as handled until it changes again."""
+        # The state it was picked up in: a write during processing still counts
+        seen = self._seen.get(path.name)
+        signature = seen[0] if seen else self._signature(path)
+        if signature is None:
+            return
+        self.processed[path.name] = signature
+        self._seen.pop(path.name, None)
+        if self.state_path:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            write_json_atomic(self.state_path, {name: list(sig) for name, sig in self.processed.items()})
+
+    def wait(self, timeout: Optional[float] = None):
+        """
+        Sleep until something may have changed.
+
+        Returns early on inotify events; otherwise waits for the poll
+        interval, or less when a pending file's debounce delay ends sooner.
+        """
+        timeout = self.poll_interval if timeout is None else timeout
+        remaining = self._remaining(time.monotonic())
+        if remaining:
+            timeout = min(timeout, max(0.1, min(remaining)))
+        if self.inotify:
+            self.inotify.wait(timeout)
+        else:
+            time.sleep(timeout)
+
+    def close(self):
+        """Release the inotify descriptor."""
+        if self.inotify:
+            self.inotify.close()
+            self.inotify = None
+
+
+class BookStatus:
+    """Status file of one watched book, rewritten atomically on every change."""
+
+    def __init__(self, status_dir: Path, book: Path):
+        """
+        Args:
+            status_dir: Directory of the status files
+            book: Watched EPUB file
+        """
+        status_dir = Path(status_dir)
+        status_dir.mkdir(parents=True, exist_ok=True)
+        self.path = status_dir / f"{Path(book).stem}.status.json"
+        self.data = {
+            'book': str(book),
+            'state': 'queued',
+            'detected_at': time.time(),
+            'chapters': 0,
+            'changed': 0,
+            'jobs': 0,
+            'done': 0,
+            'failed': [],
+            'outputs': [],
+            'error': None,
+        }
+        self._lock = threading.Lock()
+        self.save()
+
+    def update(self, **fields):
+        """Set fields and rewrite the status file."""
+        with self._lock:
+            self.data.update(fields)
+            self.save()
+
+    def advance(self):
+        """Count one more finished audio file (called from worker threads)."""
+        with self._lock:
+            self.data['done'] += 1
+            self.save()
+
+    def save(self):
+        self.data['updated_at'] = time.time()
+        if self.data['state'] in ('done', 'failed'):
+            self.data['latency_seconds'] = round(self.data['updated_at'] - self.data['detected_at'], 1)
+        write_json_atomic(self.path, self.data)
@@ -0,0 +1,211 @@
+"""Durable journal of synthesis jobs, for resuming interrupted conversions.
+
+Each book (or chunked output) has a JSON journal recording, for every
+job, its state, a hash of its inputs (text and audio settings) and the
+size and SHA-256 of each file it produced. Finished and failed jobs are
+appended to a log next to it (one JSON line each, flushed to disk), so
+recording a job costs the same on the last chunk of a book as on the
+first; the log is folded into the journal, rewritten atomically, when a
+run starts. A crash loses at most a half-written last line. A resumed run
+skips the jobs whose recorded outputs are still there and unchanged, and
+runs the others.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from lib.book_cache import file_hash
+from lib.job_runner import Job, JobResult
+from lib.work_queue import write_json_atomic
+
+VERSION = 1
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+
+def inputs_digest(*parts: Any) -> str:
+    """Hash of everything a job's output depends on."""
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False, default=str)
+                          .encode('utf-8')).hexdigest()
+
+
+class JobJournal:
+    """State, inputs and output checksums of the jobs of one book."""
+
+    def __init__(self, path: Path):
+        """
+        Load a journal and replay its log (an unreadable or outdated
+        journal counts as empty).
+
+        Args:
+            path: Journal file (its log is the same name with .log)
+        """
+        self.path = Path(path)
+        self.log_path = self.path.with_suffix('.log')
+        self._lock = threading.Lock()
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            data = {}
+        self.jobs: Dict[str, Dict[str, Any]] = \
+            data.get('jobs', {}) if data.get('version') == VERSION else {}
+        try:
+            lines = self.log_path.read_text(encoding='utf-8').splitlines()
+        except OSError:
+            lines = []
+        for line in lines:
+            try:
+                key, entry = json.loads(line)
+            except ValueError:
+                continue  # Torn by a crash mid-write
+            self.jobs[key] = entry
+
+    def save(self):
+        """Write the whole journal durably and empty its log."""
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            write_json_atomic(self.path, {'version': VERSION, 'jobs': self.jobs}, durable=True)
+            self.log_path.unlink(missing_ok=True)
+
+    def _set(self, key: str, state: str, inputs: str, log: bool = False, **fields):
+        with self._lock:
+            entry = {'state': state, 'inputs': inputs, 'updated_at': time.time(), **fields}
+            self.jobs[key] = entry
+            if log:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.log_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps([key, entry], ensure_ascii=False) + '\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+
+    def mark_pending(self, key: str, inputs: str, save: bool = True):
+        """Record a job about to run."""
+        self._set(key, PENDING, inputs)
+        if save:
+            self.save()
+
+    def mark_done(self, key: str, inputs: str, paths: Iterable[Path]):
+        """Record a finished job and checksum its output files."""
+        outputs = [{'path': str(path), 'size': Path(path).stat().st_size,
+                    'sha256': file_hash(Path(path))} for path in paths]
+        self._set(key, DONE, inputs, log=True, outputs=outputs)
+
+    def mark_failed(self, key: str, inputs: str, error: str):
+        """Record a job that failed."""
+        self._set(key, FAILED, inputs, log=True, error=error)
+
+    def verified(self, key: str, inputs: str) -> Optional[List[Path]]:
+        """
+        Check a job's recorded outputs.
+
+        Returns:
+            Output files if the job is done with the same inputs and every
+            output still has its recorded size and checksum, None otherwise
+        """
+        entry = self.jobs.get(key)
+        if not entry or entry['state'] != DONE or entry['inputs'] != inputs:
+            return None
+        paths = []
+        for output in entry['outputs']:
+            path = Path(output['path'])
+            try:
+                if path.stat().st_size != output['size'] or file_hash(path) != output['sha256']:
+                    return None
+            except OSError:
+                return None
+            paths.append(path)
+        return paths
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per state."""
+        counts = {PENDING: 0, DONE: 0, FAILED: 0}
+        for entry in self.jobs.values():
+            counts[entry['state']] += 1
+        return counts
+
+
+def journal_jobs(jobs: List[Job], journals_of: Callable[[Job], List[JobJournal]],
+                 resume: bool = False,
+                 files: Optional[Callable[[Any], List[Path]]] = None
+                 ) -> Tuple[List[Job], Dict[str, List[Path]]]:
+    """
+    Record jobs in their journals and skip those already done.
+
+    Each job needs an `inputs` digest. Its commit is wrapped to record its
+    output files and their checksums as soon as it succeeds.
+
+    A job with members (a batch) is recorded through them instead: each
+    member is skipped or recorded on its own, and the batch keeps only the
+    members still to run. Its commit must call theirs. How jobs were
+    batched therefore does not matter when resuming.
+
+    Args:
+        jobs: Jobs to run
+        journals_of: Journals recording a job (several for a job that
+                     produces files of several books)
+        resume: Skip jobs whose outputs are verified in their journal
+        files: Files produced, from a job's result (default: [result])
+
+    Returns:
+        (jobs to run, output files of the skipped jobs by job key)
+    """
+    files = files or (lambda value: [value])
+    to_run, skipped = [], {}
+    touched = {}
+
+    for job in jobs:
+        remaining = []
+        for unit in job.members or [job]:
+            inputs = unit.inputs
+            if inputs is None:
+                raise ValueError(f"Job {unit.key} has no inputs digest to journal")
+            journals = journals_of(unit)
+            if resume:
+                outputs = journals[0].verified(unit.key, inputs)
+                if outputs is not None:
+                    skipped[unit.key] = outputs
+                    continue
+
+            for journal in journals:
+                journal.mark_pending(unit.key, inputs, save=False)
+                touched[id(journal)] = journal
+            unit.journals = journals
+
+            def commit(value, unit=unit, inputs=inputs, original=unit.commit):
+                value = original(value) if original else value
+                for journal in unit.journals:
+                    journal.mark_done(unit.key, inputs, files(value))
+                return value
+
+            unit.commit = commit
+            remaining.append(unit)
+
+        if not remaining:
+            continue
+        if job.members:
+            job.members = remaining
+            job.sources = [source for member in remaining for source in member.sources]
+        to_run.append(job)
+
+    for journal in touched.values():
+        journal.save()
+    return to_run, skipped
+
+
+def record_failures(jobs: List[Job], results: Dict[str, JobResult]):
+    """Record the jobs that failed in their journals (see journal_jobs)."""
+    for job in jobs:
+        result = results.get(job.key)
+        if result is None or result.ok:
+            continue
+        for unit in job.members or [job]:
+            if unit.inputs is not None:
+                for journal in unit.journals:
+                    journal.mark_failed(unit.key, unit.inputs, str(result.error))
@@ -0,0 +1,344 @@
+"""Deadline-aware job runner with retries and speculative execution."""
+
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from config.settings import settings
+from lib.cpu_budget import ThreadBudget, WorkerSlot
+
+
+def expected_synthesis_seconds(text: str, speed: float = 1.0,
+                               rtf: Optional[float] = None) -> float:
+    """
+    Estimate how long Piper needs to synthesize a text.
+
+    Args:
+        text: Text to synthesize
+        speed: Speech speed (higher speed = shorter audio)
+        rtf: Real-time factor, wall seconds per audio second
+             (default: settings.TTS_EXPECTED_RTF)
+
+    Returns:
+        Expected wall-clock seconds
+    """
+    rtf = settings.TTS_EXPECTED_RTF if rtf is None else rtf
+    audio_seconds = len(text) / settings.TTS_CHARS_PER_SECOND / speed
+    return audio_seconds * rtf
+
+
+def deadline_for(text: str, speed: float = 1.0, rtf: Optional[float] = None) -> float:
+    """
+    Compute the timeout for synthesizing a text.
+
+    Args:
+        text: Text to synthesize
+        speed: Speech speed
+        rtf: Real-time factor (default: settings.TTS_EXPECTED_RTF)
+
+    Returns:
+        Timeout in seconds
+    """
+    expected = expected_synthesis_seconds(text, speed, rtf)
+    return max(settings.TTS_TIMEOUT_MIN, expected * settings.TTS_TIMEOUT_FACTOR)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Linear-interpolated percentile.
+
+    Args:
+        values: Samples
+        pct: Percentile between 0 and 100
+
+    Returns:
+        Percentile value (0.0 for no samples)
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class LatencyStats:
+    """Tail-latency statistics over completed jobs."""
+
+    def __init__(self, latencies: List[float]):
+        """
+        Initialize statistics.
+
+        Args:
+            latencies: Per-job latencies in seconds
+        """
+        self.latencies = list(latencies)
+
+    @property
+    def p50(self) -> float:
+        return percentile(self.latencies, 50)
+
+    @property
+    def p95(self) -> float:
+        return percentile(self.latencies, 95)
+
+    @property
+    def p99(self) -> float:
+        return percentile(self.latencies, 99)
+
+    def summary(self) -> str:
+        """Human readable one-line summary."""
+        if not self.latencies:
+            return "no completed jobs"
+        return (f"p50 {self.p50:.1f}s · p95 {self.p95:.1f}s · p99 {self.p99:.1f}s · "
+                f"max {max(self.latencies):.1f}s over {len(self.latencies)} job(s)")
+
+
+class Job:
+    """A unit of work that may be retried or run speculatively."""
+
+    def __init__(self, key: str, run: Callable[["Attempt"], Any],
+                 expected_seconds: float = 0.0, timeout: Optional[float] = None,
+                 commit: Optional[Callable[[Any], Any]] = None,
+                 discard: Optional[Callable[[Any], None]] = None,
+                 sources: Optional[List[Any]] = None, inputs: Optional[str] = None):
+        """
+        Initialize a job.
+
+        Args:
+            key: Unique job identifier
+            run: Called with an Attempt; must honour attempt.timeout and
+                 attempt.cancelled and write only to attempt-specific paths
+            expected_seconds: Expected duration, used to rank stragglers
+            timeout: Deadline per attempt in seconds
+            commit: Called with the winning attempt's result; its return
+                    value becomes the job result
+            discard: Called with results of attempts that lost the race
+            sources: Requested outputs the job produces (a batch job
+                     produces several, a part job one part of one)
+            inputs: Digest of everything the output depends on, for
+                    journaled jobs (see lib.job_journal)
+        """
+        self.key = key
+        self.run = run
+        self.expected_seconds = expected_seconds
+        self.timeout = timeout
+        self.commit = commit
+        self.discard = discard
+        self.sources: List[Any] = list(sources or [])
+        self.inputs = inputs
+        # Journals recording this job, set by lib.job_journal.journal_jobs
+        self.journals: List[Any] = []
+        # Jobs this one runs together (a batch), journaled one by one
+        self.members: List["Job"] = []
+
+
+class Attempt:
+    """One execution of a job."""
+
+    def __init__(self, job: Job, number: int, slot: Optional[WorkerSlot],
+                 speculative: bool = False):
+        self.job = job
+        self.number = number
+        self.slot = slot
+        self.speculative = speculative
+        self.timeout = job.timeout
+        self.cancelled = threading.Event()
+        self.started = time.monotonic()
+
+    @property
+    def tag(self) -> str:
+        """Suffix distinguishing this attempt's scratch files."""
+        return f"a{self.number}{'s' if self.speculative else ''}"
+
+
+class JobResult:
+    """Outcome of a job."""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.value = None
+        self.error: Optional[BaseException] = None
+        self.attempts = 0
+        self.latency: Optional[float] = None
+        self.speculative_win = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class JobRunner:
+    """
+    Run jobs on a fixed set of workers.
+
+    Failed or timed-out attempts are retried with exponential backoff.
+    Once nothing is left to start, idle workers duplicate the slowest
+    outstanding job; the first attempt to finish wins and the other is
+    cancelled.
+    """
+
+    def __init__(self, budget: Optional[ThreadBudget] = None, workers: int = 1,
+                 max_retries: Optional[int] = None, backoff: Optional[float] = None,
+                 speculative: Optional[bool] = None,
+                 on_complete: Optional[Callable[[JobResult], None]] = None):
+        """
+        Initialize the runner.
+
+        Args:
+            budget: Thread budget; one worker per slot (overrides workers)
+            workers: Worker count when no budget is given
+            max_retries: Retries after the first attempt (default: settings)
+            backoff: Base backoff in seconds, doubled per retry (default: settings)
+            speculative: Duplicate stragglers at the end of a batch (default: settings)
+            on_complete: Called (from a worker thread) when a job finishes
+        """
+        self.slots: List[Optional[WorkerSlot]] = list(budget.slots) if budget else [None] * max(1, workers)
+        self.max_retries = settings.TTS_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff = settings.TTS_RETRY_BACKOFF if backoff is None else backoff
+        self.speculative = settings.SPECULATIVE_RETRY if speculative is None else speculative
+        self.on_complete = on_complete
+
+        self._cond = threading.Condition()
+        self._pending: List[tuple] = []  # (ready_at, job)
+        self._running: Dict[str, List[Attempt]] = {}
+        self._results: Dict[str, JobResult] = {}
+        self._done: Dict[str, bool] = {}
+        self._duplicated: set = set()
+
+    def run(self, jobs: List[Job]) -> Dict[str, JobResult]:
+        """
+        Run all jobs to completion.
+
+        Args:
+            jobs: Jobs to run
+
+        Returns:
+            Mapping of job key to JobResult, in submission order
+        """
+        with self._cond:
+            for job in jobs:
+                self._pending.append((0.0, job))
+                self._results[job.key] = JobResult(job.key)
+                self._done[job.key] = False
+
+        threads = [threading.Thread(target=self._worker, args=(slot,), daemon=True)
+                   for slot in self.slots]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return {job.key: self._results[job.key] for job in jobs}
+
+    def latency_stats(self) -> LatencyStats:
+        """Latency statistics over successful jobs."""
+        return LatencyStats([r.latency for r in self._results.values()
+                             if r.ok and r.latency is not None])
+
+    def _next_attempt(self, slot: Optional[WorkerSlot]) -> Optional[Attempt]:
+        """Pick the next attempt to run, waiting if needed (lock held)."""
+        while True:
+            if all(self._done.values()):
+                return None
+
+            now = time.monotonic()
+            ready = [entry for entry in self._pending if entry[0] <= now]
+            if ready:
+                entry = min(ready, key=lambda e: e[0])
+                self._pending.remove(entry)
+                job = entry[1]
+                result = self._results[job.key]
+                result.attempts += 1
+                return self._start(Attempt(job, result.attempts, slot))
+
+            if self.speculative and not self._pending:
+                straggler = self._pick_straggler(now)
+                if straggler is not None:
+                    self._duplicated.add(straggler.key)
+                    result = self._results[straggler.key]
+                    result.attempts += 1
+                    return self._start(Attempt(straggler, result.attempts, slot, speculative=True))
+
+            wait = 1.0
+            if self._pending:
+                wait = max(0.01, min(wait, min(e[0] for e in self._pending) - now))
+            self._cond.wait(wait)
+
+    def _pick_straggler(self, now: float) -> Optional[Job]:
+        """Slowest running job worth duplicating, if any."""
+        best, best_ratio = None, settings.SPECULATIVE_AFTER
+        for key, attempts in self._running.items():
+            if key in self._duplicated or len(attempts) != 1:
+                continue
+            attempt = attempts[0]
+            expected = max(attempt.job.expected_seconds, 1.0)
+            ratio = (now - attempt.started) / expected
+            if ratio >= best_ratio:
+                best, best_ratio = attempt.job, ratio
+        return best
+
+    def _start(self, attempt: Attempt) -> Attempt:
+        self._running.setdefault(attempt.job.key, []).append(attempt)
+        return attempt
+
+    def _worker(self, slot: Optional[WorkerSlot]):
+        while True:
+            with self._cond:
+                attempt = self._next_attempt(slot)
+            if attempt is None:
+                return
+
+            value, error = None, None
+            try:
+                value = attempt.job.run(attempt)
+            except Exception as e:
+                error = e
+            elapsed = time.monotonic() - attempt.started
+
+            self._finish(attempt, value, error, elapsed)
+
+    def _finish(self, attempt: Attempt, value: Any, error: Optional[BaseException],
+                elapsed: float):
+        job = attempt.job
+        result = self._results[job.key]
+        won = False
+        failed = False
+
+        with self._cond:
+            self._running[job.key].remove(attempt)
+            others = self._running[job.key]
+
+            if self._done[job.key]:
+                pass  # Another attempt already won
+            elif error is None:
+                won = True
+                self._done[job.key] = True
+                result.latency = elapsed
+                result.speculative_win = attempt.speculative
+                for other in others:
+                    other.cancelled.set()
+            elif others:
+                pass  # A duplicate is still running and may succeed
+            elif result.attempts <= self.max_retries:
+                delay = self.backoff * (2 ** (result.attempts - 1))
+                self._pending.append((time.monotonic() + delay, job))
+            else:
+                failed = True
+                self._done[job.key] = True
+                result.error = error
+
+            self._cond.notify_all()
+
+        if won:
+            try:
+                result.value = job.commit(value) if job.commit else value
+            except Exception as e:
+                result.error = e
+        elif error is None and job.discard:
+            job.discard(value)
+
+        if (won or failed) and self.on_complete:
+            self.on_complete(result)
@@ -0,0 +1,161 @@
+"""On-disk cache of phoneme ids per sentence.
+
+Piper phonemizes text with espeak-ng before every synthesis. With a voice
+loaded through the piper Python package (see lib.voice_models), sentences
+are phonemized once and their phoneme ids stored in an SQLite index keyed
+by a hash of the sentence and of the phonemizer settings; re-renders at
+another speed, and other voices with the same espeak voice and phoneme
+map, reuse them.
+
+The Piper CLI (the default path, SHARED_VOICE=false) takes text only and
+always runs espeak itself: there, the cache is not used.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from array import array
+from importlib import metadata
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from config.settings import settings
+
+# Separates the utterances espeak made of one sentence
+UTTERANCE_END = 0xFFFF
+
+SENTENCE_END = re.compile(r'(?<=[.!?…])\s+')
+
+
+def split_sentences(text: str) -> List[str]:
+    """Cut TTS-ready text into sentences (the cache's unit)."""
+    return [sentence for sentence in SENTENCE_END.split(text.strip()) if sentence]
+
+
+def phonemizer_namespace(config) -> str:
+    """
+    Key of everything phoneme ids depend on besides the text.
+
+    Args:
+        config: Voice config (piper PiperConfig)
+    """
+    try:
+        version = metadata.version('piper-phonemize')
+    except metadata.PackageNotFoundError:
+        version = ""
+    return hashlib.sha256(json.dumps([
+        str(getattr(config, 'phoneme_type', 'espeak')),
+        getattr(config, 'espeak_voice', ''),
+        getattr(config, 'phoneme_id_map', {}),
+        version,
+    ], sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+
+
+def encode_ids(utterances: List[List[int]]) -> bytes:
+    """Pack utterances of phoneme ids as unsigned 16-bit integers."""
+    packed = array('H')
+    for ids in utterances:
+        packed.extend(ids)
+        packed.append(UTTERANCE_END)
+    return packed.tobytes()
+
+
+def decode_ids(data: bytes) -> List[List[int]]:
+    """Inverse of encode_ids."""
+    packed = array('H')
+    packed.frombytes(data)
+    utterances: List[List[int]] = []
+    current: List[int] = []
+    for value in packed:
+        if value == UTTERANCE_END:
+            utterances.append(current)
+            current = []
+        else:
+            current.append(value)
+    return utterances
+
+
+class PhonemeCache:
+    """Phoneme ids of sentences for one phonemizer configuration."""
+
+    def __init__(self, namespace: str, path: Optional[Path] = None):
+        """
+        Args:
+            namespace: phonemizer_namespace() of the voice
+            path: SQLite file (default: <CACHE_DIR>/phonemes.sqlite)
+        """
+        self.namespace = namespace
+        self.path = Path(path) if path else settings.CACHE_DIR / "phonemes.sqlite"
+        self._db: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection must not cross fork: each process opens its own
+        if self._db is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("CREATE TABLE IF NOT EXISTS phonemes "
+                       "(key BLOB PRIMARY KEY, ids BLOB NOT NULL) WITHOUT ROWID")
+            self._db, self._pid = db, os.getpid()
+        return self._db
+
+    def key(self, sentence: str) -> bytes:
+        """Index key of a sentence."""
+        return hashlib.sha256(f"{self.namespace}\0{sentence}".encode('utf-8')).digest()[:16]
+
+    def get_many(self, sentences: Iterable[str]) -> Dict[str, List[List[int]]]:
+        """
+        Look sentences up.
+
+        Returns:
+            Utterances of phoneme ids of the sentences found
+        """
+        keys = {self.key(sentence): sentence for sentence in set(sentences)}
+        found = {}
+        db = self._connect()
+        items = list(keys)
+        for start in range(0, len(items), 500):
+            batch = items[start:start + 500]
+            rows = db.execute(f"SELECT key, ids FROM phonemes WHERE key IN "
+                              f"({','.join('?' * len(batch))})", batch)
+            for key, data in rows:
+                found[keys[key]] = decode_ids(data)
+        return found
+
+    def put_many(self, entries: Dict[str, List[List[int]]]):
+        """Store phoneme ids of sentences."""
+        if not entries:
+            return
+        db = self._connect()
+        db.execute("BEGIN")
+        db.executemany("INSERT OR REPLACE INTO phonemes (key, ids) VALUES (?, ?)",
+                       [(self.key(sentence), encode_ids(utterances))
+                        for sentence, utterances in entries.items()])
+        db.execute("COMMIT")
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM phonemes").fetchone()[0]
+
+    def phoneme_ids(self, voice, text: str) -> List[List[int]]:
+        """
+        Phoneme ids of a text, phonemizing only sentences not cached yet.
+
+        Args:
+            voice: piper PiperVoice (phonemize / phonemes_to_ids)
+            text: TTS-ready text
+
+        Returns:
+            Phoneme ids of each utterance, in order
+        """
+        sentences = split_sentences(text)
+        cached = self.get_many(sentences)
+        missing = {sentence: [voice.phonemes_to_ids(phonemes)
+                              for phonemes in voice.phonemize(sentence)]
+                   for sentence in dict.fromkeys(sentences) if sentence not in cached}
+        self.put_many(missing)
+        cached.update(missing)
+        return [ids for sentence in sentences for ids in cached[sentence]]
@@ -1,9 +1,11 @@
 """TTS engine wrapper for Piper."""
 
+import shutil
 import subprocess
-import tempfile
+import threading
+import time
 from pathlib import Path
-from typing import Optional, List
+from typing import Optional, List, Callable, Dict
 import wave
 import struct
 from rich.console import Console
@@ -11,10 +13,76 @@ from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn
 from pydub import AudioSegment
 
 from config.settings import settings
+from lib.audio_writer import ShardedWavWriter
+from lib.cpu_budget import ThreadBudget
+from lib.render_estimate import record_run, wav_duration
+from lib.scratch import expected_wav_bytes, scratch_space
+from lib.job_runner import Attempt, Job, JobRunner, deadline_for, expected_synthesis_seconds
+from lib.job_journal import JobJournal, inputs_digest, journal_jobs, record_failures
 
 console = Console()
 
 
+class PiperTimeoutError(RuntimeError):
+    """Piper did not finish before its deadline."""
+
+
+class PiperCancelledError(RuntimeError):
+    """Piper was stopped because its result is no longer needed."""
+
+
+def run_piper(cmd: List[str], text: str, env: Optional[Dict[str, str]] = None,
+              preexec_fn: Optional[Callable[[], None]] = None,
+              timeout: Optional[float] = None,
+              cancel: Optional[threading.Event] = None) -> subprocess.CompletedProcess:
+    """
+    Run a Piper command, feeding it text on stdin.
+
+    Args:
+        cmd: Piper command line
+        text: Text to synthesize
+        env: Environment for the Piper process (e.g. thread limits)
+        preexec_fn: Called in the child before exec (e.g. CPU pinning)
+        timeout: Kill Piper after this many seconds
+        cancel: Kill Piper as soon as this event is set
+
+    Returns:
+        Completed process with captured output
+
+    Raises:
+        PiperTimeoutError: If the deadline passed
+        PiperCancelledError: If the cancel event was set
+    """
+    process = subprocess.Popen(
+        cmd,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        env=env,
+        preexec_fn=preexec_fn
+    )
+    deadline = time.monotonic() + timeout if timeout else None
+
+    while True:
+        wait = 0.5 if cancel is not None else None
+        if deadline is not None:
+            remaining = max(0.0, deadline - time.monotonic())
+            wait = remaining if wait is None else min(wait, remaining)
+        try:
+            stdout, stderr = process.communicate(input=text, timeout=wait)
+            return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+        except subprocess.TimeoutExpired:
+            if cancel is not None and cancel.is_set():
+                process.kill()
+                process.communicate()
+                raise PiperCancelledError("Piper cancelled")
+            if deadline is not None and time.monotonic() >= deadline:
+                process.kill()
+                process.communicate()
+                raise PiperTimeoutError(f"Piper timed out after {timeout:.0f}s")
+
+
 class PiperTTS:
     """Wrapper for Piper TTS engine."""
     
@@ -56,6 +124,8 @@ class PiperTTS:
         """
         Convert text to speech using Piper.
         
+        Timed-out or failed Piper runs are killed and retried with backoff.
+        
         Args:
             text: Text to convert
             output_path: Output file path
@@ -66,47 +136,65 @@ class PiperTTS:
         output_path = Path(output_path)
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
-        # Create temporary text file
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as tmp_file:
-            tmp_file.write(text)
-            tmp_text_path = tmp_file.name
+        job = Job(
+            key=output_path.name,
+            run=lambda attempt: self._synthesize(text, output_path, attempt),
+            timeout=deadline_for(text, self.speed)
+        )
+        result = JobRunner(speculative=False).run([job])[job.key]
+        if result.error is not None:
+            raise result.error
             
-        try:
-            # Run Piper
-            cmd = [
-                'piper',
-                '--model', self.model,
-                '--output_file', str(output_path),
-            ]
+        # Convert to desired format if needed
+        if settings.AUDIO_FORMAT == "mp3" and output_path.suffix == ".wav":
+            mp3_path = output_path.with_suffix(".mp3")
+            self._convert_to_mp3(output_path, mp3_path)
+            output_path.unlink()  # Remove WAV file
+            return mp3_path
+            
+        return output_path
+        
+    def _synthesize(self, text: str, output_path: Path, attempt: Optional[Attempt] = None,
+                    budget: Optional[ThreadBudget] = None) -> Path:
+        """
+        Run Piper once, writing a WAV file.
+        
+        Args:
+            text: Text to convert
+            output_path: Output WAV path
+            attempt: Job attempt providing deadline, cancellation and CPU slot
+            budget: Thread budget the attempt's slot belongs to
+            
+        Returns:
+            Path to the WAV file
+        """
+        cmd = [
+            'piper',
+            '--model', self.model,
+            '--output_file', str(output_path),
+        ]
+        
+        if self.speed != 1.0:
+            cmd.extend(['--length-scale', str(1.0 / self.speed)])
+            
+        slot = attempt.slot if attempt else None
+        started = time.monotonic()
+        result = run_piper(
+            cmd,
+            text,
+            env=budget.env_for(slot) if budget and slot else None,
+            preexec_fn=budget.preexec_for(slot) if budget and slot else None,
+            timeout=attempt.timeout if attempt else None,
+            cancel=attempt.cancelled if attempt else None
+        )
             
-            if self.speed != 1.0:
-                cmd.extend(['--length-scale', str(1.0 / self.speed)])
-                
-            # Run with input from file
-            with open(tmp_text_path, 'r') as input_file:
-                result = subprocess.run(
-                    cmd,
-                    stdin=input_file,
-                    capture_output=True,
-                    text=True
-                )
-                
-            if result.returncode != 0:
-                console.print(f"[red]Piper error: {result.stderr}[/red]")
-                raise RuntimeError(f"Piper TTS failed: {result.stderr}")
-                
-            # Convert to desired format if needed
-            if settings.AUDIO_FORMAT == "mp3" and output_path.suffix == ".wav":
-                mp3_path = output_path.with_suffix(".mp3")
-                self._convert_to_mp3(output_path, mp3_path)
-                output_path.unlink()  # Remove WAV file
-                return mp3_path
-                
-            return output_path
+        if result.returncode != 0:
+            console.print(f"[red]Piper error: {result.stderr}[/red]")
+            raise RuntimeError(f"Piper TTS failed: {result.stderr}")
             
-        finally:
-            # Clean up temp file
-            Path(tmp_text_path).unlink(missing_ok=True)
+        record_run(Path(self.model).stem, len(text), wav_duration(output_path),
+                   time.monotonic() - started, self.speed, slot.threads if slot else 0)
+        return output_path
             
     def _convert_to_mp3(self, wav_path: Path, mp3_path: Path):
         """
@@ -120,19 +208,76 @@ class PiperTTS:
         audio.export(str(mp3_path), format="mp3", bitrate=settings.AUDIO_BITRATE)
         
     def process_chunks(self, text_chunks: List[str], output_base: Path, 
-                      combine: bool = True) -> Path:
+                      combine: bool = True, budget: Optional[ThreadBudget] = None,
+                      resume: bool = False) -> Path:
         """
         Process multiple text chunks and optionally combine.
         
+        Chunks are synthesized under per-chunk deadlines; failures are retried
+        and stragglers at the end of the batch are run speculatively.
+        
+        Chunks wait in scratch storage, off the output directory. With
+        resume, finished chunks are instead kept in a hidden .<name>.chunks
+        directory next to the output and recorded in its journal until
+        they are combined, so a run that dies on chunk 180 of 200 can be
+        resumed instead of started over.
+        
         Args:
             text_chunks: List of text chunks
             output_base: Base path for output
             combine: Whether to combine chunks into single file
+            budget: Thread budget for parallel chunk synthesis (default: one worker)
+            resume: Keep finished chunks next to the output, and reuse the
+                    ones a previous run finished if unchanged
             
         Returns:
-            Path to final audio file
+            Path to final audio file (the first part when the output
+            is split, see lib.audio_writer)
         """
-        chunk_files = []
+        # Chunks wait in scratch storage (as FLAC if SCRATCH_FLAC) until combined
+        scratch = scratch_space()
+        journaled = resume
+        chunk_dir = output_base.parent / f".{output_base.stem}.chunks"
+        
+        def keep(name):
+            def commit(path):
+                # Out of scratch, so that finished chunks survive a crash
+                if not combine:
+                    return scratch.move_out(path, output_base.parent / f"{name}.wav")
+                path = scratch.compress(path)
+                return scratch.move_out(path, chunk_dir / f"{name}{path.suffix}")
+            return commit
+        
+        def make_job(chunk, name):
+            def run(attempt):
+                attempt_path = scratch.path(f"{name}.{attempt.tag}.wav",
+                                            expected_wav_bytes(chunk, self.speed))
+                try:
+                    return self._synthesize(chunk, attempt_path, attempt, budget)
+                except BaseException:
+                    scratch.release(attempt_path)
+                    raise
+            job = Job(
+                key=name,
+                run=run,
+                expected_seconds=expected_synthesis_seconds(chunk, self.speed),
+                timeout=deadline_for(chunk, self.speed),
+                commit=keep(name) if journaled else scratch.compress if combine else None,
+                discard=scratch.release
+            )
+            job.inputs = inputs_digest(chunk, self.model, self.speed, combine)
+            return job
+        
+        all_jobs = [make_job(chunk, f"{output_base.stem}_chunk_{i:03d}")
+                    for i, chunk in enumerate(text_chunks)]
+        jobs = all_jobs
+        done: Dict[str, List[Path]] = {}
+        if journaled:
+            chunk_dir.mkdir(parents=True, exist_ok=True)
+            journal = JobJournal(chunk_dir / "journal.json")
+            jobs, done = journal_jobs(all_jobs, lambda job: [journal], resume)
+            if resume:
+                console.print(f"[cyan]Resuming: {len(done)} of {len(all_jobs)} chunk(s) already done[/cyan]")
         
         with Progress(
             SpinnerColumn(),
@@ -143,36 +288,61 @@ class PiperTTS:
         ) as progress:
             task = progress.add_task(
                 "[cyan]Processing chunks...", 
-                total=len(text_chunks)
+                total=len(jobs)
             )
             
-            for i, chunk in enumerate(text_chunks):
-                chunk_path = output_base.parent / f"{output_base.stem}_chunk_{i:03d}.wav"
-                self.text_to_speech(chunk, chunk_path)
-                chunk_files.append(chunk_path)
-                progress.update(task, advance=1)
+            runner = JobRunner(
+                budget=budget,
+                on_complete=lambda result: progress.update(task, advance=1)
+            )
+            results = runner.run(jobs)
+        
+        console.print(f"[blue]Chunk latency: {runner.latency_stats().summary()}[/blue]")
+        
+        chunk_files = [done[job.key][0] if job.key in done else results[job.key].value
+                       for job in all_jobs]
+        failed = [result for result in results.values() if not result.ok]
+        if failed:
+            record_failures(jobs, results)
+            if journaled:
+                raise RuntimeError(f"{len(failed)} chunk(s) failed, first error: {failed[0].error} "
+                                   f"(finished chunks kept in {chunk_dir}, resume to continue)")
+            for chunk_file in chunk_files:
+                if chunk_file is not None:
+                    scratch.release(chunk_file)
+            raise RuntimeError(f"{len(failed)} chunk(s) failed, first error: {failed[0].error}")
+        
+        # Nothing failed: every chunk has its file
+        finished = [chunk_file for chunk_file in chunk_files if chunk_file is not None]
         
         if combine:
-            # Combine all chunks
-            combined = AudioSegment.empty()
+            # Stream chunks into part files; a chunk is never cut across parts
+            final_path = output_base.with_suffix(".wav")
+            
+            def finish_part(part):
+                if settings.AUDIO_FORMAT == "mp3":
+                    self._convert_to_mp3(part, part.with_suffix(".mp3"))
+                    part.unlink()
+                    part = part.with_suffix(".mp3")
+                console.print(f"[green]Finished {part.name}[/green]")
+            
+            with ShardedWavWriter(final_path, on_part=finish_part) as writer:
+                for chunk_file in finished:
+                    # Add small pause between chunks
+                    writer.add_wav(chunk_file, pause_ms=500)
             
-            for chunk_file in chunk_files:
-                audio = AudioSegment.from_wav(str(chunk_file))
-                combined += audio
-                # Add small pause between chunks
-                combined += AudioSegment.silent(duration=500)  # 0.5 second pause
-                
-            # Save combined file
-            final_path = output_base.with_suffix(f".{settings.AUDIO_FORMAT}")
-            if settings.AUDIO_FORMAT == "mp3":
-                combined.export(str(final_path), format="mp3", bitrate=settings.AUDIO_BITRATE)
-            else:
-                combined.export(str(final_path), format="wav")
-                
             # Clean up chunk files
-            for chunk_file in chunk_files:
-                chunk_file.unlink()
-                
-            return final_path
+            if journaled:
+                shutil.rmtree(chunk_dir, ignore_errors=True)
+            else:
+                for chunk_file in finished:
+                    scratch.release(chunk_file)
+            console.print(f"[blue]Scratch: {scratch.summary()}[/blue]")
+            
+            parts = [part.with_suffix(f".{settings.AUDIO_FORMAT}") for part in writer.parts]
+            return parts[0] if parts else final_path
         else:
+            if not journaled:
+                for job, chunk_file in zip(all_jobs, finished):
+                    scratch.move_out(chunk_file, output_base.parent / f"{job.key}.wav")
             return output_base.parent  # Return directory with chunks
\ No newline at end of file
@@ -0,0 +1,152 @@
+"""Per-process memory accounting from /proc (Linux)."""
+
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+MB = 1024 * 1024
+
+
+class ProcessMemory:
+    """Memory of one process, in bytes."""
+
+    def __init__(self, pid: int, rss: int, pss: int, shared: int, unique: int, name: str = ""):
+        """
+        Args:
+            pid: Process ID
+            rss: Resident set size
+            pss: Proportional set size (shared pages divided among sharers)
+            shared: Resident pages also mapped by other processes
+            unique: Private pages, freed if the process exits (USS)
+            name: Command name
+        """
+        self.pid = pid
+        self.rss = rss
+        self.pss = pss
+        self.shared = shared
+        self.unique = unique
+        self.name = name
+
+    @classmethod
+    def read(cls, pid: int) -> Optional["ProcessMemory"]:
+        """
+        Read a process' memory from smaps_rollup.
+
+        Returns:
+            ProcessMemory, or None if the process is gone or unreadable
+        """
+        fields: Dict[str, int] = {}
+        try:
+            with open(f"/proc/{pid}/smaps_rollup") as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                        fields[parts[0][:-1]] = int(parts[1]) * 1024
+            name = Path(f"/proc/{pid}/comm").read_text().strip()
+        except OSError:
+            return None
+
+        return cls(
+            pid,
+            rss=fields.get('Rss', 0),
+            pss=fields.get('Pss', 0),
+            shared=fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0),
+            unique=fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+            name=name,
+        )
+
+
+def child_pids(pid: int) -> List[int]:
+    """Direct children of a process."""
+    children: List[int] = []
+    for task in Path(f"/proc/{pid}/task").glob("*"):
+        try:
+            children.extend(int(c) for c in (task / "children").read_text().split())
+        except OSError:
+            continue
+    return children
+
+
+def descendant_pids(pid: int) -> List[int]:
+    """All descendants of a process."""
+    found = []
+    pending = child_pids(pid)
+    while pending:
+        child = pending.pop()
+        found.append(child)
+        pending.extend(child_pids(child))
+    return found
+
+
+def memory_available() -> int:
+    """MemAvailable from /proc/meminfo, in bytes (0 if unknown)."""
+    try:
+        for line in Path("/proc/meminfo").read_text().splitlines():
+            if line.startswith("MemAvailable:"):
+                return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+class MemorySampler:
+    """Record the peak memory of every worker process started meanwhile."""
+
+    def __init__(self, interval: float = 0.5, pid: Optional[int] = None):
+        """
+        Args:
+            interval: Seconds between samples
+            pid: Parent whose descendants are sampled (default: this process)
+        """
+        self.interval = interval
+        self.pid = pid or os.getpid()
+        self.peaks: Dict[int, ProcessMemory] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def sample(self):
+        """Take one sample, keeping each process' highest unique memory."""
+        for pid in descendant_pids(self.pid):
+            memory = ProcessMemory.read(pid)
+            if memory is None or memory.rss == 0:
+                continue
+            peak = self.peaks.get(pid)
+            if peak is None or memory.unique > peak.unique:
+                self.peaks[pid] = memory
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def __enter__(self) -> "MemorySampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def workers(self) -> List[ProcessMemory]:
+        """Peak samples of the worker processes, largest first."""
+        return sorted(self.peaks.values(), key=lambda m: m.unique, reverse=True)
+
+    def workers_that_fit(self, available: Optional[int] = None) -> int:
+        """
+        Estimate how many workers fit in the available memory.
+
+        Shared pages are counted once, each worker adds its unique memory.
+
+        Args:
+            available: Bytes available (default: MemAvailable)
+
+        Returns:
+            Worker count (0 without samples)
+        """
+        workers = self.workers()
+        if not workers:
+            return 0
+        available = memory_available() if available is None else available
+        unique = max(m.unique for m in workers)
+        shared = max(m.shared for m in workers)
+        return max(0, int((available - shared) // max(unique, 1)))
@@ -0,0 +1,160 @@
+"""Audio duration, size and render-time estimates from recorded throughput."""
+
+import json
+import os
+import tempfile
+import threading
+import wave
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config.settings import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of one process are serialized
+    fcntl = None  # type: ignore[assignment]
+
+# Average characters per word including the following space
+CHARS_PER_WORD = 6.0
+
+# Samples kept per voice in the history file
+HISTORY_LIMIT = 200
+
+_history_lock = threading.Lock()
+
+
+def wav_duration(path: Path) -> float:
+    """Duration of a WAV file in seconds."""
+    with wave.open(str(path), 'rb') as wav_file:
+        return wav_file.getnframes() / wav_file.getframerate()
+
+
+def load_history(path: Optional[Path] = None) -> Dict[str, List[dict]]:
+    """
+    Load recorded synthesis runs.
+
+    Args:
+        path: History file (default: settings.THROUGHPUT_HISTORY)
+
+    Returns:
+        Mapping of voice name to its samples
+    """
+    path = Path(path or settings.THROUGHPUT_HISTORY)
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+def record_run(voice: str, chars: int, audio_seconds: float, wall_seconds: float,
+               speed: float = 1.0, threads: int = 0, path: Optional[Path] = None):
+    """
+    Append one synthesis run to the throughput history.
+
+    Args:
+        voice: Voice (model) name
+        chars: Characters synthesized
+        audio_seconds: Duration of the produced audio
+        wall_seconds: Time Piper took
+        speed: Speech speed the audio was rendered at
+        threads: Threads the Piper process was allowed (0 = unknown)
+        path: History file (default: settings.THROUGHPUT_HISTORY)
+    """
+    if chars <= 0 or audio_seconds <= 0 or wall_seconds <= 0:
+        return
+
+    path = Path(path or settings.THROUGHPUT_HISTORY)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Queue workers, parse pools and forked voices record runs concurrently:
+    # the file lock keeps their read-modify-writes from losing samples
+    with _history_lock, open(path.with_name(f".{path.name}.lock"), 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        history = load_history(path)
+        samples = history.setdefault(voice, [])
+        samples.append({
+            'chars': chars,
+            'audio_seconds': round(audio_seconds, 3),
+            'wall_seconds': round(wall_seconds, 3),
+            'speed': speed,
+            'threads': threads,
+        })
+        del samples[:-HISTORY_LIMIT]
+
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        with os.fdopen(fd, 'w', encoding='utf-8') as tmp_file:
+            json.dump(history, tmp_file)
+        os.replace(tmp_name, path)
+
+
+class RenderEstimate:
+    """Predicted output of rendering some text."""
+
+    def __init__(self, audio_seconds: float, render_seconds: float, workers: int):
+        self.audio_seconds = audio_seconds
+        self.render_seconds = render_seconds
+        self.workers = workers
+
+    def size_bytes(self, format: str) -> int:
+        """
+        Predicted file size for an output format.
+
+        Args:
+            format: wav or mp3
+
+        Returns:
+            Size in bytes
+        """
+        if format == 'mp3':
+            kbps = int(settings.AUDIO_BITRATE.rstrip('kK'))
+            return int(self.audio_seconds * kbps * 1000 / 8)
+        # 16-bit mono PCM plus header
+        return int(self.audio_seconds * settings.TTS_SAMPLE_RATE * 2) + 44
+
+
+class RenderEstimator:
+    """Estimate audio duration and render time for a voice."""
+
+    def __init__(self, voice: str, history: Optional[Dict[str, List[dict]]] = None):
+        """
+        Initialize the estimator.
+
+        Falls back to TTS_CHARS_PER_SECOND and TTS_EXPECTED_RTF when the
+        voice has no recorded runs.
+
+        Args:
+            voice: Voice (model) name, as recorded by record_run
+            history: Preloaded history (default: load_history())
+        """
+        self.voice = voice
+        samples = (history if history is not None else load_history()).get(voice, [])
+        self.samples = len(samples)
+
+        chars = sum(s['chars'] for s in samples)
+        audio = sum(s['audio_seconds'] for s in samples)
+        # Audio length at normal speed, to compare runs made at other speeds
+        audio_normal = sum(s['audio_seconds'] * s.get('speed', 1.0) for s in samples)
+        wall = sum(s['wall_seconds'] for s in samples)
+
+        self.chars_per_second = chars / audio_normal if audio_normal else settings.TTS_CHARS_PER_SECOND
+        self.rtf = wall / audio if audio else settings.TTS_EXPECTED_RTF
+
+    def estimate(self, words: int = 0, chars: int = 0, speed: float = 1.0,
+                 workers: int = 1) -> RenderEstimate:
+        """
+        Estimate rendering of a text.
+
+        Args:
+            words: Word count (used when chars is not given)
+            chars: Character count
+            speed: Speech speed
+            workers: Parallel Piper workers
+
+        Returns:
+            RenderEstimate
+        """
+        chars = chars or int(words * CHARS_PER_WORD)
+        audio_seconds = chars / self.chars_per_second / speed
+        render_seconds = audio_seconds * self.rtf / max(1, workers)
+        return RenderEstimate(audio_seconds, render_seconds, workers)
@@ -0,0 +1,230 @@
+"""Scratch storage for intermediate audio.
+
+Piper's WAV output, chunks waiting to be combined and WAVs waiting for
+MP3 encoding are written to a per-process directory on fast storage
+(tmpfs /dev/shm by default) instead of next to the output, which may be
+on a network share. Files that would take the fast location over its
+size budget go to a disk fallback. Chunks can be kept as FLAC while they
+wait, which roughly halves their size.
+
+The directory is removed at exit; directories left by a process that
+crashed or was killed are removed by the next ScratchSpace created on the
+same host. Directory names carry the host name, so that processes of
+other machines sharing the scratch location are never taken for dead.
+"""
+
+import atexit
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import uuid
+import wave
+from pathlib import Path
+from typing import Dict, Optional
+
+from config.settings import settings
+
+PREFIX = "tts-scratch-"
+
+# Free space always left on the fast location
+FREE_MARGIN_BYTES = 64 * 1024 * 1024
+
+
+def default_fast_dir() -> Path:
+    """tmpfs if available and writable, the system temp directory otherwise."""
+    shm = Path("/dev/shm")
+    if shm.is_dir() and os.access(shm, os.W_OK):
+        return shm
+    return Path(tempfile.gettempdir())
+
+
+def expected_wav_bytes(text: str, speed: float = 1.0, sample_rate: Optional[int] = None) -> int:
+    """Estimated size of the 16-bit mono WAV Piper makes of a text."""
+    seconds = len(text) / settings.TTS_CHARS_PER_SECOND / speed
+    return int(seconds * (sample_rate or settings.TTS_SAMPLE_RATE) * 2) + 44
+
+
+def _host() -> str:
+    """This machine's name, as used in scratch directory names."""
+    return socket.gethostname().replace(os.sep, '_') or 'localhost'
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def sweep_stale(root: Path) -> int:
+    """
+    Remove scratch directories of processes of this host that no longer exist.
+
+    Directories of other hosts are left alone: their pids mean nothing here.
+
+    Returns:
+        Number of directories removed
+    """
+    removed = 0
+    for path in Path(root).glob(f"{PREFIX}*"):
+        # <prefix><host>-<pid>-<id>; the host name may itself contain dashes
+        fields = path.name[len(PREFIX):].rsplit('-', 2)
+        if len(fields) != 3 or fields[0] != _host():
+            continue
+        try:
+            pid = int(fields[1])
+        except ValueError:
+            continue
+        if pid != os.getpid() and not _pid_alive(pid):
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+class ScratchSpace:
+    """Per-process scratch directories with a size budget on fast storage."""
+
+    def __init__(self, fast_dir: Optional[Path] = None, fallback_dir: Optional[Path] = None,
+                 max_bytes: Optional[int] = None, flac: Optional[bool] = None):
+        """
+        Create the scratch directories.
+
+        Args:
+            fast_dir: Fast location (default: SCRATCH_DIR, or /dev/shm)
+            fallback_dir: Used once the budget is spent (default: SCRATCH_FALLBACK_DIR,
+                          or the system temp directory)
+            max_bytes: Budget on the fast location (default: SCRATCH_MAX_MB)
+            flac: Keep waiting chunks as FLAC (default: SCRATCH_FLAC)
+        """
+        fast_dir = Path(fast_dir or settings.SCRATCH_DIR or default_fast_dir())
+        fallback_dir = Path(fallback_dir or settings.SCRATCH_FALLBACK_DIR or tempfile.gettempdir())
+        self.max_bytes = settings.SCRATCH_MAX_MB * 1024 * 1024 if max_bytes is None else max_bytes
+        self.flac = settings.SCRATCH_FLAC if flac is None else flac
+
+        name = f"{PREFIX}{_host()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.roots: Dict[str, Path] = {}
+        for kind, root in (('fast', fast_dir), ('disk', fallback_dir)):
+            sweep_stale(root)
+            if root.resolve() in [r.parent.resolve() for r in self.roots.values()]:
+                self.roots[kind] = self.roots['fast']
+                continue
+            self.roots[kind] = root / name
+            self.roots[kind].mkdir(parents=True, exist_ok=True)
+
+        self.bytes_written = {'fast': 0, 'disk': 0}
+        self.files = 0
+        self._reserved: Dict[Path, int] = {}
+        self._lock = threading.Lock()
+        self._owner = os.getpid()
+        atexit.register(self.close)
+
+    def _fast_used(self) -> int:
+        return sum(size for path, size in self._reserved.items()
+                   if path.parent == self.roots['fast'])
+
+    def path(self, name: str, expected_bytes: int = 0) -> Path:
+        """
+        Allocate a scratch file path.
+
+        Args:
+            name: File name (made unique)
+            expected_bytes: Estimated size, counted against the fast budget
+
+        Returns:
+            Path in the fast directory, or in the fallback if it would not fit
+        """
+        unique = f"{uuid.uuid4().hex[:8]}-{name}"
+        with self._lock:
+            root = self.roots['fast']
+            if self._fast_used() + expected_bytes > self.max_bytes or \
+                    shutil.disk_usage(root).free - expected_bytes < FREE_MARGIN_BYTES:
+                root = self.roots['disk']
+            path = root / unique
+            self._reserved[path] = expected_bytes
+            self.files += 1
+        return path
+
+    def location(self, path: Path) -> str:
+        """'fast' or 'disk'."""
+        return 'fast' if Path(path).parent == self.roots['fast'] else 'disk'
+
+    def _account(self, path: Path):
+        """Count a scratch file's bytes and drop its reservation."""
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        with self._lock:
+            self._reserved.pop(path, None)
+            self.bytes_written[self.location(path)] += size
+
+    def release(self, path: Path):
+        """Delete a scratch file."""
+        path = Path(path)
+        self._account(path)
+        path.unlink(missing_ok=True)
+
+    def move_out(self, path: Path, destination: Path) -> Path:
+        """
+        Move a scratch file to its final place (one sequential copy when
+        the destination is on another filesystem).
+        """
+        path = Path(path)
+        self._account(path)
+        shutil.move(str(path), str(destination))
+        return Path(destination)
+
+    def compress(self, path: Path) -> Path:
+        """
+        Store a scratch WAV as FLAC if enabled.
+
+        Returns:
+            The FLAC file (the WAV is released), or the WAV unchanged
+        """
+        if not self.flac:
+            return Path(path)
+        import soundfile
+
+        with wave.open(str(path), 'rb') as wav_file:
+            expected = wav_file.getnframes() * wav_file.getsampwidth() // 2
+        flac_path = self.path(Path(path).with_suffix('.flac').name, expected)
+        data, sample_rate = soundfile.read(str(path), dtype='int16')
+        soundfile.write(str(flac_path), data, sample_rate, format='FLAC', subtype='PCM_16')
+        self.release(path)
+        return flac_path
+
+    def summary(self) -> str:
+        """Bytes written per location, for run reports."""
+        fast = self.roots['fast'].parent
+        text = f"{self.bytes_written['fast'] / 1e6:.1f} MB in {fast}"
+        if self.roots['disk'] != self.roots['fast']:
+            text += f", {self.bytes_written['disk'] / 1e6:.1f} MB in {self.roots['disk'].parent} (fallback)"
+        return f"{text} ({self.files} file(s))"
+
+    def close(self):
+        """Remove the scratch directories (only in the process that made them)."""
+        if os.getpid() != self._owner:
+            return
+        for path in list(self._reserved):
+            if path.exists():
+                self._account(path)
+        for root in set(self.roots.values()):
+            shutil.rmtree(root, ignore_errors=True)
+
+
+_default: Optional[ScratchSpace] = None
+_default_lock = threading.Lock()
+
+
+def scratch_space() -> ScratchSpace:
+    """The process-wide ScratchSpace, created on first use."""
+    global _default
+    with _default_lock:
+        if _default is None or _default._owner != os.getpid():
+            _default = ScratchSpace()
+        return _default
@@ -8,6 +8,9 @@ from bs4 import BeautifulSoup, NavigableString
 class TextCleaner:
     """Clean and prepare text for TTS processing."""
     
+    # Bump when cleaning output changes, to invalidate cached books
+    VERSION = "1"
+    
     @staticmethod
     def extract_text_from_html(html_content: str) -> str:
         """
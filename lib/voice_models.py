@@ -0,0 +1,332 @@
+"""Voice models loaded once and shared by forked synthesis workers.
+
+Each Piper CLI process loads its own private copy of the voice model. A
+SharedVoice loads the model in this process with the piper Python package
+(optional dependency: pip install piper-tts), then runs every synthesis in
+a forked child: the model's pages are shared copy-on-write, so a worker
+only costs its own activations and audio buffers. Children take phoneme
+ids from the phoneme cache (lib.phoneme_cache) instead of running espeak
+on sentences already seen.
+
+Forking a process that runs threads can deadlock the child on a lock held
+by another thread (onnxruntime, espeak, logging, rich). Children are
+therefore never forked from the job runner's threads: a fork server,
+forked once while the voice is loaded and this process is still single
+threaded, forks them on request.
+"""
+
+import importlib.util
+import json
+import atexit
+import itertools
+import multiprocessing
+import os
+import signal
+import threading
+import time
+import traceback
+import wave
+from multiprocessing.connection import Connection
+from pathlib import Path
+from threading import Event
+from typing import Dict, Iterable, Optional
+
+from config.settings import settings
+from lib.phoneme_cache import PhonemeCache, phonemizer_namespace
+from lib.piper_tts import PiperCancelledError, PiperTimeoutError
+
+# How often a waiting parent checks the child, its deadline and cancellation
+# (and how often the fork server checks for finished children)
+POLL_SECONDS = 0.05
+
+
+def shared_voice_available() -> bool:
+    """True if the piper and onnxruntime Python packages are installed."""
+    return all(importlib.util.find_spec(name) is not None for name in ('piper', 'onnxruntime'))
+
+
+def ids_to_pcm(voice, phoneme_ids, length_scale: float) -> bytes:
+    """16-bit PCM of one utterance's phoneme ids, as Piper's own synthesis makes it."""
+    if hasattr(voice, 'phoneme_ids_to_audio'):
+        # piper-tts >= 1.3: float audio, normalized and scaled by synthesize()
+        import numpy as np
+        from piper import SynthesisConfig
+
+        config = SynthesisConfig(length_scale=length_scale)
+        audio = voice.phoneme_ids_to_audio(phoneme_ids, config)
+        if getattr(config, 'normalize_audio', False):
+            peak = np.max(np.abs(audio)) if audio.size else 0.0
+            audio = audio / peak if peak >= 1e-8 else np.zeros_like(audio)
+        audio = np.clip(audio * getattr(config, 'volume', 1.0), -1.0, 1.0)
+        return (audio * 32767).astype('<i2').tobytes()
+    return voice.synthesize_ids_to_raw(phoneme_ids, length_scale=length_scale)
+
+
+def _synthesize_in_child(voice, text: str, output_path: str, length_scale: float,
+                         cpus: Optional[Iterable[int]], phonemes: Optional[PhonemeCache] = None):
+    """Body of a forked synthesis worker."""
+    if cpus:
+        os.sched_setaffinity(0, set(cpus))
+    with wave.open(output_path, 'wb') as wav_file:
+        if phonemes is not None:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(voice.config.sample_rate)
+            for phoneme_ids in phonemes.phoneme_ids(voice, text):
+                wav_file.writeframes(ids_to_pcm(voice, phoneme_ids, length_scale))
+        elif hasattr(voice, 'synthesize_wav'):
+            # piper-tts >= 1.3
+            from piper import SynthesisConfig
+            voice.synthesize_wav(text, wav_file, syn_config=SynthesisConfig(length_scale=length_scale))
+        else:
+            voice.synthesize(text, wav_file, length_scale=length_scale)
+
+
+def _serve(voice, phonemes: Optional[PhonemeCache], conn: Connection):
+    """
+    Body of the fork server: fork one synthesis child per request.
+
+    This process has a single thread, so its children can safely use the
+    locks they inherit. Replies are ('started', request id, pid) and
+    ('done', request id, exit code).
+    """
+    running: Dict[int, int] = {}
+    try:
+        while True:
+            while running:
+                try:
+                    pid, status = os.waitpid(-1, os.WNOHANG)
+                except ChildProcessError:
+                    break
+                if pid == 0:
+                    break
+                conn.send(('done', running.pop(pid), os.waitstatus_to_exitcode(status)))
+
+            if not conn.poll(POLL_SECONDS):
+                continue
+            try:
+                message = conn.recv()
+            except EOFError:
+                break
+            if message is None:
+                break
+
+            request_id, (text, output_path, length_scale, cpus) = message
+            pid = os.fork()
+            if pid == 0:
+                code = 0
+                try:
+                    _synthesize_in_child(voice, text, output_path, length_scale, cpus, phonemes)
+                except BaseException:
+                    traceback.print_exc()
+                    code = 1
+                finally:
+                    os._exit(code)
+            running[pid] = request_id
+            conn.send(('started', request_id, pid))
+    finally:
+        for pid in running:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+
+class _Request:
+    """A synthesis handed to the fork server."""
+
+    def __init__(self):
+        self.pid: Optional[int] = None
+        self.exitcode: Optional[int] = None
+        self.abandoned = False
+        self.finished = Event()
+
+
+class ForkServer:
+    """Single-threaded helper process forking synthesis children on request."""
+
+    def __init__(self, voice, phonemes: Optional[PhonemeCache] = None):
+        """
+        Fork the server. Must be called before this process starts threads
+        that hold locks (job runner workers, progress bars).
+
+        Args:
+            voice: Loaded piper voice, shared copy-on-write with the children
+            phonemes: Phoneme cache the children use
+        """
+        context = multiprocessing.get_context('fork')
+        self._conn, server_conn = context.Pipe()
+        self._process = context.Process(target=_serve, args=(voice, phonemes, server_conn),
+                                        daemon=True)
+        self._process.start()
+        server_conn.close()
+
+        self._requests: Dict[int, _Request] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._reader = threading.Thread(target=self._read_replies, daemon=True)
+        self._reader.start()
+        atexit.register(self.close)
+
+    def _read_replies(self):
+        """Route the server's replies to the waiting requests."""
+        while True:
+            try:
+                kind, request_id, value = self._conn.recv()
+            except (EOFError, OSError):
+                break
+            with self._lock:
+                request = self._requests.get(request_id)
+                if request is None:
+                    continue
+                if kind == 'started':
+                    request.pid = value
+                    if request.abandoned:
+                        self._kill(value)
+                else:
+                    request.exitcode = value
+                    del self._requests[request_id]
+                    request.finished.set()
+        # Server gone: nothing still waiting will ever finish
+        with self._lock:
+            for request in self._requests.values():
+                request.exitcode = -1
+                request.finished.set()
+            self._requests.clear()
+
+    @staticmethod
+    def _kill(pid: int):
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    def run(self, args: tuple, timeout: Optional[float] = None,
+            cancel: Optional[Event] = None) -> int:
+        """
+        Run _synthesize_in_child in a new child.
+
+        Args:
+            args: (text, output path, length scale, CPUs or None)
+            timeout: Seconds before the child is killed
+            cancel: Event that kills the child when set
+
+        Returns:
+            Exit code of the child
+
+        Raises:
+            PiperTimeoutError: If the deadline passed
+            PiperCancelledError: If the cancel event was set
+        """
+        request = _Request()
+        with self._lock:
+            if not self._process.is_alive():
+                raise RuntimeError("Synthesis fork server is not running")
+            request_id = next(self._ids)
+            self._requests[request_id] = request
+            self._conn.send((request_id, args))
+
+        started = time.monotonic()
+        try:
+            while not request.finished.wait(POLL_SECONDS):
+                if cancel is not None and cancel.is_set():
+                    raise PiperCancelledError("Synthesis cancelled")
+                if timeout is not None and time.monotonic() - started > timeout:
+                    raise PiperTimeoutError(f"Synthesis timed out after {timeout:.0f}s")
+        finally:
+            with self._lock:
+                if not request.finished.is_set():
+                    # Killed now if running, as soon as it starts otherwise
+                    request.abandoned = True
+                    if request.pid is not None:
+                        self._kill(request.pid)
+        assert request.exitcode is not None
+        return request.exitcode
+
+    def close(self):
+        """Stop the server and its children."""
+        if not self._process.is_alive():
+            return
+        try:
+            with self._lock:
+                self._conn.send(None)
+        except OSError:
+            pass
+        self._process.join(timeout=5)
+        if self._process.is_alive():
+            self._process.kill()
+            self._process.join()
+
+
+class SharedVoice:
+    """Piper voice loaded in this process, synthesized from forked children."""
+
+    def __init__(self, model_path: Path, config_path: Optional[Path] = None,
+                 phoneme_cache: Optional[bool] = None):
+        """
+        Load a voice model and start the fork server.
+
+        Create shared voices before starting job runners or progress bars:
+        the fork server must be forked while this process is single threaded.
+
+        The ONNX session is single-threaded: a session thread pool would not
+        survive fork, and parallelism comes from running several children.
+
+        Args:
+            model_path: Voice .onnx file
+            config_path: Voice config (default: <model>.onnx.json)
+            phoneme_cache: Reuse cached phoneme ids (default: PHONEME_CACHE)
+        """
+        if not shared_voice_available():
+            raise RuntimeError("Shared voices need the piper Python package: pip install piper-tts")
+
+        import onnxruntime
+        from piper import PiperVoice
+        from piper.config import PiperConfig
+
+        self.model_path = Path(model_path)
+        self.config_path = Path(config_path) if config_path else self.model_path.with_suffix('.onnx.json')
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = 1
+        options.inter_op_num_threads = 1
+        options.add_session_config_entry("session.intra_op.allow_spinning", "0")
+        session = onnxruntime.InferenceSession(str(self.model_path), sess_options=options,
+                                               providers=["CPUExecutionProvider"])
+        config = PiperConfig.from_dict(json.loads(self.config_path.read_text(encoding='utf-8')))
+        self.voice = PiperVoice(session=session, config=config)
+        self.sample_rate = config.sample_rate
+        use_cache = settings.PHONEME_CACHE if phoneme_cache is None else phoneme_cache
+        self.phonemes = PhonemeCache(phonemizer_namespace(config)) if use_cache else None
+        self._server = ForkServer(self.voice, self.phonemes)
+
+    def synthesize(self, text: str, output_path: Path, speed: float = 1.0,
+                   cpus: Optional[Iterable[int]] = None, timeout: Optional[float] = None,
+                   cancel: Optional[Event] = None) -> Path:
+        """
+        Synthesize text to a WAV file in a child of the fork server.
+
+        Safe to call from several threads at once.
+
+        Args:
+            text: Text to speak
+            output_path: WAV file to write
+            speed: Speech speed (length scale is its inverse)
+            cpus: CPUs the child is pinned to
+            timeout: Seconds before the child is killed
+            cancel: Event that kills the child when set
+
+        Returns:
+            Path to the WAV file
+        """
+        exitcode = self._server.run(
+            (text, str(output_path), 1.0 / speed, list(cpus) if cpus else None),
+            timeout=timeout, cancel=cancel
+        )
+        if exitcode != 0:
+            raise RuntimeError(f"Synthesis worker exited with code {exitcode}")
+        return Path(output_path)
+
+    def close(self):
+        """Stop the fork server."""
+        self._server.close()
@@ -0,0 +1,324 @@
+"""Shared-directory work queue for multi-node rendering.
+
+Jobs are JSON files moved by atomic renames between pending/, claimed/,
+done/ and failed/ under a directory every node can reach. A claimed file
+is named <job>.json@<worker> and its mtime is the worker's last heartbeat.
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from config.settings import settings
+
+STATES = ("pending", "claimed", "done", "failed")
+
+
+def make_worker_id() -> str:
+    """Unique worker identifier: host, pid and a random suffix."""
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+def write_json_atomic(path: Path, data: Dict[str, Any], durable: bool = False):
+    """
+    Write JSON to a temporary file and rename it into place.
+
+    Args:
+        path: Destination file
+        data: JSON-serializable data
+        durable: Also flush the file and its directory to disk, so the new
+                 version survives a power loss once this returns
+    """
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(data, ensure_ascii=False, indent=2))
+        if durable:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    if durable:
+        directory = os.open(path.parent, os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+
+def _mtime(path: Path) -> float:
+    """Modification time, or 0 if the file vanished meanwhile."""
+    try:
+        return path.stat().st_mtime
+    except FileNotFoundError:
+        return 0.0
+
+
+class QueueJob:
+    """A job claimed by a worker."""
+
+    def __init__(self, job_id: str, payload: Dict[str, Any], claimed_path: Path):
+        self.job_id = job_id
+        self.payload = payload
+        self.claimed_path = claimed_path
+
+
+class WorkQueue:
+    """Job queue stored in a shared directory."""
+
+    def __init__(self, root: Path, lease_seconds: Optional[float] = None,
+                 max_attempts: Optional[int] = None):
+        """
+        Open (and create if needed) a queue.
+
+        Args:
+            root: Queue directory, shared between nodes
+            lease_seconds: Heartbeat age after which a claim expires
+            max_attempts: Attempts before a job is moved to failed/
+        """
+        self.root = Path(root)
+        self.lease_seconds = settings.QUEUE_LEASE_SECONDS if lease_seconds is None else lease_seconds
+        self.max_attempts = settings.TTS_MAX_RETRIES + 1 if max_attempts is None else max_attempts
+
+        for state in STATES:
+            (self.root / state).mkdir(parents=True, exist_ok=True)
+
+    def _dir(self, state: str) -> Path:
+        return self.root / state
+
+    def enqueue(self, job_id: str, payload: Dict[str, Any]) -> bool:
+        """
+        Add a job unless it is already queued, running or done.
+
+        Args:
+            job_id: Unique job identifier (used as file name)
+            payload: JSON-serializable job description
+
+        Returns:
+            True if the job was added
+        """
+        name = f"{job_id}.json"
+        if (self._dir("pending") / name).exists() or (self._dir("done") / name).exists():
+            return False
+        if any(self._dir("claimed").glob(f"{name}@*")):
+            return False
+
+        (self._dir("failed") / name).unlink(missing_ok=True)
+        write_json_atomic(self._dir("pending") / name,
+                          {"id": job_id, "attempts": 0, "payload": payload})
+        return True
+
+    def claim(self, worker_id: str) -> Optional[QueueJob]:
+        """
+        Claim the oldest pending job.
+
+        Args:
+            worker_id: Identifier of the claiming worker
+
+        Returns:
+            Claimed job, or None if nothing is pending
+        """
+        for path in sorted(self._dir("pending").glob("*.json"), key=_mtime):
+            claimed_path = self._dir("claimed") / f"{path.name}@{worker_id}"
+            try:
+                # Refresh mtime first so the claim is not seen as expired
+                os.utime(path)
+                os.rename(path, claimed_path)
+            except FileNotFoundError:
+                continue  # Another worker got it
+
+            record = json.loads(claimed_path.read_text(encoding='utf-8'))
+            return QueueJob(record["id"], record["payload"], claimed_path)
+        return None
+
+    def heartbeat(self, job: QueueJob) -> bool:
+        """
+        Renew the lease on a claimed job.
+
+        Returns:
+            False if the lease was lost (the job was reclaimed)
+        """
+        try:
+            os.utime(job.claimed_path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def complete(self, job: QueueJob, result: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Mark a claimed job as done.
+
+        Args:
+            job: Claimed job
+            result: Optional JSON-serializable result stored with the job
+
+        Returns:
+            False if the lease was lost before completion
+        """
+        done_path = self._dir("done") / f"{job.job_id}.json"
+        try:
+            os.rename(job.claimed_path, done_path)
+        except FileNotFoundError:
+            return False
+
+        if result is not None:
+            record = json.loads(done_path.read_text(encoding='utf-8'))
+            record["result"] = result
+            write_json_atomic(done_path, record)
+        return True
+
+    def fail(self, job: QueueJob, error: str) -> bool:
+        """
+        Release a claimed job after an error.
+
+        The job goes back to pending, or to failed/ once it has used up its
+        attempts.
+
+        Returns:
+            False if the lease was lost
+        """
+        try:
+            record = json.loads(job.claimed_path.read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            return False
+
+        record["attempts"] = record.get("attempts", 0) + 1
+        record["error"] = error
+        state = "failed" if record["attempts"] >= self.max_attempts else "pending"
+        write_json_atomic(self._dir(state) / f"{job.job_id}.json", record)
+        job.claimed_path.unlink(missing_ok=True)
+        return True
+
+    def reclaim_expired(self) -> int:
+        """
+        Move claims with a stale heartbeat back to pending.
+
+        An expired lease counts as an attempt, as fail() does: a job that
+        keeps killing its worker (out of memory, crash in espeak or
+        onnxruntime) goes to failed/ once it has used up its attempts
+        instead of being claimed forever.
+
+        Returns:
+            Number of reclaimed jobs
+        """
+        reclaimed = 0
+        now = time.time()
+        for path in self._dir("claimed").glob("*.json@*"):
+            name = path.name.split("@", 1)[0]
+            # Taken out of the way first, so that one reclaimer wins
+            taken = path.with_name(f".{name}.reclaim-{uuid.uuid4().hex[:8]}")
+            try:
+                if now - path.stat().st_mtime < self.lease_seconds:
+                    continue
+                os.rename(path, taken)
+            except FileNotFoundError:
+                continue
+
+            try:
+                record = json.loads(taken.read_text(encoding='utf-8'))
+            except ValueError:
+                record = {"id": name[:-len(".json")], "payload": {}}
+            record["attempts"] = record.get("attempts", 0) + 1
+            record["error"] = f"lease expired (worker {path.name.split('@', 1)[1]} lost)"
+            state = "failed" if record["attempts"] >= self.max_attempts else "pending"
+            write_json_atomic(self._dir(state) / name, record)
+            taken.unlink(missing_ok=True)
+            reclaimed += 1
+        return reclaimed
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs in each state."""
+        return {state: sum(1 for p in self._dir(state).iterdir()
+                           if not p.name.startswith('.'))
+                for state in STATES}
+
+    def is_drained(self) -> bool:
+        """True when no job is pending or claimed."""
+        counts = self.counts()
+        return counts["pending"] == 0 and counts["claimed"] == 0
+
+
+class Heartbeat:
+    """Background lease renewal for a claimed job."""
+
+    def __init__(self, queue: WorkQueue, job: QueueJob):
+        self.queue = queue
+        self.job = job
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        interval = max(0.05, self.queue.lease_seconds / 3)
+        while not self._stop.wait(interval):
+            if not self.queue.heartbeat(self.job):
+                self.lost.set()
+                return
+
+    def __enter__(self) -> "Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_worker(queue: WorkQueue,
+               handler: Callable[[Dict[str, Any], threading.Event], Optional[Dict[str, Any]]],
+               worker_id: Optional[str] = None, wait: bool = False,
+               stop: Optional[threading.Event] = None,
+               on_event: Optional[Callable[[str, QueueJob, Any], None]] = None) -> int:
+    """
+    Claim and process jobs until the queue is drained.
+
+    Args:
+        queue: Work queue
+        handler: Called with (payload, lease_lost_event); returns an optional
+                 result dict. It should abort when the event is set.
+        worker_id: Worker identifier (default: generated)
+        wait: Keep polling for new jobs instead of exiting when drained
+        stop: Event requesting the worker to exit after the current job
+        on_event: Called with ("done" | "failed" | "lost", job, detail)
+
+    Returns:
+        Number of jobs completed by this worker
+    """
+    worker_id = worker_id or make_worker_id()
+    completed = 0
+
+    while stop is None or not stop.is_set():
+        queue.reclaim_expired()
+        job = queue.claim(worker_id)
+
+        if job is None:
+            if not wait and queue.is_drained():
+                break
+            time.sleep(min(settings.QUEUE_POLL_SECONDS, queue.lease_seconds / 3))
+            continue
+
+        with Heartbeat(queue, job) as heartbeat:
+            try:
+                result = handler(job.payload, heartbeat.lost)
+                error = None
+            except Exception as e:
+                result, error = None, e
+
+        if heartbeat.lost.is_set():
+            event, ok = "lost", False
+        elif error is None:
+            ok = queue.complete(job, result)
+            event = "done" if ok else "lost"
+        else:
+            queue.fail(job, str(error))
+            event, ok = "failed", False
+
+        if ok:
+            completed += 1
+        if on_event:
+            on_event(event, job, error if event == "failed" else result)
+
+    return completed
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Benchmark section classification over thousands of generated titles."""
+
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+import click
+from rich.console import Console
+from rich.table import Table
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.chapter_classifier import ChapterClassifier, roman_to_int
+from config.settings import settings
+
+console = Console()
+
+# Keyword lists and loops of the former EPUBProcessor, kept as the baseline
+LEGACY_SKIP_KEYWORDS = [
+    'sommaire', 'table des matières', 'table des noms', 'index',
+    'bibliographie', 'références', 'notes', 'glossaire', 'lexique',
+    'copyright', 'page de titre', 'couverture', 'colophon',
+    'table of contents', 'bibliography', 'references', 'glossary'
+]
+LEGACY_CONTENT_START_KEYWORDS = [
+    'introduction', 'préface', 'avant-propos', 'prologue',
+    'chapitre', 'chapter', 'partie', 'part', 'livre', 'book'
+]
+LEGACY_PATTERNS = [
+    r'chapitre\s+(\d+)', r'chapter\s+(\d+)', r'partie\s+(\d+)',
+    r'part\s+(\d+)', r'livre\s+(\d+)', r'book\s+(\d+)',
+]
+
+
+def legacy_classify(title, text):
+    """Former per-keyword loops: (content_start, skip, chapter_number)."""
+    title_lower = title.lower()
+    content_start = any(k in title_lower for k in LEGACY_CONTENT_START_KEYWORDS)
+
+    skip_count = sum(1 for k in LEGACY_SKIP_KEYWORDS if k in title_lower)
+    skip = (skip_count >= 2
+            or (skip_count == 1 and len(text.split()) < 50)
+            or (len(text.split()) < settings.MIN_CHAPTER_LENGTH and not content_start))
+
+    number = None
+    for pattern in LEGACY_PATTERNS:
+        match = re.search(pattern, title_lower)
+        if match:
+            number = int(match.group(1))
+            break
+    if number is None:
+        match = re.search(r'(?:chapitre|chapter|partie|part)\s+([IVXLCDM]+)', title_lower)
+        if match:
+            number = roman_to_int(match.group(1))
+
+    return content_start, skip, number
+
+
+def generate_titles(count, seed=0):
+    """Random mix of numbered, spelled-out, front/back matter and plain titles."""
+    rng = random.Random(seed)
+    romans = ['I', 'II', 'III', 'IV', 'V', 'IX', 'XII', 'XIV', 'XX']
+    words = ['Le départ', 'La tempête', 'Retour au port', 'Une nuit', "L'héritage",
+             'Le silence', 'Au bord de la mer', 'The Journey', 'Homecoming']
+    makers = [
+        lambda: f"Chapitre {rng.randint(1, 80)} : {rng.choice(words)}",
+        lambda: f"Chapter {rng.randint(1, 80)}",
+        lambda: f"CHAPITRE {rng.choice(romans)}",
+        lambda: f"Partie {rng.choice(romans)} - {rng.choice(words)}",
+        lambda: f"{rng.choice(['Première', 'Deuxième', 'Troisième'])} partie",
+        lambda: f"Chapitre {rng.choice(['premier', 'deux', 'dix-sept', 'vingt'])}",
+        lambda: rng.choice(['Table des matières', 'Notes et références', 'Index',
+                            'Copyright', 'Bibliographie', 'Couverture', 'Table of Contents']),
+        lambda: rng.choice(['Introduction', 'Préface', 'Avant-propos', 'Prologue']),
+        lambda: rng.choice(words),
+    ]
+    return [rng.choice(makers)() for _ in range(count)]
+
+
+@click.command()
+@click.option('--titles', '-n', type=int, default=5000,
+              help='Number of generated titles (default: 5000)')
+@click.option('--rounds', '-r', type=int, default=5,
+              help='Timed rounds, best one is reported (default: 5)')
+@click.option('--languages', '-l', default='fr,en',
+              help='Rule packs to compile (default: fr,en)')
+def benchmark(titles, rounds, languages):
+    """Compare the compiled classifier with the former keyword loops."""
+    samples = [(title, 'mot ' * random.Random(i).randint(10, 400))
+               for i, title in enumerate(generate_titles(titles))]
+
+    start = time.perf_counter()
+    classifier = ChapterClassifier([part.strip() for part in languages.split(',')])
+    compile_seconds = time.perf_counter() - start
+
+    def run_legacy():
+        for title, text in samples:
+            legacy_classify(title, text)
+
+    def run_compiled():
+        for title, text in samples:
+            classifier.classify(title).should_skip(len(text.split()))
+
+    results = {}
+    for name, run in (("keyword loops", run_legacy), ("compiled rules", run_compiled)):
+        best = None
+        for _ in range(rounds):
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results[name] = best
+
+    table = Table(title=f"Classification of {titles:,} titles (best of {rounds})")
+    table.add_column("Engine", style="cyan")
+    table.add_column("Total (ms)", justify="right")
+    table.add_column("µs / title", justify="right")
+    table.add_column("Titles / s", justify="right", style="green")
+    for name, seconds in results.items():
+        table.add_row(name, f"{seconds * 1000:.1f}", f"{seconds / titles * 1e6:.2f}",
+                      f"{titles / seconds:,.0f}")
+    console.print(table)
+
+    baseline = results["keyword loops"]
+    console.print(f"\nRule packs {', '.join(classifier.languages)} compiled in "
+                  f"{compile_seconds * 1000:.1f} ms; speedup "
+                  f"[bold green]{baseline / results['compiled rules']:.1f}×[/bold green]")
+
+    # Where the engines disagree (roman numerals, spelled-out numbers, whole words)
+    differences = 0
+    for title, text in samples:
+        section = classifier.classify(title)
+        new = (section.content_start, section.should_skip(len(text.split())), section.number)
+        if new != legacy_classify(title, text):
+            differences += 1
+    console.print(f"{differences:,} title(s) classified differently from the keyword loops")
+
+
+if __name__ == "__main__":
+    benchmark()
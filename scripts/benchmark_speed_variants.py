@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Compare time-stretched speed variants against re-synthesis with Piper."""
+
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+import click
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.piper_tts import run_piper
+from lib.render_estimate import wav_duration
+from lib.time_stretch import parse_speeds, stretch_wav
+from scripts.calibrate_threads import SAMPLE_TEXT
+from scripts.epub_to_audio import find_piper, find_voice
+
+console = Console()
+
+FFT_SIZE = 1024
+
+
+def synthesize(piper_cmd, model_path, config_path, text, speed, output_file):
+    """Render text with Piper at a speed, return wall seconds."""
+    cmd = [piper_cmd, '--model', str(model_path), '--output_file', str(output_file)]
+    if config_path:
+        cmd.extend(['--config', str(config_path)])
+    if speed != 1.0:
+        cmd.extend(['--length-scale', str(1.0 / speed)])
+    start = time.perf_counter()
+    result = run_piper(cmd, text)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[:200])
+    return time.perf_counter() - start
+
+
+def average_spectrum(path):
+    """Long-term average log spectrum (dB) of a mono 16-bit WAV."""
+    with wave.open(str(path), 'rb') as wav_file:
+        samples = np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype='<i2') / 32768.0
+    if len(samples) < FFT_SIZE:
+        samples = np.pad(samples, (0, FFT_SIZE - len(samples)))
+    frames = np.lib.stride_tricks.sliding_window_view(samples, FFT_SIZE)[::FFT_SIZE // 2]
+    power = np.abs(np.fft.rfft(frames * np.hanning(FFT_SIZE), axis=1)) ** 2
+    return 10 * np.log10(power.mean(axis=0) + 1e-10)
+
+
+def spectral_distance(reference, candidate):
+    """RMS difference in dB between two average spectra (0 = identical timbre)."""
+    difference = average_spectrum(reference) - average_spectrum(candidate)
+    return float(np.sqrt(np.mean((difference - difference.mean()) ** 2)))
+
+
+@click.command()
+@click.option('--voice', '-v', default='upmc',
+              help='Voice: upmc, siwis, tom, gilles, mls (default: upmc)')
+@click.option('--speeds', default='1.25,1.5,2',
+              help='Speeds to compare, e.g. "1.25,1.5" (default: 1.25,1.5,2)')
+@click.option('--text-file', type=click.Path(exists=True),
+              help='Text to synthesize (default: built-in French sample)')
+def benchmark(voice, speeds, text_file):
+    """Time and compare speed variants: re-synthesis vs time-stretch."""
+    piper_cmd = find_piper()
+    model_path, config_path = find_voice(voice)
+    text = Path(text_file).read_text(encoding='utf-8') if text_file else SAMPLE_TEXT
+
+    table = Table(title=f"Speed variants ({model_path.stem})")
+    table.add_column("Speed", justify="right", style="cyan")
+    table.add_column("Piper (s)", justify="right")
+    table.add_column("Stretch (s)", justify="right", style="green")
+    table.add_column("Piper audio (s)", justify="right")
+    table.add_column("Stretch audio (s)", justify="right")
+    table.add_column("Spectral Δ (dB)", justify="right")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        work_dir = Path(tmp_dir)
+        base = work_dir / "base.wav"
+        base_seconds = synthesize(piper_cmd, model_path, config_path, text, 1.0, base)
+        console.print(f"Base rendering: {wav_duration(base):.1f}s of audio in {base_seconds:.2f}s\n")
+
+        for speed in parse_speeds(speeds):
+            resynthesized = work_dir / f"piper_{speed:g}.wav"
+            stretched = work_dir / f"stretch_{speed:g}.wav"
+            piper_seconds = synthesize(piper_cmd, model_path, config_path, text, speed,
+                                       resynthesized)
+            start = time.perf_counter()
+            stretch_wav(base, stretched, speed)
+            stretch_seconds = time.perf_counter() - start
+
+            table.add_row(f"{speed:g}x", f"{piper_seconds:.2f}", f"{stretch_seconds:.3f}",
+                          f"{wav_duration(resynthesized):.1f}", f"{wav_duration(stretched):.1f}",
+                          f"{spectral_distance(resynthesized, stretched):.2f}")
+
+    console.print(table)
+    console.print("Spectral Δ compares long-term average spectra (timbre); "
+                  "under ~2 dB the variants are hard to tell apart.")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Convert whole EPUB books to per-chapter audio in one pass."""
+
+import sys
+from pathlib import Path
+
+import click
+from rich.console import Console
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.epub_utils import EPUBProcessor
+from lib.cpu_budget import ThreadBudget
+from lib.time_stretch import parse_speeds
+from config.settings import settings
+from scripts.epub_to_audio import (chapter_text, find_piper, find_voice, load_shared_voice,
+                                   plan_jobs, resume_jobs, run_jobs)
+
+console = Console()
+
+
+@click.command()
+@click.argument('epub_files', nargs=-1, type=click.Path(exists=True), required=True)
+@click.option('--voice', '-v', default='upmc',
+              help='Voice: upmc, siwis, tom, gilles, mls (default: upmc)')
+@click.option('--output-dir', '-o', type=click.Path(),
+              help='Output directory (default: output/audio)')
+@click.option('--format', '-f', type=click.Choice(['wav', 'mp3']), default='wav',
+              help='Output format (default: wav)')
+@click.option('--speed', '-s', type=float, default=1.0,
+              help='Speech speed (0.5-2.0, default: 1.0)')
+@click.option('--min-words', '-m', type=int, default=100,
+              help='Minimum words per chapter (default: 100)')
+@click.option('--workers', '-w', type=int, default=0,
+              help='Parallel Piper workers (default: derived from CPU budget)')
+@click.option('--threads', '-t', type=int, default=None,
+              help='Threads per worker (default: THREADS_PER_WORKER or derived)')
+@click.option('--max-retries', type=int, default=None,
+              help='Retries per chapter after a failure or timeout (default: TTS_MAX_RETRIES)')
+@click.option('--speculative/--no-speculative', default=None,
+              help='Duplicate the slowest chapters at the end of the batch (default: SPECULATIVE_RETRY)')
+@click.option('--write-split', is_flag=True,
+              help='Also write the per-chapter EPUB files')
+@click.option('--split-dir', type=click.Path(),
+              help='Directory for --write-split (default: output/split)')
+@click.option('--shared-voice/--no-shared-voice', default=None,
+              help='Load the voice once and fork workers sharing it (default: SHARED_VOICE)')
+@click.option('--memory-report', is_flag=True,
+              help='Report unique vs shared memory per worker after the run')
+@click.option('--variants', default=None,
+              help='Extra speeds time-stretched from one synthesis, e.g. "1.25,1.5" '
+                   '(default: SPEED_VARIANTS)')
+@click.option('--batch-chars', type=int, default=None,
+              help='Synthesize chapters shorter than this in shared Piper runs '
+                   '(default: BATCH_SMALL_CHARS, 0 = off)')
+@click.option('--resume', is_flag=True,
+              help='Skip files already done by a previous (interrupted) run, per the '
+                   'book journals; missing or corrupt files are synthesized again')
+def book_to_audio(epub_files, voice, output_dir, format, speed, min_words, workers, threads,
+                  max_retries, speculative, write_split, split_dir, shared_voice, memory_report,
+                  variants, batch_chars, resume):
+    """
+    Convert EPUB books straight to one audio file per chapter.
+    
+    Chapters are classified once and their cleaned text goes directly to
+    Piper; output names match those of split_epub.py + epub_to_audio.py.
+    
+    EPUB_FILES: Original (unsplit) EPUB books
+    """
+    settings.MIN_CHAPTER_LENGTH = min_words
+    variants = [v for v in parse_speeds(settings.SPEED_VARIANTS if variants is None else variants)
+                if v != speed]
+    
+    piper_cmd = find_piper()
+    console.print(f"[green]✅ Using Piper: {piper_cmd}[/green]")
+    
+    model_path, config_path = find_voice(voice)
+    console.print(f"[green]✅ Using voice: {model_path.stem}[/green]")
+    
+    output_path = Path(output_dir) if output_dir else Path("output/audio")
+    output_path.mkdir(parents=True, exist_ok=True)
+    
+    shared_voice = settings.SHARED_VOICE if shared_voice is None else shared_voice
+    voice_model = load_shared_voice(model_path, config_path) if shared_voice else None
+    
+    budget = ThreadBudget(workers=workers, threads_per_worker=threads)
+    items = []
+    journal_paths = {}
+    failed = []
+    
+    for epub_file in epub_files:
+        epub_path = Path(epub_file)
+        console.print(f"\n[bold blue]Processing: {epub_path.name}[/bold blue]")
+        
+        try:
+            processor = EPUBProcessor(epub_path)
+            chapters = processor.process()['chapters']
+            if write_split:
+                processor.split_into_chapters(Path(split_dir) if split_dir else None)
+        except Exception as e:
+            console.print(f"[red]❌ Error with {epub_path.name}: {e}[/red]")
+            failed.append(epub_path.name)
+            continue
+        
+        for chapter in chapters:
+            text = chapter_text(chapter)
+            if not text:
+                continue
+            stem = processor.chapter_file_stem(chapter['id'], chapter['title'])
+            output_file = output_path / f"{stem}.{format}"
+            items.append((text, output_file))
+            journal_paths[output_file] = output_path / f".{epub_path.stem}.journal.json"
+    
+    jobs = plan_jobs(items, piper_cmd, model_path, config_path, format, speed, budget,
+                     voice_model, variants, batch_chars)
+    jobs, done = resume_jobs(jobs, journal_paths, resume, variants)
+    
+    console.print(f"\n[bold blue]Converting {len(items)} audio files in {len(jobs)} job(s)[/bold blue]")
+    console.print(f"Output: {output_path}")
+    console.print(f"Workers: {budget.describe()}\n")
+    
+    run_jobs(jobs, budget, max_retries, speculative, output_path, successful=done,
+             failed=failed, memory_report=memory_report)
+
+
+if __name__ == "__main__":
+    book_to_audio()
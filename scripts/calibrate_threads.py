@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""Measure Piper throughput across worker × thread combinations."""
+
+import sys
+import time
+import queue
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import click
+from rich.console import Console
+from rich.table import Table
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.cpu_budget import ThreadBudget, available_cpus
+from lib.piper_tts import run_piper
+from lib.render_estimate import wav_duration
+from scripts.epub_to_audio import find_piper, find_voice
+
+console = Console()
+
+SAMPLE_TEXT = (
+    "Il était une fois, dans une petite ville au bord de la mer, un vieux libraire "
+    "qui connaissait chaque livre de sa boutique. Les enfants venaient l'écouter "
+    "raconter des histoires de marins, de tempêtes et de terres lointaines. "
+    "Chaque soir, il fermait ses volets en souriant, certain que demain "
+    "apporterait de nouveaux lecteurs et de nouvelles aventures."
+)
+
+
+def measure(piper_cmd, model_path, config_path, text, budget, jobs, work_dir):
+    """
+    Run a fixed number of synthesis jobs under a thread budget.
+
+    Args:
+        piper_cmd: Piper executable
+        model_path: Voice model path
+        config_path: Voice config path (or None)
+        text: Text synthesized by every job
+        budget: ThreadBudget to measure
+        jobs: Number of jobs to run
+        work_dir: Directory for generated WAV files
+
+    Returns:
+        Tuple (wall_seconds, audio_seconds)
+    """
+    free_slots = queue.Queue()
+    for slot in budget.slots:
+        free_slots.put(slot)
+
+    def job(index):
+        slot = free_slots.get()
+        try:
+            output_file = work_dir / f"calib_{budget.workers}x{budget.threads_per_worker}_{index}.wav"
+            cmd = [piper_cmd, '--model', str(model_path), '--output_file', str(output_file)]
+            if config_path:
+                cmd.extend(['--config', str(config_path)])
+            result = run_piper(cmd, text, env=budget.env_for(slot),
+                               preexec_fn=budget.preexec_for(slot))
+            if result.returncode != 0:
+                raise RuntimeError(result.stderr[:200])
+            duration = wav_duration(output_file)
+            output_file.unlink()
+            return duration
+        finally:
+            free_slots.put(slot)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=budget.workers) as executor:
+        audio_seconds = sum(executor.map(job, range(jobs)))
+    return time.perf_counter() - start, audio_seconds
+
+
+def parse_counts(value, default):
+    """Parse a comma separated list of positive integers."""
+    if not value:
+        return default
+    return sorted({int(part) for part in value.split(',') if int(part) > 0})
+
+
+@click.command()
+@click.option('--voice', '-v', default='upmc',
+              help='Voice: upmc, siwis, tom, gilles, mls (default: upmc)')
+@click.option('--workers', '-w', default=None,
+              help='Worker counts to try, e.g. "1,2,4" (default: powers of two)')
+@click.option('--threads', '-t', default=None,
+              help='Thread counts to try, e.g. "1,2,4" (default: powers of two)')
+@click.option('--jobs', '-j', type=int, default=0,
+              help='Jobs per combination (default: 2 per worker)')
+@click.option('--text-file', type=click.Path(exists=True),
+              help='Text to synthesize (default: built-in French sample)')
+@click.option('--oversubscribe', is_flag=True,
+              help='Also try combinations using more threads than cores')
+def calibrate(voice, workers, threads, jobs, text_file, oversubscribe):
+    """Find the fastest worker × thread split for a voice on this machine."""
+    piper_cmd = find_piper()
+    model_path, config_path = find_voice(voice)
+
+    cpus = available_cpus()
+    powers = [n for n in (1, 2, 4, 8, 16, 32, 64) if n <= len(cpus)]
+    worker_counts = parse_counts(workers, powers)
+    thread_counts = parse_counts(threads, powers)
+    text = Path(text_file).read_text(encoding='utf-8') if text_file else SAMPLE_TEXT
+
+    console.print(f"[bold blue]Calibrating {model_path.stem} on {len(cpus)} core(s)[/bold blue]\n")
+
+    table = Table(title="Piper throughput")
+    table.add_column("Workers", justify="right", style="cyan")
+    table.add_column("Threads", justify="right", style="cyan")
+    table.add_column("Wall (s)", justify="right")
+    table.add_column("Audio (s)", justify="right")
+    table.add_column("Audio s / wall s", justify="right", style="green")
+
+    best = None
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for worker_count in worker_counts:
+            for thread_count in thread_counts:
+                budget = ThreadBudget(workers=worker_count, threads_per_worker=thread_count,
+                                      cpus=cpus)
+                if budget.oversubscribed and not oversubscribe:
+                    continue
+
+                job_count = jobs or 2 * worker_count
+                console.print(f"Measuring {budget.describe()}...")
+                try:
+                    wall, audio = measure(piper_cmd, model_path, config_path, text,
+                                          budget, job_count, Path(tmp_dir))
+                except RuntimeError as e:
+                    console.print(f"[red]❌ {worker_count}×{thread_count} failed: {e}[/red]")
+                    continue
+
+                throughput = audio / wall if wall else 0.0
+                table.add_row(str(worker_count), str(thread_count),
+                              f"{wall:.1f}", f"{audio:.1f}", f"{throughput:.2f}")
+                if best is None or throughput > best[2]:
+                    best = (worker_count, thread_count, throughput)
+
+    console.print(table)
+
+    if best:
+        console.print(f"\n[bold green]Best:[/bold green] {best[0]} worker(s) × {best[1]} thread(s) "
+                      f"({best[2]:.2f}× real time)")
+        console.print("Add to .env:")
+        console.print(f"  MAX_WORKERS={best[0]}")
+        console.print(f"  THREADS_PER_WORKER={best[1]}")
+
+
+if __name__ == "__main__":
+    calibrate()
@@ -1,18 +1,36 @@
 #!/usr/bin/env python3
 """Convert EPUB chapters to audio using Piper (working version)."""
 
+import json
+import re
 import sys
+import time
+import threading
 import subprocess
 from pathlib import Path
 import click
 from rich.console import Console
-from rich.progress import track
+from rich.progress import Progress, track
+from rich.table import Table
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from lib.epub_utils import EPUBProcessor
+from lib.epub_utils import EPUBProcessor, split_sources
+from lib.book_cache import BookCache
 from lib.text_cleaner import TextCleaner
+from lib.piper_tts import run_piper
+from lib.cpu_budget import ThreadBudget
+from lib.job_runner import Attempt, Job, JobRunner, deadline_for, expected_synthesis_seconds
+from lib.job_journal import JobJournal, inputs_digest, journal_jobs, record_failures
+from lib.work_queue import WorkQueue, run_worker
+from lib.render_estimate import record_run, wav_duration
+from lib.audio_writer import part_path, split_text_into_parts
+from lib.proc_memory import MB, MemorySampler
+from lib.voice_models import SharedVoice
+from lib.time_stretch import parse_speeds, stretch_wav, variant_path
+from lib.scratch import expected_wav_bytes, scratch_space
+from config.settings import settings
 
 console = Console()
 
@@ -42,28 +60,44 @@ def find_piper():
     sys.exit(1)
 
 
+VOICES_DIR = Path.home() / "work/tts-scripts/voices/fr_FR"
+
+# Map of short names to paths
+VOICE_MAP = {
+    'upmc': VOICES_DIR / 'upmc/medium/fr_FR-upmc-medium.onnx',
+    'siwis': VOICES_DIR / 'siwis/medium/fr_FR-siwis-medium.onnx',
+    'tom': VOICES_DIR / 'tom/medium/fr_FR-tom-medium.onnx',
+    'gilles': VOICES_DIR / 'gilles/low/fr_FR-gilles-low.onnx',
+    'mls': VOICES_DIR / 'mls/medium/fr_FR-mls-medium.onnx',
+}
+
+
+def voice_key(voice_name):
+    """
+    Name a voice's runs are recorded under in the throughput history.
+    
+    Unlike find_voice, the model file does not need to exist here.
+    
+    Args:
+        voice_name: Short name (e.g. upmc), model path or model name
+        
+    Returns:
+        Model file stem (e.g. fr_FR-upmc-medium)
+    """
+    return Path(VOICE_MAP.get(voice_name, voice_name)).stem
+
+
 def find_voice(voice_name):
     """Find voice model path."""
-    base_dir = Path.home() / "work/tts-scripts/voices/fr_FR"
-    
-    # Map of short names to paths
-    voice_map = {
-        'upmc': base_dir / 'upmc/medium/fr_FR-upmc-medium.onnx',
-        'siwis': base_dir / 'siwis/medium/fr_FR-siwis-medium.onnx',
-        'tom': base_dir / 'tom/medium/fr_FR-tom-medium.onnx',
-        'gilles': base_dir / 'gilles/low/fr_FR-gilles-low.onnx',
-        'mls': base_dir / 'mls/medium/fr_FR-mls-medium.onnx',
-    }
-    
-    if voice_name in voice_map:
-        model_path = voice_map[voice_name]
+    if voice_name in VOICE_MAP:
+        model_path = VOICE_MAP[voice_name]
     else:
         model_path = Path(voice_name)  # Try as full path
     
     if not model_path.exists():
         console.print(f"[red]❌ Voice model not found: {model_path}[/red]")
         console.print("\nAvailable voices:")
-        for name, path in voice_map.items():
+        for name, path in VOICE_MAP.items():
             status = "✅" if path.exists() else "❌"
             console.print(f"  {status} {name}: {path}")
         sys.exit(1)
@@ -77,8 +111,697 @@ def find_voice(voice_name):
     return model_path, config_path
 
 
+def prepare_text(epub_path):
+    """
+    Extract TTS-ready text from an EPUB file.
+
+    Args:
+        epub_path: EPUB file
+
+    Returns:
+        Cleaned text (empty if the EPUB has no text)
+    """
+    # Chapter files written by split_epub.py point at the cached source book
+    chapter = BookCache().chapter_for_split_file(epub_path) if settings.BOOK_CACHE else None
+    if chapter is not None:
+        return chapter_text(chapter)
+
+    processor = EPUBProcessor(epub_path)
+    text = processor.extract_full_text(skip_metadata=True)
+
+    if not text.strip():
+        return ""
+
+    # Clean text for TTS
+    cleaner = TextCleaner()
+    return cleaner.clean_text_for_tts(text)
+
+
+def chapter_text(chapter):
+    """
+    TTS-ready text for one processed chapter, as read from its split EPUB.
+
+    Args:
+        chapter: Chapter record from EPUBProcessor.process()
+
+    Returns:
+        Cleaned text (empty if the chapter has no text)
+    """
+    if not chapter['text']:
+        return ""
+    return TextCleaner.clean_text_for_tts(f"# {chapter['title']}\n\n{chapter['text']}")
+
+
+def convert_to_mp3(wav_file, mp3_file):
+    """Encode a WAV file to MP3 with ffmpeg."""
+    subprocess.run([
+        'ffmpeg', '-y', '-i', str(wav_file),
+        '-codec:a', 'libmp3lame', '-qscale:a', '2',
+        str(mp3_file)
+    ], capture_output=True)
+
+
+def synthesize_file(text, output_file, piper_cmd, model_path, config_path,
+                    format, speed, attempt=None, budget=None, voice=None, variants=()):
+    """
+    Synthesize text into an audio file with Piper.
+
+    Args:
+        text: TTS-ready text
+        output_file: Audio file to write
+        piper_cmd: Piper executable
+        model_path: Voice model path
+        config_path: Voice config path (or None)
+        format: Output format (wav or mp3)
+        speed: Speech speed
+        attempt: Job attempt providing deadline, cancellation and CPU slot
+        budget: ThreadBudget the attempt's slot belongs to
+        voice: SharedVoice to synthesize with instead of the Piper CLI
+        variants: Extra speeds, time-stretched from this rendering into
+            variant_path(output_file, speed) files
+
+    Returns:
+        Path to the audio file
+    """
+    # Piper writes to scratch storage; the output is written once, sequentially
+    scratch = scratch_space()
+    wav_file = scratch.path(f"{output_file.stem}.wav", expected_wav_bytes(text, speed))
+    cmd = piper_command(piper_cmd, model_path, config_path, speed)
+    cmd.extend(['--output_file', str(wav_file)])
+
+    # Run Piper within the worker's thread budget and deadline
+    slot = attempt.slot if attempt else None
+    started = time.monotonic()
+    try:
+        if voice is not None:
+            # Forked by the voice's fork server, which holds the model: its pages are shared
+            voice.synthesize(
+                text, wav_file, speed,
+                cpus=slot.cpus if budget and budget.pin and slot else None,
+                timeout=attempt.timeout if attempt else None,
+                cancel=attempt.cancelled if attempt else None
+            )
+        else:
+            result = run_piper(
+                cmd, text,
+                env=budget.env_for(slot) if budget and slot else None,
+                preexec_fn=budget.preexec_for(slot) if budget and slot else None,
+                timeout=attempt.timeout if attempt else None,
+                cancel=attempt.cancelled if attempt else None
+            )
+
+            if result.returncode != 0:
+                raise RuntimeError(result.stderr[:200])
+
+        # Feed render-time estimates
+        record_run(model_path.stem, len(text), wav_duration(wav_file),
+                   time.monotonic() - started, speed, slot.threads if slot else 0)
+
+        try:
+            return finish_output(wav_file, output_file, format, speed, variants)
+        except BaseException:
+            # The runner only discards attempts that succeeded too late
+            discard_output(output_file, variants)
+            raise
+    finally:
+        scratch.release(wav_file)
+
+
+def piper_command(piper_cmd, model_path, config_path, speed):
+    """Piper command line for a voice and speed, without output options."""
+    cmd = [piper_cmd, '--model', str(model_path)]
+
+    if config_path:
+        cmd.extend(['--config', str(config_path)])
+
+    if speed != 1.0:
+        # Piper uses length_scale (inverse of speed)
+        length_scale = 1.0 / speed
+        cmd.extend(['--length-scale', str(length_scale)])
+
+    return cmd
+
+
+def finish_output(wav_file, output_file, format, speed, variants=()):
+    """
+    Derive speed variants from a synthesized WAV and encode it if needed.
+
+    Args:
+        wav_file: WAV written by Piper in scratch storage (moved or released)
+        output_file: Audio file to produce
+        format: Output format (wav or mp3)
+        speed: Speed the WAV was synthesized at
+        variants: Extra speeds to time-stretch
+
+    Returns:
+        Path to the audio file
+    """
+    scratch = scratch_space()
+
+    # Derive speed variants from this rendering instead of synthesizing again
+    for variant in variants:
+        if format == 'wav':
+            stretch_wav(wav_file, variant_path(output_file, variant), variant / speed)
+        else:
+            stretched = scratch.path(variant_path(output_file, variant).with_suffix('.wav').name,
+                                     int(wav_file.stat().st_size * speed / variant))
+            try:
+                stretch_wav(wav_file, stretched, variant / speed)
+                convert_to_mp3(stretched, variant_path(output_file, variant))
+            finally:
+                scratch.release(stretched)
+
+    # Convert to MP3 if needed
+    if format == 'mp3':
+        convert_to_mp3(wav_file, output_file)
+        scratch.release(wav_file)
+        return output_file
+
+    return scratch.move_out(wav_file, output_file)
+
+
+def synthesize_batch(items, piper_cmd, model_path, config_path, format, speed,
+                     attempt=None, budget=None, variants=()):
+    """
+    Synthesize several short texts in one Piper run (--json-input).
+
+    Piper loads the voice once and writes one WAV per input line, so
+    small chapters do not each pay for a process start and model load.
+
+    Args:
+        items: List of (text, output_file)
+        piper_cmd, model_path, config_path, format, speed, attempt, budget,
+        variants: As for synthesize_file
+
+    Returns:
+        List of paths to the audio files
+    """
+    scratch = scratch_space()
+    wav_files = [scratch.path(f"{output_file.stem}.wav", expected_wav_bytes(text, speed))
+                 for text, output_file in items]
+    lines = "\n".join(json.dumps({'text': text, 'output_file': str(wav_file)}, ensure_ascii=False)
+                      for (text, _), wav_file in zip(items, wav_files))
+
+    slot = attempt.slot if attempt else None
+    started = time.monotonic()
+    try:
+        result = run_piper(
+            piper_command(piper_cmd, model_path, config_path, speed) + ['--json-input'],
+            lines + "\n",
+            env=budget.env_for(slot) if budget and slot else None,
+            preexec_fn=budget.preexec_for(slot) if budget and slot else None,
+            timeout=attempt.timeout if attempt else None,
+            cancel=attempt.cancelled if attempt else None
+        )
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr[:200])
+        missing = [output_file.name for wav_file, (_, output_file) in zip(wav_files, items)
+                   if not wav_file.exists()]
+        if missing:
+            raise RuntimeError(f"Piper wrote no audio for {', '.join(missing)}")
+
+        record_run(model_path.stem, sum(len(text) for text, _ in items),
+                   sum(wav_duration(wav_file) for wav_file in wav_files),
+                   time.monotonic() - started, speed, slot.threads if slot else 0)
+
+        try:
+            return [finish_output(wav_file, output_file, format, speed, variants)
+                    for wav_file, (_, output_file) in zip(wav_files, items)]
+        except BaseException:
+            # The runner only discards attempts that succeeded too late
+            for _, output_file in items:
+                discard_output(output_file, variants)
+            raise
+    finally:
+        for wav_file in wav_files:
+            scratch.release(wav_file)
+
+
+def attempt_path(output_file, attempt):
+    """Hidden file an attempt writes before it is renamed to output_file."""
+    return output_file.with_name(f".{output_file.stem}.{attempt.tag}{output_file.suffix}")
+
+
+def commit_output(path, output_file, variants=()):
+    """Rename an attempt's file and its speed variants into place."""
+    for variant in variants:
+        variant_path(path, variant).replace(variant_path(output_file, variant))
+    return path.replace(output_file)
+
+
+def discard_output(path, variants=()):
+    """Remove the files of an attempt that lost the race."""
+    for variant in variants:
+        variant_path(path, variant).unlink(missing_ok=True)
+    path.unlink(missing_ok=True)
+
+
+def make_job(text, output_file, piper_cmd, model_path, config_path, format, speed, budget,
+             voice=None, variants=()):
+    """
+    Build a deadline-aware synthesis job for one output file.
+
+    Each attempt writes to its own hidden file next to the output; the
+    winning attempt is renamed into place, along with its speed variants.
+    """
+    def run(attempt):
+        return synthesize_file(text, attempt_path(output_file, attempt), piper_cmd, model_path, config_path,
+                               format, speed, attempt, budget, voice, variants)
+
+    def commit(path):
+        return commit_output(path, output_file, variants)
+
+    def discard(path):
+        discard_output(path, variants)
+
+    job = Job(
+        key=output_file.name,
+        run=run,
+        expected_seconds=expected_synthesis_seconds(text, speed),
+        timeout=deadline_for(text, speed),
+        commit=commit,
+        discard=discard
+    )
+    job.inputs = inputs_digest(text, model_path.stem, format, speed, list(variants))
+    return job
+
+
+def make_jobs(text, output_file, piper_cmd, model_path, config_path, format, speed, budget,
+              voice=None, variants=()):
+    """
+    Build the synthesis jobs for one output, one per part.
+
+    Text whose audio would exceed AUDIO_PART_SECONDS / AUDIO_PART_MB (or
+    the 4 GB WAV limit) is cut at sentence ends into <stem>_part001, ...
+    files; each part is a job of its own and is final as soon as it is done.
+    """
+    # Piper writes plain WAV, so its 4 GB limit applies whatever AUDIO_CONTAINER says
+    texts = split_text_into_parts(text, speed, container="wav")
+    if len(texts) == 1:
+        return [make_job(text, output_file, piper_cmd, model_path, config_path,
+                         format, speed, budget, voice, variants)]
+    return [make_job(part_text, part_path(output_file, number), piper_cmd, model_path,
+                     config_path, format, speed, budget, voice, variants)
+            for number, part_text in enumerate(texts, 1)]
+
+
+def make_batch_job(items, piper_cmd, model_path, config_path, format, speed, budget,
+                   variants=()):
+    """
+    Build one job synthesizing several short outputs in a single Piper run.
+
+    Each output is also a member job, the same as make_job would build
+    for it alone: journals record and skip members one by one (see
+    lib.job_journal), and the batch runs whichever members are left.
+
+    Args:
+        items: List of (text, output_file)
+
+    Returns:
+        Job whose result is the list of output files
+    """
+    texts = {}
+    members = []
+    for text, output_file in items:
+        member = make_job(text, output_file, piper_cmd, model_path, config_path,
+                          format, speed, budget, variants=variants)
+        member.sources = [output_file]
+        texts[member.key] = text
+        members.append(member)
+
+    def run(attempt):
+        return synthesize_batch([(texts[member.key], attempt_path(member.sources[0], attempt))
+                                 for member in job.members],
+                                piper_cmd, model_path, config_path, format, speed,
+                                attempt, budget, variants)
+
+    def commit(paths):
+        return [member.commit(path) for member, path in zip(job.members, paths)]
+
+    def discard(paths):
+        for path in paths:
+            discard_output(path, variants)
+
+    text = " ".join(text for text, _ in items)
+    job = Job(
+        key=f"{items[0][1].name} (+{len(items) - 1} batched)",
+        run=run,
+        expected_seconds=expected_synthesis_seconds(text, speed),
+        timeout=deadline_for(text, speed),
+        commit=commit,
+        discard=discard
+    )
+    job.members = members
+    return job
+
+
+def plan_jobs(items, piper_cmd, model_path, config_path, format, speed, budget,
+              voice=None, variants=(), batch_chars=None):
+    """
+    Build the synthesis jobs for many outputs, batching the small ones.
+
+    Outputs with less than batch_chars characters of text are grouped
+    into single Piper runs, sized so that every worker still gets a group;
+    each output file is the same as with a job of its own. Every job's
+    `sources` lists the requested output files it produces.
+
+    Args:
+        items: List of (text, output_file)
+        piper_cmd, model_path, config_path, format, speed, budget, voice,
+        variants: As for make_jobs
+        batch_chars: Batching threshold (default: BATCH_SMALL_CHARS, 0 = off)
+
+    Returns:
+        List of jobs
+    """
+    batch_chars = settings.BATCH_SMALL_CHARS if batch_chars is None else batch_chars
+    small = []
+    # Forked shared-voice workers have no process start or model load to save
+    if voice is None and batch_chars > 0:
+        small = [index for index, (text, _) in enumerate(items) if len(text) < batch_chars]
+    if len(small) < 2:
+        small = []
+
+    groups = []
+    if small:
+        total = sum(len(items[index][0]) for index in small)
+        # One group per worker at least, so batching never leaves a worker idle
+        limit = min(settings.BATCH_MAX_CHARS, -(-total // budget.workers))
+        size = 0
+        for index in small:
+            text = items[index][0]
+            if not groups or size + len(text) > limit:
+                groups.append([])
+                size = 0
+            groups[-1].append(items[index])
+            size += len(text)
+
+    jobs = []
+    for group in groups:
+        if len(group) > 1:
+            built = [make_batch_job(group, piper_cmd, model_path, config_path, format, speed,
+                                    budget, variants)]
+        else:
+            built = make_jobs(group[0][0], group[0][1], piper_cmd, model_path, config_path,
+                              format, speed, budget, voice, variants)
+        for job in built:
+            job.sources = [output_file for _, output_file in group]
+        jobs.extend(built)
+
+    batched = set(small)
+    for index, (text, output_file) in enumerate(items):
+        if index in batched:
+            continue
+        for job in make_jobs(text, output_file, piper_cmd, model_path, config_path,
+                             format, speed, budget, voice, variants):
+            job.sources = [output_file]
+            jobs.append(job)
+    return jobs
+
+
+def output_files(value, variants=()):
+    """Files a job's result stands for: its outputs and their speed variants."""
+    paths = value if isinstance(value, list) else [value]
+    return [file for path in paths
+            for file in [path] + [variant_path(path, variant) for variant in variants]]
+
+
+def resume_jobs(jobs, journal_paths, resume=False, variants=()):
+    """
+    Record jobs in per-book journals and, when resuming, skip finished ones.
+
+    A job is skipped only if its inputs are unchanged and every file it
+    produced is still there with its recorded checksum; missing or
+    corrupt outputs are synthesized again.
+
+    Args:
+        jobs: Jobs from plan_jobs
+        journal_paths: Journal file of each requested output file
+        resume: Skip the jobs already done
+        variants: Speed variants of each output
+
+    Returns:
+        (jobs to run, names of the files already done)
+    """
+    if not (settings.JOB_JOURNAL or resume):
+        return jobs, []
+    journals = {path: JobJournal(path) for path in set(journal_paths.values())}
+    to_run, skipped = journal_jobs(
+        jobs,
+        lambda job: list(dict.fromkeys(journals[journal_paths[source]] for source in job.sources)),
+        resume,
+        files=lambda value: output_files(value, variants)
+    )
+    stretched = {variant_path(path, variant) for paths in skipped.values() for path in paths
+                 for variant in variants}
+    done = [path.name for paths in skipped.values() for path in paths if path not in stretched]
+    if resume:
+        console.print(f"[cyan]⏭️  Resuming: {len(skipped)} file(s) already done, "
+                      f"{len(to_run)} job(s) to run[/cyan]")
+    return to_run, done
+
+
+def load_shared_voice(model_path, config_path):
+    """Load a voice once for forked workers (see lib.voice_models), or exit."""
+    try:
+        voice = SharedVoice(model_path, config_path)
+    except RuntimeError as e:
+        console.print(f"[red]❌ {e}[/red]")
+        sys.exit(1)
+    console.print("[green]✅ Voice model loaded once, shared by forked workers[/green]")
+    if voice.phonemes is not None:
+        console.print(f"Phoneme cache: {len(voice.phonemes)} sentence(s) in {voice.phonemes.path}")
+    return voice
+
+
+def print_memory_report(sampler, budget):
+    """Print the peak unique and shared memory of each worker process."""
+    workers = sampler.workers()
+    if not workers:
+        console.print("[yellow]No worker memory sampled (runs too short?)[/yellow]")
+        return
+
+    table = Table(title="Worker memory (peak)")
+    table.add_column("PID", justify="right", style="cyan")
+    table.add_column("Process")
+    table.add_column("Unique (MB)", justify="right", style="yellow")
+    table.add_column("Shared (MB)", justify="right", style="green")
+    table.add_column("PSS (MB)", justify="right")
+    for memory in workers[:10]:
+        table.add_row(str(memory.pid), memory.name, f"{memory.unique / MB:.0f}",
+                      f"{memory.shared / MB:.0f}", f"{memory.pss / MB:.0f}")
+    console.print(table)
+
+    fit = sampler.workers_that_fit()
+    console.print(f"Memory would fit about [bold]{fit}[/bold] workers "
+                  f"(running {budget.workers}, {len(budget.slots)} slot(s))")
+
+
+def job_outputs(result):
+    """Files produced by a successful job (batch jobs produce several)."""
+    return result.value if isinstance(result.value, list) else [result.value]
+
+
+def run_jobs(jobs, budget, max_retries, speculative, output_path,
+             successful=None, failed=None, memory_report=False):
+    """
+    Run synthesis jobs with progress reporting and print the summary.
+
+    Args:
+        jobs: Jobs built with make_jobs or plan_jobs
+        budget: ThreadBudget for the workers
+        max_retries: Retries per job (None = settings)
+        speculative: Duplicate stragglers (None = settings)
+        output_path: Output directory shown in the summary
+        successful: List extended with produced file names
+        failed: List extended with failed job keys
+        memory_report: Sample worker memory and print unique vs shared use
+
+    Returns:
+        Mapping of job key to JobResult
+    """
+    successful = [] if successful is None else successful
+    failed = [] if failed is None else failed
+
+    with Progress(console=console) as progress:
+        task = progress.add_task("Converting...", total=len(jobs))
+        
+        def report(result):
+            progress.update(task, advance=1)
+            if not result.ok:
+                console.print(f"[red]❌ Failed: {result.key} after {result.attempts} attempt(s)[/red]")
+                console.print(f"   Error: {result.error}")
+                return
+            note = " (speculative copy won)" if result.speculative_win else ""
+            for path in job_outputs(result):
+                size_mb = path.stat().st_size / (1024 * 1024)
+                console.print(f"[green]✅ {path.name} ({size_mb:.1f} MB){note}[/green]")
+        
+        runner = JobRunner(budget=budget, max_retries=max_retries,
+                           speculative=speculative, on_complete=report)
+        sampler = MemorySampler()
+        if memory_report:
+            with sampler:
+                results = runner.run(jobs)
+        else:
+            results = runner.run(jobs)
+    
+    record_failures(jobs, results)
+    for result in results.values():
+        if result.ok:
+            successful.extend(path.name for path in job_outputs(result))
+        else:
+            failed.append(result.key)
+    
+    # Summary
+    console.print("\n[bold]Summary:[/bold]")
+    console.print(f"✅ Successful: {len(successful)}")
+    console.print(f"❌ Failed: {len(failed)}")
+    console.print(f"⏱️  Latency per file: {runner.latency_stats().summary()}")
+    retried = sum(1 for result in results.values() if result.attempts > 1)
+    if retried:
+        console.print(f"🔁 Retried or duplicated: {retried}")
+    console.print(f"💾 Scratch: {scratch_space().summary()}")
+    
+    if memory_report:
+        print_memory_report(sampler, budget)
+    
+    if successful:
+        console.print(f"\n[green]Audio files in {output_path}:[/green]")
+        for name in successful[:5]:
+            console.print(f"  • {name}")
+        if len(successful) > 5:
+            console.print(f"  ... and {len(successful) - 5} more")
+    
+    return results
+
+
+def enqueue_files(queue_dir, epub_files, output_path, voice, format, speed, variants=()):
+    """
+    Coordinator: add one job per EPUB file to a shared work queue.
+
+    Args:
+        queue_dir: Shared queue directory
+        epub_files: EPUB files (on storage every worker can reach)
+        output_path: Output directory (shared as well)
+        voice: Voice name or model path, resolved on each worker
+        format: Output format
+        speed: Speech speed
+        variants: Extra speeds to time-stretch from each rendering
+
+    Returns:
+        The WorkQueue
+    """
+    work_queue = WorkQueue(queue_dir)
+    if Path(voice).exists():
+        voice = str(Path(voice).resolve())
+    added = 0
+    for epub_file in epub_files:
+        epub_path = Path(epub_file).resolve()
+        job_id = re.sub(r'[^\w.-]+', '_', epub_path.stem)
+        added += work_queue.enqueue(job_id, {
+            'epub': str(epub_path),
+            'output': str((output_path / f"{epub_path.stem}.{format}").resolve()),
+            'voice': voice,
+            'format': format,
+            'speed': speed,
+            'variants': list(variants),
+        })
+    console.print(f"[green]✅ Enqueued {added} job(s) in {queue_dir} "
+                  f"({len(epub_files) - added} already queued or done)[/green]")
+    return work_queue
+
+
+def wait_for_queue(work_queue):
+    """Coordinator: show progress until every job is done or failed."""
+    with Progress(console=console) as progress:
+        counts = work_queue.counts()
+        task = progress.add_task("Rendering on workers...", total=sum(counts.values()))
+        while True:
+            work_queue.reclaim_expired()
+            counts = work_queue.counts()
+            progress.update(task, completed=counts['done'] + counts['failed'],
+                            description=f"Rendering on workers ({counts['claimed']} running)...")
+            if work_queue.is_drained():
+                break
+            time.sleep(settings.QUEUE_POLL_SECONDS)
+
+    console.print("\n[bold]Summary:[/bold]")
+    console.print(f"✅ Done: {counts['done']}")
+    console.print(f"❌ Failed: {counts['failed']}")
+
+
+def run_queue_workers(queue_dir, budget, wait):
+    """
+    Worker: claim jobs from a shared queue, one claim loop per worker slot.
+
+    Args:
+        queue_dir: Shared queue directory
+        budget: ThreadBudget for this node
+        wait: Keep polling for new jobs once the queue is drained
+    """
+    piper_cmd = find_piper()
+    work_queue = WorkQueue(queue_dir)
+    voices = {}
+    voices_lock = threading.Lock()
+
+    def resolve_voice(voice):
+        with voices_lock:
+            if voice not in voices:
+                try:
+                    voices[voice] = find_voice(voice)
+                except SystemExit:
+                    raise RuntimeError(f"Voice not available on this node: {voice}")
+            return voices[voice]
+
+    def make_handler(slot):
+        def handler(payload, lease_lost):
+            model_path, config_path = resolve_voice(payload['voice'])
+            text = prepare_text(Path(payload['epub']))
+            if not text:
+                return {'empty': True}
+            output_file = Path(payload['output'])
+            output_file.parent.mkdir(parents=True, exist_ok=True)
+            outputs = []
+            for job in make_jobs(text, output_file, piper_cmd, model_path, config_path,
+                                 payload['format'], payload['speed'], budget,
+                                 variants=payload.get('variants', ())):
+                # Losing the lease cancels Piper, the job is rerun elsewhere
+                attempt = Attempt(job, 1, slot)
+                attempt.cancelled = lease_lost
+                outputs.append(job.commit(job.run(attempt)))
+            return {'output': str(outputs[0]), 'parts': [str(path) for path in outputs],
+                    'bytes': sum(path.stat().st_size for path in outputs)}
+        return handler
+
+    def report(event, job, detail):
+        name = Path(job.payload['epub']).name
+        if event == 'done':
+            console.print(f"[green]✅ {name}[/green]")
+        elif event == 'failed':
+            console.print(f"[red]❌ {name}: {detail}[/red]")
+        else:
+            console.print(f"[yellow]⚠️  Lease lost on {name}, left to another worker[/yellow]")
+
+    console.print(f"[bold blue]Worker on {queue_dir}[/bold blue] ({budget.describe()})")
+    threads = [
+        threading.Thread(target=run_worker,
+                         args=(work_queue, make_handler(slot)),
+                         kwargs={'wait': wait, 'on_event': report})
+        for slot in budget.slots
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    counts = work_queue.counts()
+    console.print(f"\n[bold]Queue:[/bold] {counts['done']} done, {counts['failed']} failed, "
+                  f"{counts['pending']} pending, {counts['claimed']} running")
+
+
 @click.command()
-@click.argument('epub_files', nargs=-1, type=click.Path(exists=True), required=True)
+@click.argument('epub_files', nargs=-1, type=click.Path(exists=True))
 @click.option('--voice', '-v', default='upmc', 
               help='Voice: upmc, siwis, tom, gilles, mls (default: upmc)')
 @click.option('--output-dir', '-o', type=click.Path(),
@@ -87,9 +810,57 @@ def find_voice(voice_name):
               help='Output format (default: wav)')
 @click.option('--speed', '-s', type=float, default=1.0,
               help='Speech speed (0.5-2.0, default: 1.0)')
-def convert_epub_to_audio(epub_files, voice, output_dir, format, speed):
+@click.option('--workers', '-w', type=int, default=0,
+              help='Parallel Piper workers (default: derived from CPU budget)')
+@click.option('--threads', '-t', type=int, default=None,
+              help='Threads per worker (default: THREADS_PER_WORKER or derived)')
+@click.option('--max-retries', type=int, default=None,
+              help='Retries per file after a failure or timeout (default: TTS_MAX_RETRIES)')
+@click.option('--speculative/--no-speculative', default=None,
+              help='Duplicate the slowest files at the end of the batch (default: SPECULATIVE_RETRY)')
+@click.option('--queue', 'queue_dir', type=click.Path(file_okay=False),
+              help='Distributed mode: enqueue EPUB_FILES in this shared directory')
+@click.option('--worker', 'worker_dir', type=click.Path(file_okay=False),
+              help='Distributed mode: render jobs from this shared queue directory')
+@click.option('--wait', is_flag=True,
+              help='With --queue: wait for workers to finish; with --worker: keep polling')
+@click.option('--shared-voice/--no-shared-voice', default=None,
+              help='Load the voice once and fork workers sharing it (default: SHARED_VOICE)')
+@click.option('--memory-report', is_flag=True,
+              help='Report unique vs shared memory per worker after the run')
+@click.option('--variants', default=None,
+              help='Extra speeds time-stretched from one synthesis, e.g. "1.25,1.5" '
+                   '(default: SPEED_VARIANTS)')
+@click.option('--batch-chars', type=int, default=None,
+              help='Synthesize files shorter than this in shared Piper runs '
+                   '(default: BATCH_SMALL_CHARS, 0 = off)')
+@click.option('--resume', is_flag=True,
+              help='Skip files already done by a previous (interrupted) run, per the '
+                   'book journals; missing or corrupt files are synthesized again')
+def convert_epub_to_audio(epub_files, voice, output_dir, format, speed, workers, threads,
+                          max_retries, speculative, queue_dir, worker_dir, wait,
+                          shared_voice, memory_report, variants, batch_chars, resume):
     """Convert EPUB files to audio using Piper TTS."""
     
+    if worker_dir:
+        run_queue_workers(worker_dir, ThreadBudget(workers=workers, threads_per_worker=threads),
+                          wait)
+        return
+    
+    if not epub_files:
+        raise click.UsageError("Missing argument 'EPUB_FILES...'")
+    
+    variants = [v for v in parse_speeds(settings.SPEED_VARIANTS if variants is None else variants)
+                if v != speed]
+    
+    if queue_dir:
+        output_path = Path(output_dir) if output_dir else Path("output/audio")
+        work_queue = enqueue_files(queue_dir, epub_files, output_path, voice, format, speed,
+                                   variants)
+        if wait:
+            wait_for_queue(work_queue)
+        return
+    
     # Find Piper
     piper_cmd = find_piper()
     console.print(f"[green]✅ Using Piper: {piper_cmd}[/green]")
@@ -102,98 +873,56 @@ def convert_epub_to_audio(epub_files, voice, output_dir, format, speed):
     output_path = Path(output_dir) if output_dir else Path("output/audio")
     output_path.mkdir(parents=True, exist_ok=True)
     
+    shared_voice = settings.SHARED_VOICE if shared_voice is None else shared_voice
+    voice_model = load_shared_voice(model_path, config_path) if shared_voice else None
+    
+    # Plan worker/thread split, never more workers than files
+    budget = ThreadBudget(workers=workers, threads_per_worker=threads)
+    if budget.workers > len(epub_files):
+        budget = ThreadBudget(workers=len(epub_files), threads_per_worker=threads)
+    
     console.print(f"\n[bold blue]Converting {len(epub_files)} EPUB files[/bold blue]")
-    console.print(f"Output: {output_path}\n")
+    console.print(f"Output: {output_path}")
+    console.print(f"Workers: {budget.describe()}")
+    if variants:
+        console.print(f"Speed variants: {', '.join(f'{v:g}x' for v in variants)} (time-stretched)")
+    console.print()
     
     successful = []
     failed = []
+    items = []
+    journal_paths = {}
+    books = {}
     
-    for epub_file in track(epub_files, description="Converting..."):
+    for epub_file in track(epub_files, description="Extracting text..."):
         epub_path = Path(epub_file)
         
         try:
-            # Extract text from EPUB
-            processor = EPUBProcessor(epub_path)
-            text = processor.extract_full_text(skip_metadata=True)
-            
-            if not text.strip():
-                console.print(f"[yellow]⚠️  No text in {epub_path.name}[/yellow]")
-                continue
-            
-            # Clean text for TTS
-            cleaner = TextCleaner()
-            text = cleaner.clean_text_for_tts(text)
-            
-            # Prepare output filename
-            output_file = output_path / f"{epub_path.stem}.{format}"
-            
-            # Create temp text file
-            temp_text = Path(f"/tmp/{epub_path.stem}.txt")
-            temp_text.write_text(text, encoding='utf-8')
-            
-            # Prepare Piper command
-            cmd = [piper_cmd, '--model', str(model_path)]
-            
-            if config_path:
-                cmd.extend(['--config', str(config_path)])
-            
-            if speed != 1.0:
-                # Piper uses length_scale (inverse of speed)
-                length_scale = 1.0 / speed
-                cmd.extend(['--length-scale', str(length_scale)])
-            
-            # Output format
-            if format == 'wav':
-                cmd.extend(['--output_file', str(output_file)])
-            else:
-                # Output to WAV first, then convert
-                temp_wav = Path(f"/tmp/{epub_path.stem}.wav")
-                cmd.extend(['--output_file', str(temp_wav)])
-            
-            # Run Piper
-            with open(temp_text, 'r') as stdin:
-                result = subprocess.run(cmd, stdin=stdin, capture_output=True, text=True)
-            
-            if result.returncode != 0:
-                console.print(f"[red]❌ Failed: {epub_path.name}[/red]")
-                console.print(f"   Error: {result.stderr[:200]}")
-                failed.append(epub_path.name)
-                continue
-            
-            # Convert to MP3 if needed
-            if format == 'mp3':
-                temp_wav = Path(f"/tmp/{epub_path.stem}.wav")
-                subprocess.run([
-                    'ffmpeg', '-y', '-i', str(temp_wav),
-                    '-codec:a', 'libmp3lame', '-qscale:a', '2',
-                    str(output_file)
-                ], capture_output=True)
-                temp_wav.unlink()
-            
-            # Clean up temp file
-            temp_text.unlink(missing_ok=True)
-            
-            # Get file size
-            size_mb = output_file.stat().st_size / (1024 * 1024)
-            console.print(f"[green]✅ {output_file.name} ({size_mb:.1f} MB)[/green]")
-            successful.append(output_file.name)
-            
+            text = prepare_text(epub_path)
         except Exception as e:
             console.print(f"[red]❌ Error with {epub_path.name}: {e}[/red]")
             failed.append(epub_path.name)
+            continue
+        
+        if not text:
+            console.print(f"[yellow]⚠️  No text in {epub_path.name}[/yellow]")
+            continue
+        
+        output_file = output_path / f"{epub_path.stem}.{format}"
+        items.append((text, output_file))
+        # Chapters split by split_epub.py share their book's journal
+        if epub_path.parent not in books:
+            books[epub_path.parent] = split_sources(epub_path.parent)
+        book = books[epub_path.parent].get(epub_path.name, epub_path.stem)
+        journal_paths[output_file] = output_path / f".{book}.journal.json"
     
-    # Summary
-    console.print(f"\n[bold]Summary:[/bold]")
-    console.print(f"✅ Successful: {len(successful)}")
-    console.print(f"❌ Failed: {len(failed)}")
-    
-    if successful:
-        console.print(f"\n[green]Audio files in {output_path}:[/green]")
-        for name in successful[:5]:
-            console.print(f"  • {name}")
-        if len(successful) > 5:
-            console.print(f"  ... and {len(successful) - 5} more")
+    jobs = plan_jobs(items, piper_cmd, model_path, config_path, format, speed, budget,
+                     voice_model, variants, batch_chars)
+    jobs, done = resume_jobs(jobs, journal_paths, resume, variants)
+    successful.extend(done)
+    run_jobs(jobs, budget, max_retries, speculative, output_path, successful, failed,
+             memory_report)
 
 
 if __name__ == "__main__":
-    convert_epub_to_audio()
\ No newline at end of file
+    convert_epub_to_audio()
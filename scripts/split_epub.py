@@ -2,6 +2,7 @@
 """Script to split EPUB files into individual chapters."""
 
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 # Add parent directory to path for imports
@@ -12,93 +13,215 @@ from rich.console import Console
 from rich.table import Table
 
 from lib.epub_utils import EPUBProcessor
+from lib.epub_manifest import EPUBManifest
+from lib.chapter_classifier import get_classifier
+from lib.render_estimate import RenderEstimator, load_history
+from lib.cpu_budget import ThreadBudget
+from scripts.epub_to_audio import voice_key
 from config.settings import settings
 
 console = Console()
 
 
+def format_duration(seconds):
+    """Format seconds as 1h23m / 4m05s."""
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m" if hours else f"{minutes}m{secs:02d}s"
+
+
+def fast_preview(epub_path, voices, speed):
+    """
+    Preview chapters from the OPF/TOC only, with render estimates.
+
+    Args:
+        epub_path: EPUB file
+        voices: Voice names (short names, model names or paths) to estimate
+                render time for
+        speed: Speech speed
+    """
+    manifest = EPUBManifest(epub_path)
+    history = load_history()
+    workers = ThreadBudget().workers
+    default_estimator = RenderEstimator(settings.TTS_MODEL, history)
+    
+    table = Table(title=f"Chapter Preview (manifest) - {manifest.title or epub_path.name}")
+    table.add_column("Index", justify="right", style="cyan")
+    table.add_column("Title", style="magenta")
+    table.add_column("~Words", justify="right", style="green")
+    table.add_column("~Audio", justify="right", style="yellow")
+    table.add_column("Note", style="dim")
+    
+    classifier = get_classifier(manifest.language)
+    content_started = False
+    for entry in manifest.entries:
+        section = classifier.classify(entry.title)
+        if not content_started and section.content_start:
+            content_started = True
+        note = ""
+        if not content_started:
+            note = "before content"
+        elif section.skip_keywords:
+            note = "likely skipped"
+        elif entry.estimated_words < settings.MIN_CHAPTER_LENGTH:
+            note = "short"
+        
+        estimate = default_estimator.estimate(words=entry.estimated_words, speed=speed)
+        table.add_row(
+            str(entry.index + 1),
+            entry.title[:50] + "..." if len(entry.title) > 50 else entry.title,
+            f"{entry.estimated_words:,}",
+            format_duration(estimate.audio_seconds),
+            note
+        )
+    
+    console.print(table)
+    console.print(f"\n[bold]Total:[/bold] {len(manifest.entries)} documents, "
+                  f"~{manifest.estimated_words:,} words (estimated from sizes)")
+    
+    estimates = Table(title=f"Render estimate ({workers} worker(s), speed {speed})")
+    estimates.add_column("Voice", style="cyan")
+    estimates.add_column("Audio", justify="right")
+    estimates.add_column("WAV", justify="right")
+    estimates.add_column("MP3", justify="right")
+    estimates.add_column("Render time", justify="right", style="yellow")
+    estimates.add_column("Based on", style="dim")
+    
+    for voice in voices or sorted(history) or [settings.TTS_MODEL]:
+        # History is recorded under the model name (see record_run)
+        key = voice_key(voice)
+        if voices and key not in history:
+            console.print(f"[yellow]No render history for {voice} ({key}), "
+                          f"using default estimates[/yellow]")
+        estimator = RenderEstimator(key, history)
+        estimate = estimator.estimate(words=manifest.estimated_words, speed=speed,
+                                      workers=workers)
+        estimates.add_row(
+            voice if key == voice else f"{voice} ({key})",
+            format_duration(estimate.audio_seconds),
+            f"{estimate.size_bytes('wav') / 1024 ** 2:,.0f} MB",
+            f"{estimate.size_bytes('mp3') / 1024 ** 2:,.0f} MB",
+            format_duration(estimate.render_seconds),
+            f"{estimator.samples} run(s)" if estimator.samples else "defaults"
+        )
+    
+    console.print(estimates)
+
+
+def preview_chapters(processor):
+    """
+    Show chapter information without creating files.
+    
+    Args:
+        processor: EPUBProcessor of the book
+    """
+    chapters = processor.process()['chapters']
+    
+    # Create table
+    table = Table(title=f"Chapter Preview - {processor.epub_path.name}")
+    table.add_column("Index", justify="right", style="cyan")
+    table.add_column("Title", style="magenta")
+    table.add_column("Words", justify="right", style="green")
+    table.add_column("Est. Reading (min)", justify="right", style="yellow")
+    
+    from lib.text_cleaner import TextCleaner
+    cleaner = TextCleaner()
+    
+    total_words = 0
+    for idx, chapter in enumerate(chapters):
+        title = chapter['title']
+        word_count = chapter['words']
+        reading_time = cleaner.estimate_reading_time(chapter['text'])
+        total_words += word_count
+        
+        table.add_row(
+            str(idx + 1),
+            title[:50] + "..." if len(title) > 50 else title,
+            str(word_count),
+            f"{reading_time:.1f}"
+        )
+        
+    console.print(table)
+    console.print(f"\n[bold]Total:[/bold] {len(chapters)} chapters, {total_words:,} words")
+
+
 @click.command()
-@click.argument('epub_file', type=click.Path(exists=True))
+@click.argument('epub_files', nargs=-1, required=True, type=click.Path(exists=True))
 @click.option('--output-dir', '-o', type=click.Path(), 
               help='Output directory for split files')
 @click.option('--min-words', '-m', type=int, default=100,
               help='Minimum words per chapter (default: 100)')
 @click.option('--preview', '-p', is_flag=True,
               help='Preview chapters without creating files')
-def split_epub(epub_file, output_dir, min_words, preview):
+@click.option('--fast', is_flag=True,
+              help='Preview from the manifest only (no HTML parsing), with render estimates')
+@click.option('--voice', '-v', 'voices', multiple=True,
+              help='Voice to estimate render time for (repeatable, default: voices with history)')
+@click.option('--speed', '-s', type=float, default=1.0,
+              help='Speech speed used for estimates (default: 1.0)')
+@click.option('--workers', '-w', type=int, default=None,
+              help='Processes for HTML parsing and file writing (default: MAX_WORKERS, 1 = no pool)')
+def split_epub(epub_files, output_dir, min_words, preview, fast, voices, speed, workers):
     """
-    Split an EPUB file into individual chapter files.
+    Split EPUB files into individual chapter files.
     
-    EPUB_FILE: Path to the EPUB file to split
+    Chapters unchanged since a previous split are not rewritten.
+    
+    EPUB_FILES: Paths to the EPUB files to split
     """
     # Update settings
     settings.MIN_CHAPTER_LENGTH = min_words
     settings.ensure_directories()
     
-    epub_path = Path(epub_file)
+    epub_paths = [Path(f) for f in epub_files]
+    for epub_path in epub_paths:
+        if not epub_path.suffix.lower() == '.epub':
+            console.print(f"[red]Error: {epub_path.name} must be an EPUB![/red]")
+            sys.exit(1)
     
-    if not epub_path.exists():
-        console.print(f"[red]Error: File {epub_path} not found![/red]")
-        return
-        
-    if not epub_path.suffix.lower() == '.epub':
-        console.print(f"[red]Error: File must be an EPUB![/red]")
-        return
-        
-    console.print(f"[bold blue]Processing: {epub_path.name}[/bold blue]\n")
+    workers = settings.MAX_WORKERS if workers is None else workers
+    output_path = Path(output_dir) if output_dir else None
+    
+    # One pool writes the chapter files of every book
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 and not (preview or fast) else None
     
+    failed = 0
     try:
-        processor = EPUBProcessor(epub_path)
-        
-        if preview:
-            # Just show chapter information
-            chapters = processor.get_chapters()
-            
-            # Create table
-            table = Table(title="Chapter Preview")
-            table.add_column("Index", justify="right", style="cyan")
-            table.add_column("Title", style="magenta")
-            table.add_column("Words", justify="right", style="green")
-            table.add_column("Est. Reading (min)", justify="right", style="yellow")
+        for epub_path in epub_paths:
+            console.print(f"[bold blue]Processing: {epub_path.name}[/bold blue]\n")
             
-            from lib.text_cleaner import TextCleaner
-            cleaner = TextCleaner()
-            
-            total_words = 0
-            for idx, (chapter_id, title, content) in enumerate(chapters):
-                text = cleaner.extract_text_from_html(content)
-                word_count = len(text.split())
-                reading_time = cleaner.estimate_reading_time(text)
-                total_words += word_count
+            try:
+                if fast:
+                    fast_preview(epub_path, voices, speed)
+                    continue
                 
-                table.add_row(
-                    str(idx + 1),
-                    title[:50] + "..." if len(title) > 50 else title,
-                    str(word_count),
-                    f"{reading_time:.1f}"
-                )
+                processor = EPUBProcessor(epub_path, workers=workers)
                 
-            console.print(table)
-            console.print(f"\n[bold]Total:[/bold] {len(chapters)} chapters, {total_words:,} words")
-            
-        else:
-            # Actually split the file
-            output_path = Path(output_dir) if output_dir else None
-            created_files = processor.split_into_chapters(output_path)
-            
-            # Show summary
-            console.print("\n[bold green]Summary:[/bold green]")
-            for file_path in created_files:
-                size_kb = file_path.stat().st_size / 1024
-                console.print(f"  • {file_path.name} ({size_kb:.1f} KB)")
+                if preview:
+                    preview_chapters(processor)
+                    continue
+                
+                # Actually split the file
+                created_files = processor.split_into_chapters(output_path, executor=executor)
                 
-    except Exception as e:
-        console.print(f"[red]Error processing EPUB: {e}[/red]")
-        if settings.DEBUG_MODE:
-            console.print_exception()
-        return 1
+                # Show summary
+                console.print("\n[bold green]Summary:[/bold green]")
+                for file_path in created_files:
+                    size_kb = file_path.stat().st_size / 1024
+                    console.print(f"  • {file_path.name} ({size_kb:.1f} KB)")
+                    
+            except Exception as e:
+                failed += 1
+                console.print(f"[red]Error processing {epub_path.name}: {e}[/red]")
+                if settings.DEBUG_MODE:
+                    console.print_exception()
+    finally:
+        if executor is not None:
+            executor.shutdown()
         
-    return 0
+    # Click ignores return values: exit non-zero so scripts see failed books
+    if failed:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""Watch a folder and convert new or modified EPUB books to audio."""
+
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+import click
+from rich.console import Console
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.epub_utils import EPUBProcessor
+from lib.cpu_budget import ThreadBudget
+from lib.folder_watch import BookStatus, FolderWatcher
+from lib.time_stretch import parse_speeds
+from lib.work_queue import write_json_atomic
+from config.settings import settings
+from scripts.epub_to_audio import (chapter_text, find_piper, find_voice, load_shared_voice,
+                                   job_outputs, plan_jobs, run_jobs)
+
+console = Console()
+
+
+def audio_digest(text, model_path, format, speed, variants):
+    """Hash of everything a chapter's audio depends on."""
+    return hashlib.sha256(json.dumps(
+        [text, model_path.stem, format, speed, list(variants),
+         settings.AUDIO_PART_SECONDS, settings.AUDIO_PART_MB],
+        ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def convert_book(book, status, split_path, output_path, piper_cmd, model_path, config_path,
+                 format, speed, variants, budget, voice_model):
+    """
+    Split a book and synthesize its new or changed chapters.
+
+    Chapters whose text (and audio settings) are unchanged since the
+    previous conversion of this book are not synthesized again.
+
+    Args:
+        book: EPUB file
+        status: BookStatus of the book
+        split_path: Directory of the split chapter EPUBs
+        output_path: Audio directory
+        piper_cmd, model_path, config_path: Piper executable and voice
+        format, speed, variants: Audio format, speed and extra speeds
+        budget: ThreadBudget for synthesis
+        voice_model: SharedVoice, or None for the Piper CLI
+
+    Returns:
+        Names of the chapters that failed
+    """
+    status.update(state='splitting')
+    processor = EPUBProcessor(book)
+    chapters = processor.process()['chapters']
+    processor.split_into_chapters(split_path)
+
+    # Digests of the chapters already converted by a previous run
+    manifest_path = output_path / f".{book.stem}.audio.json"
+    try:
+        previous = json.loads(manifest_path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        previous = {}
+
+    current = {}
+    changed = []
+    for chapter in chapters:
+        text = chapter_text(chapter)
+        if not text:
+            continue
+        stem = processor.chapter_file_stem(chapter['id'], chapter['title'])
+        current[stem] = audio_digest(text, model_path, format, speed, variants)
+        if previous.get(stem) != current[stem]:
+            changed.append((text, output_path / f"{stem}.{format}"))
+
+    jobs = plan_jobs(changed, piper_cmd, model_path, config_path, format, speed, budget,
+                     voice_model, variants)
+    for job in jobs:
+        job.commit = counted(job.commit, status)
+    status.update(state='synthesizing', chapters=len(current), changed=len(changed),
+                  jobs=len(jobs))
+    console.print(f"[cyan]{book.name}: {len(changed)} of {len(current)} chapter(s) to synthesize[/cyan]")
+
+    results = run_jobs(jobs, budget, None, None, output_path) if jobs else {}
+
+    failed = sorted({source.stem for job in jobs if not results[job.key].ok
+                     for source in job.sources})
+    for stem in failed:
+        # Not recorded: synthesized again on the book's next change
+        current.pop(stem)
+    write_json_atomic(manifest_path, current)
+
+    status.update(outputs=sorted(str(path) for result in results.values() if result.ok
+                                 for path in job_outputs(result)),
+                  failed=failed)
+    return failed
+
+
+def counted(commit, status):
+    """Wrap a job's commit to count finished jobs in the book status."""
+    def wrapped(value):
+        result = commit(value)
+        status.advance()
+        return result
+    return wrapped
+
+
+@click.command()
+@click.argument('inbox', type=click.Path(exists=True, file_okay=False))
+@click.option('--voice', '-v', default='upmc',
+              help='Voice: upmc, siwis, tom, gilles, mls (default: upmc)')
+@click.option('--output-dir', '-o', type=click.Path(),
+              help='Audio directory (default: output/audio)')
+@click.option('--split-dir', type=click.Path(),
+              help='Split EPUB directory (default: output/split)')
+@click.option('--status-dir', type=click.Path(),
+              help='Status files directory (default: STATUS_DIR)')
+@click.option('--format', '-f', type=click.Choice(['wav', 'mp3']), default='wav',
+              help='Output format (default: wav)')
+@click.option('--speed', '-s', type=float, default=1.0,
+              help='Speech speed (0.5-2.0, default: 1.0)')
+@click.option('--variants', default=None,
+              help='Extra speeds time-stretched from one synthesis (default: SPEED_VARIANTS)')
+@click.option('--workers', '-w', type=int, default=0,
+              help='Parallel Piper processes (default: from CPU budget)')
+@click.option('--threads', '-t', type=int, default=None,
+              help='Threads per Piper process (default: split cores evenly)')
+@click.option('--shared-voice/--no-shared-voice', default=None,
+              help='Load the voice once and fork workers sharing it (default: SHARED_VOICE)')
+@click.option('--debounce', type=float, default=None,
+              help='Seconds a file must stay unchanged (default: WATCH_DEBOUNCE_SECONDS)')
+@click.option('--poll', type=float, default=None,
+              help='Seconds between folder rescans (default: WATCH_POLL_SECONDS)')
+@click.option('--no-inotify', is_flag=True,
+              help='Only poll, even on Linux')
+@click.option('--once', is_flag=True,
+              help='Convert the books currently in the folder, then exit')
+def watch_folder(inbox, voice, output_dir, split_dir, status_dir, format, speed, variants,
+                 workers, threads, shared_voice, debounce, poll, no_inotify, once):
+    """
+    Convert EPUB books dropped into INBOX, continuously.
+
+    Each new or modified book is split and only its changed chapters are
+    synthesized. Progress is written to <status-dir>/<book>.status.json.
+    """
+    piper_cmd = find_piper()
+    model_path, config_path = find_voice(voice)
+    console.print(f"[green]✅ Using voice: {model_path.stem}[/green]")
+
+    output_path = Path(output_dir) if output_dir else settings.AUDIO_OUTPUT_DIR
+    output_path.mkdir(parents=True, exist_ok=True)
+    split_path = Path(split_dir) if split_dir else settings.SPLIT_OUTPUT_DIR
+    status_path = Path(status_dir) if status_dir else settings.STATUS_DIR
+    variants = [v for v in parse_speeds(settings.SPEED_VARIANTS if variants is None else variants)
+                if v != speed]
+
+    shared_voice = settings.SHARED_VOICE if shared_voice is None else shared_voice
+    voice_model = load_shared_voice(model_path, config_path) if shared_voice else None
+    budget = ThreadBudget(workers=workers, threads_per_worker=threads)
+
+    watcher = FolderWatcher(inbox, state_path=status_path / ".watch_state.json",
+                            debounce=debounce, poll_interval=poll, use_inotify=not no_inotify)
+    console.print(f"\n[bold blue]Watching {inbox} ({watcher.mode}, "
+                  f"debounce {watcher.debounce:g}s)[/bold blue]")
+    console.print(f"Workers: {budget.describe()}\n")
+
+    try:
+        while True:
+            ready = watcher.scan()
+            if not ready:
+                if once and not watcher.pending():
+                    break
+                watcher.wait()
+                continue
+
+            for book in ready:
+                console.print(f"\n[bold blue]Processing: {book.name}[/bold blue]")
+                status = BookStatus(status_path, book)
+                try:
+                    failed = convert_book(book, status, split_path, output_path, piper_cmd,
+                                          model_path, config_path, format, speed, variants,
+                                          budget, voice_model)
+                    status.update(state='failed' if failed else 'done')
+                except Exception as e:
+                    console.print(f"[red]❌ Error with {book.name}: {e}[/red]")
+                    status.update(state='failed', error=str(e))
+                # Retried only once the file changes again
+                watcher.mark_processed(book)
+    except KeyboardInterrupt:
+        console.print("\n[yellow]Stopped watching[/yellow]")
+    finally:
+        watcher.close()
+
+
+if __name__ == "__main__":
+    watch_folder()
@@ -0,0 +1,25 @@
+"""Shared test fixtures."""
+
+import pytest
+from ebooklib import epub
+
+
+@pytest.fixture
+def sample_epub(tmp_path):
+    """Small EPUB with a nav document and three chapters."""
+    book = epub.EpubBook()
+    book.set_title("Livre")
+    book.set_language("fr")
+    chapters = []
+    for i in range(1, 4):
+        chapter = epub.EpubHtml(title=f"Chapitre {i}", file_name=f"text/c{i}.xhtml", lang="fr")
+        chapter.content = f"<h1>Chapitre {i}</h1><p>{'mot ' * 100 * i}</p>"
+        book.add_item(chapter)
+        chapters.append(chapter)
+    book.toc = tuple(epub.Link(c.file_name, c.title, c.file_name) for c in chapters)
+    book.spine = ["nav"] + chapters
+    book.add_item(epub.EpubNcx())
+    book.add_item(epub.EpubNav())
+    path = tmp_path / "livre.epub"
+    epub.write_epub(str(path), book, {})
+    return path
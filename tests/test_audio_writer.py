@@ -0,0 +1,99 @@
+"""Tests for part-split audio output."""
+
+import struct
+import wave
+
+import pytest
+
+from lib.audio_writer import PCMFileWriter, ShardedWavWriter, split_text_into_parts
+
+RATE = 8000
+
+
+def make_wav(path, seconds, value=1):
+    """Write a mono 16-bit WAV of a constant sample value."""
+    with wave.open(str(path), 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(RATE)
+        wav_file.writeframes(struct.pack('<h', value) * int(seconds * RATE))
+    return path
+
+
+def duration(path):
+    with wave.open(str(path), 'rb') as wav_file:
+        return wav_file.getnframes() / wav_file.getframerate()
+
+
+class TestShardedWavWriter:
+    """Test rollover and finalization of part files."""
+
+    def test_single_part_keeps_output_name(self, tmp_path):
+        """Test that output under the limits is one file with the plain name."""
+        segments = [make_wav(tmp_path / f"s{i}.wav", 2) for i in range(3)]
+        with ShardedWavWriter(tmp_path / "book.wav", max_seconds=0, max_bytes=0) as writer:
+            for segment in segments:
+                writer.add_wav(segment, pause_ms=500)
+
+        assert writer.parts == [tmp_path / "book.wav"]
+        assert duration(tmp_path / "book.wav") == pytest.approx(7.5)
+
+    def test_rollover_at_segment_boundaries(self, tmp_path):
+        """Test that parts roll over between segments and are reported in order."""
+        segments = [make_wav(tmp_path / f"s{i}.wav", 4, value=i + 1) for i in range(5)]
+        finished = []
+        with ShardedWavWriter(tmp_path / "book.wav", max_seconds=10, max_bytes=0,
+                              on_part=finished.append) as writer:
+            for segment in segments:
+                writer.add_wav(segment)
+                # A completed part is final before the next segment is written
+                assert all(path.exists() for path in finished)
+
+        assert [p.name for p in writer.parts] == ["book_part001.wav", "book_part002.wav",
+                                                  "book_part003.wav"]
+        assert finished == writer.parts
+        assert [duration(p) for p in writer.parts] == [8, 8, 4]
+        assert not list(tmp_path.glob(".*partial"))
+
+        with wave.open(str(writer.parts[1]), 'rb') as wav_file:
+            first, = struct.unpack('<h', wav_file.readframes(1))
+        assert first == 3  # Segment 3 starts part 2, it was not cut
+
+    def test_oversized_segment_is_cut(self, tmp_path):
+        """Test that a segment longer than a part is split across parts."""
+        segment = make_wav(tmp_path / "long.wav", 25)
+        with ShardedWavWriter(tmp_path / "book.wav", max_seconds=10, max_bytes=0) as writer:
+            writer.add_wav(segment)
+
+        assert [duration(p) for p in writer.parts] == [10, 10, 5]
+
+    def test_rf64_header(self, tmp_path):
+        """Test that RF64 output records its sizes in the ds64 chunk."""
+        writer = PCMFileWriter(tmp_path / "book.wav", RATE, container="rf64")
+        writer.write(b'\x01\x00' * RATE)
+        writer.close()
+
+        data = (tmp_path / "book.wav").read_bytes()
+        assert data[:4] == b'RF64' and data[12:16] == b'ds64'
+        riff_size, data_size, frames = struct.unpack('<QQQ', data[20:44])
+        assert data_size == 2 * RATE and frames == RATE
+        assert riff_size == len(data) - 8
+
+
+class TestSplitTextIntoParts:
+    """Test text planning for part-sized synthesis jobs."""
+
+    def test_cuts_at_sentence_ends(self):
+        """Test that parts are whole sentences under the estimated limit."""
+        sentence = "Une phrase de longueur moyenne pour le test. "
+        text = (sentence * 200).strip()
+        parts = split_text_into_parts(text, max_seconds=60, max_bytes=0, container="rf64")
+
+        assert len(parts) > 1
+        assert all(part.endswith(".") for part in parts)
+        assert " ".join(parts) == text
+
+    def test_no_limit(self):
+        """Test that text is left whole without limits."""
+        assert split_text_into_parts("Court. Texte.", max_seconds=0, max_bytes=0,
+                                     container="rf64") == ["Court. Texte."]
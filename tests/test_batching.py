@@ -0,0 +1,129 @@
+"""Tests for batching small synthesis jobs into shared Piper runs."""
+
+import stat
+import sys
+
+import pytest
+
+from config.settings import settings
+from lib.cpu_budget import ThreadBudget
+from lib.job_runner import JobRunner
+from lib.time_stretch import stretch_wav
+from scripts.epub_to_audio import job_outputs, plan_jobs, resume_jobs
+
+# Stand-in for Piper: one WAV per utterance, its length depends on the text
+FAKE_PIPER = '''#!{python}
+import json, sys, wave
+args = sys.argv[1:]
+def write(path, text):
+    with wave.open(path, 'wb') as w:
+        w.setnchannels(1); w.setsampwidth(2); w.setframerate(16000)
+        w.writeframes(text.encode('utf-8').ljust(len(text) * 200, b'\\0'))
+runs = open({log!r}, 'a')
+runs.write(' '.join(args) + '\\n')
+text = sys.stdin.read()
+if '--json-input' in args:
+    for line in text.splitlines():
+        item = json.loads(line)
+        write(item['output_file'], item['text'])
+else:
+    write(args[args.index('--output_file') + 1], text)
+'''
+
+
+@pytest.fixture
+def piper(tmp_path, monkeypatch):
+    """Fake Piper executable and the log of its runs."""
+    monkeypatch.setattr(settings, "THROUGHPUT_HISTORY", tmp_path / "throughput.json")
+    log = tmp_path / "runs.log"
+    log.touch()
+    path = tmp_path / "piper"
+    path.write_text(FAKE_PIPER.format(python=sys.executable, log=str(log)))
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return path, log
+
+
+def run(items, piper_cmd, tmp_path, workers=1, batch_chars=None, journal=None, resume=False):
+    """Plan and run jobs (journaled in `journal` if given), return (jobs, produced files)."""
+    budget = ThreadBudget(workers=workers, threads_per_worker=1)
+    jobs = plan_jobs(items, str(piper_cmd), tmp_path / "voice.onnx", None, 'wav', 1.0, budget,
+                     batch_chars=batch_chars)
+    if journal is not None:
+        jobs, _ = resume_jobs(jobs, {output: journal for _, output in items}, resume)
+    results = JobRunner(workers=workers, speculative=False).run(jobs)
+    assert all(result.ok for result in results.values())
+    return jobs, [path for result in results.values() for path in job_outputs(result)]
+
+
+class TestPlanJobs:
+    """Test grouping of small outputs and routing of their audio."""
+
+    def test_small_outputs_share_one_run(self, tmp_path, piper):
+        """Test that short texts are synthesized together into the same files."""
+        piper_cmd, log = piper
+        items = [(f"Poème numéro {i}.", tmp_path / "batched" / f"poeme{i}.wav") for i in range(6)]
+        items.append(("Un long chapitre. " * 200, tmp_path / "batched" / "long.wav"))
+        (tmp_path / "batched").mkdir()
+
+        jobs, outputs = run(items, piper_cmd, tmp_path, batch_chars=1000)
+
+        assert len(jobs) == 2
+        assert sorted(outputs) == sorted(output for _, output in items)
+        assert sum('--json-input' in line for line in log.read_text().splitlines()) == 1
+        assert not list((tmp_path / "batched").glob(".*"))
+
+        # Same audio as one Piper run per file
+        (tmp_path / "single").mkdir()
+        run([(text, tmp_path / "single" / output.name) for text, output in items],
+            piper_cmd, tmp_path, batch_chars=0)
+        for _, output in items:
+            assert output.read_bytes() == (tmp_path / "single" / output.name).read_bytes()
+
+    def test_groups_keep_workers_busy(self, tmp_path, piper):
+        """Test that small outputs are split into at least one group per worker."""
+        piper_cmd, _ = piper
+        items = [("Lettre. " * 20, tmp_path / f"lettre{i}.wav") for i in range(12)]
+
+        jobs, outputs = run(items, piper_cmd, tmp_path, workers=3, batch_chars=1000)
+
+        assert len(jobs) >= 3
+        assert sorted(source for job in jobs for source in job.sources) == sorted(outputs)
+
+    def test_resume_does_not_depend_on_grouping(self, tmp_path, piper):
+        """Test that batched outputs are journaled per file, whatever the worker count."""
+        piper_cmd, log = piper
+        items = [("Lettre. " * 20, tmp_path / f"lettre{i}.wav") for i in range(12)]
+        journal = tmp_path / ".recueil.journal.json"
+        run(items, piper_cmd, tmp_path, workers=2, batch_chars=1000, journal=journal)
+
+        # Lose two outputs, then resume with another grouping
+        items[3][1].unlink()
+        items[7][1].unlink()
+        log.write_text("")
+        jobs, outputs = run(items, piper_cmd, tmp_path, workers=3, batch_chars=1000,
+                            journal=journal, resume=True)
+
+        assert sorted(outputs) == sorted([items[3][1], items[7][1]])
+        assert len(log.read_text().splitlines()) == len(jobs) <= 2
+
+    @pytest.mark.parametrize("batch_chars", [0, 1000])
+    def test_failed_variants_leave_no_files(self, tmp_path, piper, monkeypatch, batch_chars):
+        """Test that an attempt failing while stretching variants removes its files."""
+        piper_cmd, _ = piper
+        out = tmp_path / "out"
+        out.mkdir()
+        items = [(f"Poème numéro {i}.", out / f"poeme{i}.wav") for i in range(3)]
+
+        def fail_second(source, destination, ratio):
+            if "x1.5" in destination.name:
+                raise RuntimeError("stretch failed")
+            return stretch_wav(source, destination, ratio)
+        monkeypatch.setattr("scripts.epub_to_audio.stretch_wav", fail_second)
+
+        budget = ThreadBudget(workers=1, threads_per_worker=1)
+        jobs = plan_jobs(items, str(piper_cmd), tmp_path / "voice.onnx", None, 'wav', 1.0,
+                         budget, variants=(1.25, 1.5), batch_chars=batch_chars)
+        results = JobRunner(workers=1, max_retries=0, speculative=False).run(jobs)
+
+        assert not any(result.ok for result in results.values())
+        assert list(out.iterdir()) == []
@@ -0,0 +1,97 @@
+"""Tests for the processed-book cache."""
+
+import pickle
+import zipfile
+import zlib
+
+import pytest
+from ebooklib import epub
+
+from lib.book_cache import META_CHAPTER, META_SOURCE, BookCache
+from lib.epub_utils import EPUBProcessor
+from scripts.epub_to_audio import prepare_text
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    from config.settings import settings
+    monkeypatch.setattr(settings, "CACHE_DIR", tmp_path / "cache")
+    return tmp_path / "cache"
+
+
+class TestBookCache:
+    """Test that processed books are reused across stages."""
+    
+    def test_second_run_skips_parsing(self, sample_epub, cache_dir, monkeypatch):
+        """Test that a cache hit never opens the EPUB."""
+        first = EPUBProcessor(sample_epub).get_chapters()
+        
+        def fail(*args, **kwargs):
+            raise AssertionError("EPUB parsed despite cache hit")
+        monkeypatch.setattr("lib.epub_utils.epub.read_epub", fail)
+        second = EPUBProcessor(sample_epub).get_chapters()
+        
+        assert second == first
+        assert [chapter_id for chapter_id, _, _ in second][:3] == ["ch001", "ch002", "ch003"]
+        
+    def test_key_depends_on_settings(self, sample_epub, monkeypatch):
+        """Test that changing MIN_CHAPTER_LENGTH invalidates the entry."""
+        from config.settings import settings
+        key = BookCache.key_for(sample_epub)
+        monkeypatch.setattr(settings, "MIN_CHAPTER_LENGTH", settings.MIN_CHAPTER_LENGTH + 1)
+        
+        assert BookCache.key_for(sample_epub) != key
+        
+    def test_split_file_points_to_cached_chapter(self, sample_epub, cache_dir, tmp_path):
+        """Test that split chapters are found without parsing them."""
+        files = EPUBProcessor(sample_epub).split_into_chapters(tmp_path / "split")
+        
+        chapter = BookCache().chapter_for_split_file(files[1])
+        
+        assert chapter["id"] == "ch002"
+        assert chapter["words"] == 202
+        assert BookCache().chapter_for_split_file(sample_epub) is None
+        
+    def test_edited_split_file_is_not_taken_from_cache(self, sample_epub, cache_dir, tmp_path):
+        """Test that a split chapter edited by hand is read from the file itself."""
+        split = EPUBProcessor(sample_epub).split_into_chapters(tmp_path / "split")[1]
+        edited = tmp_path / "edited.epub"
+        with zipfile.ZipFile(split) as source, zipfile.ZipFile(edited, 'w') as target:
+            for info in source.infolist():
+                data = source.read(info)
+                if info.filename.endswith("ch002.xhtml"):
+                    data = data.replace(b"mot mot", b"mot corrige", 1)
+                target.writestr(info, data)
+        
+        assert BookCache().chapter_for_split_file(edited) is None
+        assert "corrige" in prepare_text(edited)
+        assert "corrige" not in prepare_text(split)
+        
+    def test_rejects_keys_that_are_not_digests(self, cache_dir, tmp_path):
+        """Test that a crafted split EPUB cannot point the cache at another file."""
+        planted = tmp_path / "planted.pkl.z"
+        planted.write_bytes(zlib.compress(pickle.dumps({'chapters': [{'id': 'x'}]})))
+        book = epub.EpubBook()
+        book.set_title("Piège")
+        book.add_metadata(None, 'meta', '', {'name': META_SOURCE, 'content': '../planted'})
+        book.add_metadata(None, 'meta', '', {'name': META_CHAPTER, 'content': '0'})
+        item = epub.EpubHtml(title="c", file_name="c.xhtml", lang="fr")
+        item.content = "<p>texte</p>"
+        book.add_item(item)
+        book.spine = [item]
+        book.add_item(epub.EpubNcx())
+        path = tmp_path / "piege.epub"
+        epub.write_epub(str(path), book, {})
+        
+        assert BookCache().chapter_for_split_file(path) is None
+        with pytest.raises(ValueError):
+            BookCache().save("../planted", {})
+        
+    def test_broken_entry_is_a_miss(self, cache_dir):
+        """Test that an entry failing to unpickle in any way is treated as a miss."""
+        key = "0" * 64
+        cache_dir.mkdir()
+        # References a class that no longer exists: AttributeError on load
+        (cache_dir / f"{key}.pkl.z").write_bytes(zlib.compress(b"clib.book_cache\nGone\n."))
+        
+        assert BookCache().load(key) is None
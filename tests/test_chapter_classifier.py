@@ -0,0 +1,82 @@
+"""Tests for rule-pack section classification."""
+
+import pytest
+
+from config.settings import settings
+from lib.chapter_classifier import ChapterClassifier, get_classifier, roman_to_int, rule_languages
+
+
+@pytest.fixture
+def classifier():
+    """French and English rule packs."""
+    return ChapterClassifier(["fr", "en"])
+
+
+class TestChapterClassifier:
+    """Test title classification."""
+
+    @pytest.mark.parametrize("title, number", [
+        ("Chapitre 12 : Le retour", 12),
+        ("CHAPTER 3", 3),
+        ("Chapitre IV", 4),
+        ("Partie XIV - La mer", 14),
+        ("Chapitre premier", 1),
+        ("Chapitre dix-sept", 17),
+        ("Deuxième partie", 2),
+        ("Chapter Twelve", 12),
+        ("Livre dix", 10),
+    ])
+    def test_chapter_numbers(self, classifier, title, number):
+        """Test digits, roman numerals, spelled-out numbers and ordinals."""
+        section = classifier.classify(title)
+        assert section.content_start
+        assert section.number == number
+
+    @pytest.mark.parametrize("title", [
+        "Partie de campagne",
+        "Chapitre dans lequel on se rencontre",
+        "Chapter in which we meet",
+        "Chapitre mille",
+        "Chapitre VIIII",
+        "Chapitre 0",
+    ])
+    def test_words_are_not_roman_numerals(self, classifier, title):
+        """Test that words starting with roman letters are not read as numbers."""
+        assert classifier.classify(title).number is None
+
+    def test_chapter_number_wins(self, classifier):
+        """Test that the chapter number is kept over the part or book number."""
+        assert classifier.classify("Partie 2, Chapitre 5").number == 5
+        assert classifier.classify("Book 3 - Chapter 7").number == 7
+        assert classifier.classify("Livre 4, chapitre IX").number == 4
+        assert classifier.classify("Deuxième partie - Chapitre trois").number == 3
+
+    def test_keywords_match_whole_words(self, classifier):
+        """Test that 'part' inside 'départ' is not a content start."""
+        assert not classifier.classify("Le départ").content_start
+        assert classifier.classify("Introduction").content_start
+        assert classifier.classify("Un livre").number is None
+
+    def test_skip_rules(self, classifier):
+        """Test the skip decision from keyword hits and word counts."""
+        assert classifier.classify("Notes et références").should_skip(5000)
+        assert classifier.classify("Index").should_skip(20)
+        assert not classifier.classify("Index").should_skip(500)
+        assert classifier.classify("Un intermède").should_skip(30, min_words=100)
+        assert not classifier.classify("Chapitre 2").should_skip(30, min_words=100)
+
+    def test_rule_languages(self, monkeypatch):
+        """Test rule pack selection from the book language and settings."""
+        monkeypatch.setattr(settings, "CHAPTER_RULES", "")
+        assert rule_languages("fr-FR") == ("fr", "en")
+        assert rule_languages("en") == ("en",)
+        assert set(rule_languages("xx")) >= {"fr", "en"}
+
+        monkeypatch.setattr(settings, "CHAPTER_RULES", "fr")
+        assert rule_languages("en") == ("fr",)
+        assert get_classifier("en").classify("Chapter 3").number is None
+
+    def test_roman_to_int(self):
+        """Test Roman numeral conversion."""
+        assert roman_to_int("XIV") == 14
+        assert roman_to_int("mcmxcix") == 1999
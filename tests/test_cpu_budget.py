@@ -0,0 +1,39 @@
+"""Tests for CPU thread budgeting."""
+
+from lib.cpu_budget import ThreadBudget
+
+
+class TestThreadBudget:
+    """Test worker/thread planning."""
+    
+    def test_derives_threads_from_workers(self):
+        """Test that cores are split evenly between workers."""
+        budget = ThreadBudget(workers=2, threads_per_worker=0, cpus=list(range(8)))
+        
+        assert budget.threads_per_worker == 4
+        assert [slot.cpus for slot in budget.slots] == [[0, 1, 2, 3], [4, 5, 6, 7]]
+        assert not budget.oversubscribed
+        
+    def test_derives_workers_from_threads(self, monkeypatch):
+        """Test that the worker count fills the cores and respects MAX_WORKERS."""
+        from config.settings import settings
+        monkeypatch.setattr(settings, "MAX_WORKERS", 3)
+        
+        budget = ThreadBudget(threads_per_worker=2, cpus=list(range(16)))
+        
+        assert budget.workers == 3
+        assert budget.threads_per_worker == 2
+        
+    def test_oversubscription_wraps_cpus(self):
+        """Test that explicit oversized plans are flagged and still pinned."""
+        budget = ThreadBudget(workers=3, threads_per_worker=2, cpus=[0, 1, 2, 3])
+        
+        assert budget.oversubscribed
+        assert budget.slots[2].cpus == [0, 1]
+        
+    def test_env_limits_threads(self):
+        """Test worker environment."""
+        budget = ThreadBudget(workers=1, threads_per_worker=3, cpus=[0, 1, 2], pin=False)
+        
+        assert budget.env_for(budget.slots[0])["OMP_NUM_THREADS"] == "3"
+        assert budget.preexec_for(budget.slots[0]) is None
@@ -0,0 +1,78 @@
+"""Tests for manifest-based preview and render estimates."""
+
+import multiprocessing
+
+import pytest
+from lib.epub_manifest import EPUBManifest
+from lib.render_estimate import RenderEstimator, load_history, record_run
+from scripts.epub_to_audio import voice_key
+
+
+def _record_runs(history_file, count):
+    """Record runs from a separate process."""
+    for _ in range(count):
+        record_run("voice", chars=100, audio_seconds=5, wall_seconds=1, path=history_file)
+
+
+class TestEPUBManifest:
+    """Test reading the spine without parsing HTML."""
+    
+    def test_lists_spine_with_toc_titles(self, sample_epub):
+        """Test titles, order and size-based word estimates."""
+        manifest = EPUBManifest(sample_epub)
+        
+        assert manifest.title == "Livre"
+        assert [e.title for e in manifest.entries] == ["Chapitre 1", "Chapitre 2", "Chapitre 3"]
+        words = [e.estimated_words for e in manifest.entries]
+        assert words == sorted(words)
+        assert words[0] > 0
+
+
+class TestRenderEstimator:
+    """Test estimates from recorded throughput."""
+    
+    def test_defaults_without_history(self):
+        """Test fallback to configured rates."""
+        estimator = RenderEstimator("unknown", history={})
+        
+        estimate = estimator.estimate(chars=1500, workers=1)
+        
+        assert estimator.samples == 0
+        assert estimate.audio_seconds == pytest.approx(1500 / estimator.chars_per_second)
+        
+    def test_uses_recorded_runs(self, tmp_path):
+        """Test that history drives duration, size and render time."""
+        history_file = tmp_path / "throughput.json"
+        record_run("voice", chars=2000, audio_seconds=100, wall_seconds=25, path=history_file)
+        
+        estimator = RenderEstimator("voice", load_history(history_file))
+        estimate = estimator.estimate(chars=4000, workers=2)
+        
+        assert estimate.audio_seconds == pytest.approx(200)
+        assert estimate.render_seconds == pytest.approx(25)
+        assert estimate.size_bytes("wav") == 200 * 22050 * 2 + 44
+
+    def test_short_voice_names_find_their_history(self, tmp_path):
+        """Test that --voice upmc looks up runs recorded under the model name."""
+        history_file = tmp_path / "throughput.json"
+        record_run("fr_FR-upmc-medium", chars=2000, audio_seconds=100, wall_seconds=25,
+                   path=history_file)
+        
+        estimator = RenderEstimator(voice_key("upmc"), load_history(history_file))
+        
+        assert estimator.samples == 1
+        assert voice_key("voices/fr_FR-tom-medium.onnx") == "fr_FR-tom-medium"
+        assert voice_key("fr_FR-siwis-medium") == "fr_FR-siwis-medium"
+
+    def test_parallel_processes_keep_every_run(self, tmp_path):
+        """Test that runs recorded by several processes at once are all kept."""
+        history_file = tmp_path / "throughput.json"
+        context = multiprocessing.get_context('fork')
+        processes = [context.Process(target=_record_runs, args=(history_file, 10))
+                     for _ in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        assert len(load_history(history_file)["voice"]) == 40
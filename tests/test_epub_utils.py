@@ -0,0 +1,190 @@
+"""Tests for EPUB processing."""
+
+import zipfile
+
+import pytest
+from ebooklib import epub
+
+from config.settings import settings
+from lib.epub_utils import EPUBProcessor, split_sources
+
+
+def write_long_epub(path, revised_chapter=None, chapters=12):
+    """Write an EPUB with front matter, many chapters and back matter."""
+    book = epub.EpubBook()
+    book.set_title("Recueil")
+    book.set_language("fr")
+    sections = [("Couverture", 5), ("Table des matières", 40), ("Préface", 150)]
+    sections += [(f"Chapitre {i}", 80 + 20 * i) for i in range(1, chapters + 1)]
+    sections += [("Un interlude", 30), ("Notes et références", 200), ("Index", 20)]
+    items = []
+    for i, (title, words) in enumerate(sections):
+        item = epub.EpubHtml(title=title, file_name=f"s{i:02d}.xhtml", lang="fr")
+        word = "terme " if title == revised_chapter else "mot "
+        item.content = f"<h2>{title}</h2><p>{word * words}</p>"
+        book.add_item(item)
+        items.append(item)
+    book.spine = items
+    book.add_item(epub.EpubNcx())
+    epub.write_epub(str(path), book, {})
+    return path
+
+
+@pytest.fixture
+def long_epub(tmp_path):
+    """EPUB with front matter, many chapters and back matter."""
+    return write_long_epub(tmp_path / "recueil.epub")
+
+
+class TestEPUBProcessor:
+    """Test chapter extraction."""
+    
+    def test_parallel_matches_serial(self, long_epub):
+        """Test that the process pool yields exactly the serial chapter list."""
+        serial = EPUBProcessor(long_epub, use_cache=False, workers=1).process()
+        parallel = EPUBProcessor(long_epub, use_cache=False, workers=4).process()
+        
+        assert parallel["chapters"] == serial["chapters"]
+        assert parallel["skipped"] == serial["skipped"]
+        assert serial["chapters"][0]["title"] == "Chapter 1: Préface"
+
+    def test_split_is_incremental(self, long_epub, tmp_path):
+        """Test that a re-split only rewrites chapters whose content changed."""
+        split_dir = tmp_path / "split"
+        files = EPUBProcessor(long_epub, use_cache=False, workers=2).split_into_chapters(split_dir)
+        mtimes = {f.name: f.stat().st_mtime_ns for f in files}
+        
+        again = EPUBProcessor(long_epub, use_cache=False, workers=2).split_into_chapters(split_dir)
+        assert again == files
+        assert {f.name: f.stat().st_mtime_ns for f in again} == mtimes
+        
+        write_long_epub(long_epub, revised_chapter="Chapitre 3")
+        revised = EPUBProcessor(long_epub, use_cache=False, workers=1).split_into_chapters(split_dir)
+        rewritten = [f.name for f in revised if f.stat().st_mtime_ns != mtimes[f.name]]
+        assert len(rewritten) == 1 and "Chapitre_3" in rewritten[0]
+    
+    def test_split_removes_stale_files(self, long_epub, tmp_path):
+        """Test that chapter files no longer produced by the book are deleted."""
+        split_dir = tmp_path / "split"
+        files = EPUBProcessor(long_epub, use_cache=False, workers=1).split_into_chapters(split_dir)
+        
+        write_long_epub(long_epub, chapters=10)
+        kept = EPUBProcessor(long_epub, use_cache=False, workers=1).split_into_chapters(split_dir)
+        
+        assert 0 < len(kept) < len(files)
+        assert sorted(split_dir.glob("*.epub")) == sorted(kept)
+    
+    def test_split_files_know_their_book(self, long_epub, tmp_path):
+        """Test that split chapters map back to the book they came from."""
+        split_dir = tmp_path / "split"
+        files = EPUBProcessor(long_epub, use_cache=False, workers=1).split_into_chapters(split_dir)
+        
+        sources = split_sources(split_dir)
+        assert {sources[f.name] for f in files} == {"recueil"}
+        assert "autre.epub" not in sources
+
+
+def write_single_document_epub(path, toc_anchors=False):
+    """EPUB whose whole text is one document: a part heading and five chapters."""
+    book = epub.EpubBook()
+    book.set_title("Roman")
+    book.set_language("fr")
+    body = "<h1>Première partie</h1>"
+    for i in range(1, 6):
+        if toc_anchors:
+            body += f'<div id="sec{i}"><p class="titre">Le jour {i}</p><p>{"mot " * 400}</p></div>'
+        else:
+            body += f"<h2>Chapitre {i}</h2><p>{'mot ' * 400}</p>"
+    item = epub.EpubHtml(title="Roman", file_name="roman.xhtml", lang="fr")
+    item.content = body
+    book.add_item(item)
+    if toc_anchors:
+        book.toc = tuple(epub.Link(f"roman.xhtml#sec{i}", f"Le jour {i}", f"sec{i}")
+                         for i in range(1, 6))
+    book.spine = [item]
+    book.add_item(epub.EpubNcx())
+    epub.write_epub(str(path), book, {})
+    return path
+
+
+def write_ncx_elsewhere_epub(path):
+    """
+    EPUB with its NCX in its own directory (hrefs relative to the NCX) and,
+    second in the spine, an untitled document holding five anchored days.
+    """
+    xhtml = '<html xmlns="http://www.w3.org/1999/xhtml"><head></head><body>{}</body></html>'
+    days = "".join(f'<div id="sec{i}"><p>{"mot " * 400}</p></div>' for i in range(1, 6))
+    points = "".join(f'<navPoint id="p{i}" playOrder="{i}"><navLabel><text>Le jour {i}</text></navLabel>'
+                     f'<content src="../text/roman.xhtml#sec{i}"/></navPoint>' for i in range(1, 6))
+    files = {
+        "META-INF/container.xml":
+            '<container xmlns="urn:oasis:names:tc:opendocument:xmlns:container" version="1.0">'
+            '<rootfiles><rootfile full-path="OEBPS/content.opf" '
+            'media-type="application/oebps-package+xml"/></rootfiles></container>',
+        "OEBPS/content.opf":
+            '<package xmlns="http://www.idpf.org/2007/opf" version="2.0" unique-identifier="id">'
+            '<metadata xmlns:dc="http://purl.org/dc/elements/1.1/"><dc:identifier id="id">x</dc:identifier>'
+            '<dc:title>Roman</dc:title><dc:language>fr</dc:language></metadata><manifest>'
+            '<item id="intro" href="text/intro.xhtml" media-type="application/xhtml+xml"/>'
+            '<item id="roman" href="text/roman.xhtml" media-type="application/xhtml+xml"/>'
+            '<item id="ncx" href="toc/toc.ncx" media-type="application/x-dtbncx+xml"/>'
+            '</manifest><spine toc="ncx"><itemref idref="intro"/><itemref idref="roman"/></spine></package>',
+        "OEBPS/toc/toc.ncx":
+            '<ncx xmlns="http://www.daisy.org/z3986/2005/ncx/" version="2005-1"><head/>'
+            f'<docTitle><text>Roman</text></docTitle><navMap>{points}</navMap></ncx>',
+        "OEBPS/text/intro.xhtml": xhtml.format(f"<p>{'avant-propos ' * 150}.</p>"),
+        "OEBPS/text/roman.xhtml": xhtml.format(f"<p>{'prologue ' * 300}.</p>{days}"),
+    }
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr("mimetype", "application/epub+zip")
+        for name, content in files.items():
+            archive.writestr(name, content)
+    return path
+
+
+class TestOversizedDocuments:
+    """Test sub-splitting of documents holding many chapters."""
+    
+    def test_split_at_headings(self, tmp_path, monkeypatch):
+        """Test that an oversized document is split at its h2 chapters."""
+        monkeypatch.setattr(settings, "MAX_CHAPTER_WORDS", 1000)
+        path = write_single_document_epub(tmp_path / "roman.epub")
+        chapters = EPUBProcessor(path, use_cache=False, workers=1).process()["chapters"]
+        
+        assert [c["id"] for c in chapters] == ["ch001", "ch002", "ch003", "ch004", "ch005"]
+        assert [c["title"] for c in chapters] == [f"Chapitre {i}" for i in range(1, 6)]
+        # The bare part heading is merged into the first chapter
+        assert chapters[0]["text"].startswith("Première partie")
+        assert all(400 <= c["words"] <= 1000 for c in chapters)
+    
+    def test_split_at_toc_anchors(self, tmp_path, monkeypatch):
+        """Test that TOC anchors give the section boundaries and titles."""
+        monkeypatch.setattr(settings, "MAX_CHAPTER_WORDS", 1000)
+        path = write_single_document_epub(tmp_path / "roman.epub", toc_anchors=True)
+        processor = EPUBProcessor(path, use_cache=False, workers=1)
+        chapters = processor.process(skip_metadata=False)["chapters"]
+        
+        assert [c["title"] for c in chapters] == [f"Chapter {i}: Le jour {i}" for i in range(1, 6)]
+        
+        files = processor.split_into_chapters(tmp_path / "split", skip_metadata=False)
+        assert len(files) == 5
+        html = epub.read_epub(str(files[2])).get_item_with_href("ch003.xhtml").get_content().decode()
+        assert "Le jour 3" in html and "Le jour 4" not in html
+    
+    def test_no_split_below_limit(self, tmp_path, monkeypatch):
+        """Test that documents under MAX_CHAPTER_WORDS are left whole."""
+        monkeypatch.setattr(settings, "MAX_CHAPTER_WORDS", 0)
+        path = write_single_document_epub(tmp_path / "roman.epub")
+        chapters = EPUBProcessor(path, use_cache=False, workers=1).process()["chapters"]
+        
+        assert len(chapters) == 1
+        assert chapters[0]["title"] == "Première partie"
+    
+    def test_anchors_and_titles_with_ncx_elsewhere(self, tmp_path, monkeypatch):
+        """Test NCX-relative anchors, and fallback titles of the real document index."""
+        monkeypatch.setattr(settings, "MAX_CHAPTER_WORDS", 1000)
+        path = write_ncx_elsewhere_epub(tmp_path / "roman.epub")
+        chapters = EPUBProcessor(path, use_cache=False, workers=1).process(skip_metadata=False)["chapters"]
+        
+        titles = [c["title"].split(": ", 1)[1] for c in chapters]
+        assert titles == ["Section 1", "Section 2"] + [f"Le jour {i}" for i in range(1, 6)]
@@ -0,0 +1,106 @@
+"""Tests for watch-folder ingestion."""
+
+import json
+import os
+import sys
+import time
+import zipfile
+
+import pytest
+
+from lib.folder_watch import BookStatus, FolderWatcher, Inotify
+
+
+def write_book(path, content="chapitre"):
+    """Write a small zip standing in for an EPUB."""
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr("mimetype", "application/epub+zip")
+        archive.writestr("text.xhtml", content)
+    return path
+
+
+def age(path, seconds):
+    """Set a file's modification time to some seconds ago."""
+    mtime = time.time() - seconds
+    os.utime(path, (mtime, mtime))
+
+
+class TestFolderWatcher:
+    """Test change detection and debouncing."""
+
+    def test_debounces_recent_writes(self, tmp_path):
+        """Test that a file is reported only once unchanged for the debounce delay."""
+        book = write_book(tmp_path / "livre.epub")
+        watcher = FolderWatcher(tmp_path, debounce=10, use_inotify=False)
+        now = time.monotonic()
+
+        assert watcher.scan(now) == []
+        assert watcher.pending() == 1
+        assert watcher.scan(now + 11) == [book]
+
+    def test_write_restarts_delay(self, tmp_path):
+        """Test that a file still growing is not reported."""
+        book = write_book(tmp_path / "livre.epub")
+        watcher = FolderWatcher(tmp_path, debounce=10, use_inotify=False)
+        now = time.monotonic()
+        watcher.scan(now)
+
+        write_book(book, content="chapitre plus long")
+        assert watcher.scan(now + 11) == []
+        assert watcher.scan(now + 22) == [book]
+
+    def test_ignores_partial_and_hidden_files(self, tmp_path):
+        """Test that non-zip uploads and hidden files are never reported."""
+        (tmp_path / "partiel.epub").write_bytes(b"PK\x03\x04 truncated")
+        write_book(tmp_path / ".cache.epub")
+        for path in tmp_path.iterdir():
+            age(path, 60)
+        watcher = FolderWatcher(tmp_path, debounce=10, use_inotify=False)
+
+        assert watcher.scan() == []
+        assert watcher.pending() == 0
+
+    def test_processed_state_survives_restart(self, tmp_path):
+        """Test that processed books are skipped until modified again."""
+        inbox = tmp_path / "inbox"
+        inbox.mkdir()
+        book = write_book(inbox / "livre.epub")
+        age(book, 60)
+        state = tmp_path / "state.json"
+
+        watcher = FolderWatcher(inbox, state_path=state, debounce=10, use_inotify=False)
+        assert watcher.scan() == [book]
+        watcher.mark_processed(book)
+
+        restarted = FolderWatcher(inbox, state_path=state, debounce=10, use_inotify=False)
+        assert restarted.scan() == []
+
+        age(book, 30)
+        assert restarted.scan() == [book]
+
+    @pytest.mark.skipif(not sys.platform.startswith('linux'), reason="inotify is Linux only")
+    def test_inotify_wakes_up(self, tmp_path):
+        """Test that inotify reports a file created in the folder."""
+        inotify = Inotify(tmp_path)
+        try:
+            write_book(tmp_path / "livre.epub")
+            assert "livre.epub" in inotify.wait(1)
+        finally:
+            inotify.close()
+
+
+class TestBookStatus:
+    """Test per-book status files."""
+
+    def test_status_file(self, tmp_path):
+        """Test that the status file follows the book through its states."""
+        status = BookStatus(tmp_path, tmp_path / "livre.epub")
+        assert json.loads(status.path.read_text())['state'] == 'queued'
+
+        status.update(state='synthesizing', jobs=2)
+        status.advance()
+        status.update(state='done')
+
+        data = json.loads((tmp_path / "livre.status.json").read_text())
+        assert data['state'] == 'done' and data['done'] == 1
+        assert data['latency_seconds'] >= 0
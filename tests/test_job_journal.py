@@ -0,0 +1,166 @@
+"""Tests for the job journal and resumed conversions."""
+
+import os
+import stat
+import sys
+
+import pytest
+
+from config.settings import settings
+from lib.job_journal import JobJournal, inputs_digest, journal_jobs, record_failures
+from lib.job_runner import Job, JobRunner
+from lib.piper_tts import PiperTTS
+
+# Stand-in for Piper: fails on texts containing "boom" while the flag file exists
+FAKE_PIPER = '''#!{python}
+import os, sys, wave
+args = sys.argv[1:]
+if '--version' in args:
+    sys.exit(0)
+text = sys.stdin.read()
+open({log!r}, 'a').write(text.strip() + '\\n')
+if 'boom' in text and os.path.exists({flag!r}):
+    sys.exit('boom')
+with wave.open(args[args.index('--output_file') + 1], 'wb') as w:
+    w.setnchannels(1); w.setsampwidth(2); w.setframerate(16000)
+    w.writeframes(text.encode('utf-8').ljust(len(text) * 200, b'\\0'))
+'''
+
+
+def make_job(key, path, runs):
+    """Job writing `key` to path, counting its runs."""
+    def run(attempt):
+        runs.append(key)
+        path.write_text(key)
+        return path
+    job = Job(key=key, run=run)
+    job.inputs = inputs_digest(key)
+    return job
+
+
+class TestJobJournal:
+    """Test recording and verification of finished jobs."""
+
+    def test_verifies_outputs(self, tmp_path):
+        """Test that a done job is trusted only while its output is intact."""
+        output = tmp_path / "out.wav"
+        output.write_bytes(b"audio")
+        journal = JobJournal(tmp_path / "journal.json")
+        journal.mark_done("out.wav", "digest", [output])
+
+        reloaded = JobJournal(tmp_path / "journal.json")
+        assert reloaded.verified("out.wav", "digest") == [output]
+        assert reloaded.verified("out.wav", "other digest") is None
+
+        output.write_bytes(b"AUDIO")
+        assert reloaded.verified("out.wav", "digest") is None
+        output.unlink()
+        assert reloaded.verified("out.wav", "digest") is None
+
+    def test_finished_jobs_are_appended(self, tmp_path):
+        """Test that finished jobs go to the log, folded in on the next save."""
+        journal = JobJournal(tmp_path / "journal.json")
+        journal.mark_pending("a.wav", "digest")
+        snapshot = journal.path.read_bytes()
+        for name in ("a.wav", "b.wav"):
+            output = tmp_path / name
+            output.write_bytes(b"audio")
+            journal.mark_done(name, "digest", [output])
+        journal.mark_failed("c.wav", "digest", "boom")
+
+        # The journal itself is not rewritten; a torn last line is ignored
+        assert journal.path.read_bytes() == snapshot
+        with open(journal.log_path, 'a') as log:
+            log.write('["d.wav", {"sta')
+        reloaded = JobJournal(journal.path)
+        assert reloaded.counts() == {'pending': 0, 'done': 2, 'failed': 1}
+
+        reloaded.save()
+        assert not reloaded.log_path.exists()
+        assert JobJournal(journal.path).counts() == {'pending': 0, 'done': 2, 'failed': 1}
+
+    def test_resume_runs_only_unfinished_jobs(self, tmp_path):
+        """Test that a resumed run skips jobs done before and reruns the others."""
+        journal = JobJournal(tmp_path / "journal.json")
+        runs = []
+        jobs = [make_job(f"job{i}", tmp_path / f"job{i}.txt", runs) for i in range(3)]
+        jobs[2].run = lambda attempt: 1 / 0
+
+        jobs, skipped = journal_jobs(jobs, lambda job: [journal], resume=True)
+        results = JobRunner(max_retries=0, speculative=False).run(jobs)
+        record_failures(jobs, results)
+        assert skipped == {}
+        assert JobJournal(journal.path).counts() == {'pending': 0, 'done': 2, 'failed': 1}
+
+        # Rerun after a crash, with job1's output damaged meanwhile
+        (tmp_path / "job1.txt").write_text("truncated")
+        runs.clear()
+        journal = JobJournal(journal.path)
+        jobs = [make_job(f"job{i}", tmp_path / f"job{i}.txt", runs) for i in range(3)]
+        jobs, skipped = journal_jobs(jobs, lambda job: [journal], resume=True)
+        JobRunner(max_retries=0, speculative=False).run(jobs)
+
+        assert list(skipped) == ["job0"]
+        assert sorted(runs) == ["job1", "job2"]
+        assert JobJournal(journal.path).counts()['done'] == 3
+
+
+class TestResumeChunks:
+    """Test that process_chunks picks up where a failed run stopped."""
+
+    @pytest.fixture
+    def piper(self, tmp_path, monkeypatch):
+        """Fake Piper on PATH; returns (run log, failure flag)."""
+        log, flag = tmp_path / "runs.log", tmp_path / "fail"
+        bin_dir = tmp_path / "bin"
+        bin_dir.mkdir()
+        path = bin_dir / "piper"
+        path.write_text(FAKE_PIPER.format(python=sys.executable, log=str(log), flag=str(flag)))
+        path.chmod(path.stat().st_mode | stat.S_IEXEC)
+        monkeypatch.setenv("PATH", f"{bin_dir}:{os.environ['PATH']}")
+        monkeypatch.setattr(settings, "THROUGHPUT_HISTORY", tmp_path / "throughput.json")
+        monkeypatch.setattr(settings, "TTS_MAX_RETRIES", 0)
+        monkeypatch.setattr(settings, "SPECULATIVE_RETRY", False)
+        monkeypatch.setattr(settings, "JOB_JOURNAL", True)
+        monkeypatch.setattr(settings, "AUDIO_FORMAT", "wav")
+        return log, flag
+
+    def test_resume_synthesizes_missing_chunks(self, tmp_path, piper):
+        """Test that only the failed chunk is synthesized again on resume."""
+        log, flag = piper
+        chunks = ["Premier morceau.", "Deuxième boom.", "Troisième morceau."]
+        output_base = tmp_path / "out" / "livre"
+        output_base.parent.mkdir()
+        tts = PiperTTS(model="voice.onnx")
+
+        flag.touch()
+        with pytest.raises(RuntimeError, match="resume"):
+            tts.process_chunks(chunks, output_base, resume=True)
+        assert len(list((tmp_path / "out" / ".livre.chunks").glob("*_chunk_*"))) == 2
+
+        flag.unlink()
+        log.write_text("")
+        final = tts.process_chunks(chunks, output_base, resume=True)
+
+        assert log.read_text().splitlines() == ["Deuxième boom."]
+        assert not (tmp_path / "out" / ".livre.chunks").exists()
+
+        # Same audio as an uninterrupted run
+        fresh = tts.process_chunks(chunks, tmp_path / "fresh")
+        assert final.read_bytes() == fresh.read_bytes()
+
+    def test_chunks_stay_in_scratch_by_default(self, tmp_path, piper):
+        """Test that without resume nothing but the output lands next to it."""
+        log, flag = piper
+        chunks = ["Premier morceau.", "Deuxième boom.", "Troisième morceau."]
+        out = tmp_path / "out"
+        out.mkdir()
+        tts = PiperTTS(model="voice.onnx")
+
+        final = tts.process_chunks(chunks, out / "livre")
+        assert sorted(path.name for path in out.iterdir()) == [final.name]
+
+        flag.touch()
+        with pytest.raises(RuntimeError):
+            tts.process_chunks(chunks, out / "autre")
+        assert sorted(path.name for path in out.iterdir()) == [final.name]
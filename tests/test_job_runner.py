@@ -0,0 +1,72 @@
+"""Tests for the deadline-aware job runner."""
+
+import threading
+
+import pytest
+from lib.job_runner import Job, JobRunner, LatencyStats, percentile
+from lib.piper_tts import PiperTimeoutError, run_piper
+
+
+class TestJobRunner:
+    """Test retries, deadlines and speculative execution."""
+    
+    def test_percentiles(self):
+        """Test tail-latency statistics."""
+        stats = LatencyStats([float(i) for i in range(1, 101)])
+        
+        assert stats.p50 == pytest.approx(50.5)
+        assert stats.p99 == pytest.approx(99.01)
+        assert percentile([], 95) == 0.0
+        
+    def test_retries_failed_attempts(self):
+        """Test that a failing job is retried until it succeeds."""
+        calls = []
+        
+        def flaky(attempt):
+            calls.append(attempt.number)
+            if attempt.number < 3:
+                raise RuntimeError("boom")
+            return "ok"
+        
+        runner = JobRunner(max_retries=2, backoff=0.01, speculative=False)
+        result = runner.run([Job("a", flaky)])["a"]
+        
+        assert result.ok
+        assert result.value == "ok"
+        assert calls == [1, 2, 3]
+        
+    def test_gives_up_after_max_retries(self):
+        """Test that the last error is reported."""
+        def broken(attempt):
+            raise RuntimeError(f"attempt {attempt.number}")
+        
+        result = JobRunner(max_retries=1, backoff=0.01).run([Job("a", broken)])["a"]
+        
+        assert not result.ok
+        assert str(result.error) == "attempt 2"
+        
+    def test_speculative_duplicate_wins(self):
+        """Test that a hung straggler is duplicated and cancelled."""
+        cancelled = threading.Event()
+        committed = []
+        
+        def run(attempt):
+            if not attempt.speculative:
+                if attempt.cancelled.wait(10):
+                    cancelled.set()
+                raise RuntimeError("cancelled")
+            return attempt.tag
+        
+        job = Job("slow", run, expected_seconds=0.01, commit=committed.append)
+        runner = JobRunner(workers=2, max_retries=0, speculative=True)
+        result = runner.run([job])["slow"]
+        
+        assert result.ok
+        assert result.speculative_win
+        assert committed == ["a2s"]
+        assert cancelled.wait(5)
+        
+    def test_run_piper_timeout_kills_process(self):
+        """Test that a hung process is killed at its deadline."""
+        with pytest.raises(PiperTimeoutError):
+            run_piper(["sleep", "10"], "", timeout=0.2)
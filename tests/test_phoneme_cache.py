@@ -0,0 +1,80 @@
+"""Tests for the per-sentence phoneme id cache."""
+
+import struct
+import wave
+from types import SimpleNamespace
+
+import pytest
+
+from lib.phoneme_cache import (PhonemeCache, decode_ids, encode_ids, phonemizer_namespace,
+                               split_sentences)
+from lib.voice_models import _synthesize_in_child
+
+
+class FakeVoice:
+    """Stand-in for a PiperVoice: one phoneme per character, one sample per id."""
+
+    def __init__(self, espeak_voice='fr'):
+        self.config = SimpleNamespace(sample_rate=16000, espeak_voice=espeak_voice,
+                                      phoneme_type='espeak', phoneme_id_map={'a': [1]})
+        self.phonemized = []
+
+    def phonemize(self, text):
+        self.phonemized.append(text)
+        return [list(text)]
+
+    def phonemes_to_ids(self, phonemes):
+        return [1] + [ord(p) % 1000 + 2 for p in phonemes] + [2]
+
+    def synthesize_ids_to_raw(self, phoneme_ids, length_scale=None):
+        return b''.join(struct.pack('<h', i) for i in phoneme_ids)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Phoneme cache for the fake voice's configuration."""
+    return PhonemeCache(phonemizer_namespace(FakeVoice().config), tmp_path / "phonemes.sqlite")
+
+
+class TestPhonemeCache:
+    """Test storage and reuse of phoneme ids."""
+
+    def test_encoding_round_trips(self):
+        """Test that utterances survive packing, including empty ones."""
+        utterances = [[1, 40, 300, 2], [], [1, 2]]
+        assert decode_ids(encode_ids(utterances)) == utterances
+
+    def test_split_sentences(self):
+        """Test that text is cut after sentence punctuation."""
+        assert split_sentences("Il pleut. Vraiment ? Oui…  Bon") == \
+            ["Il pleut.", "Vraiment ?", "Oui…", "Bon"]
+
+    def test_only_new_sentences_are_phonemized(self, cache):
+        """Test that a re-render only phonemizes sentences it has not seen."""
+        voice = FakeVoice()
+        first = cache.phoneme_ids(voice, "Bonjour. Il fait beau. Bonjour.")
+        assert voice.phonemized == ["Bonjour.", "Il fait beau."]
+
+        voice.phonemized.clear()
+        second = cache.phoneme_ids(voice, "Bonjour. Il fait gris.")
+        assert voice.phonemized == ["Il fait gris."]
+        assert second[0] == first[0]
+        assert len(cache) == 3
+
+    def test_settings_are_part_of_the_key(self, cache, tmp_path):
+        """Test that another espeak voice does not reuse cached ids."""
+        cache.phoneme_ids(FakeVoice(), "Bonjour.")
+        other = FakeVoice(espeak_voice='en-us')
+        PhonemeCache(phonemizer_namespace(other.config), cache.path).phoneme_ids(other, "Bonjour.")
+        assert other.phonemized == ["Bonjour."]
+
+    def test_cached_synthesis_matches(self, cache, tmp_path):
+        """Test that audio from cached phoneme ids is the same as from fresh ones."""
+        voice = FakeVoice()
+        text = "Une phrase. Une autre phrase !"
+        for name in ("fresh.wav", "cached.wav"):
+            _synthesize_in_child(voice, text, str(tmp_path / name), 1.0, None, cache)
+        assert voice.phonemized == ["Une phrase.", "Une autre phrase !"]
+        assert (tmp_path / "fresh.wav").read_bytes() == (tmp_path / "cached.wav").read_bytes()
+        with wave.open(str(tmp_path / "cached.wav"), 'rb') as wav_file:
+            assert wav_file.getnframes() == len(text) + 2 * 2 - 1
@@ -0,0 +1,106 @@
+"""Tests for worker memory accounting."""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from lib import voice_models
+from lib.piper_tts import PiperCancelledError, PiperTimeoutError
+from lib.proc_memory import MB, MemorySampler, ProcessMemory, descendant_pids
+
+pytestmark = pytest.mark.skipif(not os.path.exists("/proc/self/smaps_rollup"),
+                                reason="needs Linux /proc/<pid>/smaps_rollup")
+
+
+class TestProcessMemory:
+    """Test /proc based memory sampling."""
+
+    def test_read_self(self):
+        """Test that unique and shared memory add up to at most the RSS."""
+        memory = ProcessMemory.read(os.getpid())
+        assert memory.rss > 0
+        assert 0 < memory.unique <= memory.rss
+        assert memory.unique + memory.shared <= memory.rss + MB
+
+    def test_read_missing_process(self):
+        """Test that a vanished process reads as None."""
+        assert ProcessMemory.read(2 ** 22 + 1) is None
+
+    def test_sampler_sees_workers(self):
+        """Test that child processes are sampled and sized."""
+        child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(5)"])
+        try:
+            with MemorySampler(interval=0.05) as sampler:
+                assert child.pid in descendant_pids(os.getpid())
+                sampler.sample()
+        finally:
+            child.kill()
+            child.wait()
+
+        workers = sampler.workers()
+        assert [m.pid for m in workers] == [child.pid]
+        assert sampler.workers_that_fit(available=workers[0].shared + 10 * workers[0].unique) == 10
+
+
+class TestSharedVoice:
+    """Test the optional shared voice loader."""
+
+    def test_requires_piper_package(self, monkeypatch, tmp_path):
+        """Test a clear error when the piper Python package is missing."""
+        monkeypatch.setattr(voice_models, "shared_voice_available", lambda: False)
+        with pytest.raises(RuntimeError, match="piper-tts"):
+            voice_models.SharedVoice(tmp_path / "voice.onnx")
+
+
+class SleepyVoice:
+    """Stand-in for a PiperVoice: one frame per character, "slow" never ends."""
+
+    def synthesize(self, text, wav_file, length_scale=1.0):
+        if text == "slow":
+            time.sleep(60)
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(16000)
+        wav_file.writeframes(b"\0\0" * len(text))
+
+
+class TestForkServer:
+    """Test synthesis children forked by the fork server."""
+
+    @pytest.fixture
+    def server(self):
+        """Fork server around the stand-in voice."""
+        server = voice_models.ForkServer(SleepyVoice())
+        yield server
+        server.close()
+
+    def test_runs_requests_from_threads(self, server, tmp_path):
+        """Test that concurrent threads each get their own child and output."""
+        def run(i):
+            return server.run((f"texte {i}" * (i + 1), str(tmp_path / f"{i}.wav"), 1.0, None))
+
+        with ThreadPoolExecutor(4) as pool:
+            assert list(pool.map(run, range(8))) == [0] * 8
+        for i in range(8):
+            with wave.open(str(tmp_path / f"{i}.wav"), 'rb') as wav_file:
+                assert wav_file.getnframes() == len(f"texte {i}") * (i + 1)
+
+    def test_timeout_and_cancel_kill_the_child(self, server, tmp_path):
+        """Test that stuck children are killed and the server keeps serving."""
+        with pytest.raises(PiperTimeoutError):
+            server.run(("slow", str(tmp_path / "a.wav"), 1.0, None), timeout=0.2)
+
+        cancel = threading.Event()
+        threading.Timer(0.2, cancel.set).start()
+        with pytest.raises(PiperCancelledError):
+            server.run(("slow", str(tmp_path / "b.wav"), 1.0, None), cancel=cancel)
+
+        assert server.run(("vite", str(tmp_path / "c.wav"), 1.0, None)) == 0
+        time.sleep(0.3)
+        assert descendant_pids(server._process.pid) == []
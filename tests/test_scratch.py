@@ -0,0 +1,104 @@
+"""Tests for scratch storage of intermediate audio."""
+
+import struct
+import subprocess
+import sys
+import wave
+
+import pytest
+
+from lib.audio_writer import ShardedWavWriter
+from lib.scratch import PREFIX, ScratchSpace, _host, sweep_stale
+
+RATE = 8000
+
+
+def make_wav(path, seconds, value=7):
+    with wave.open(str(path), 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(RATE)
+        wav_file.writeframes(struct.pack('<h', value) * int(seconds * RATE))
+    return path
+
+
+@pytest.fixture
+def scratch(tmp_path):
+    """Scratch space with a 1 MB fast budget."""
+    (tmp_path / "fast").mkdir()
+    (tmp_path / "disk").mkdir()
+    space = ScratchSpace(tmp_path / "fast", tmp_path / "disk", max_bytes=1024 * 1024, flac=True)
+    yield space
+    space.close()
+
+
+class TestScratchSpace:
+    """Test placement, accounting and cleanup."""
+
+    def test_falls_back_to_disk_over_budget(self, scratch, tmp_path):
+        """Test that files beyond the fast budget are placed on the fallback."""
+        first = scratch.path("a.wav", expected_bytes=800 * 1024)
+        second = scratch.path("b.wav", expected_bytes=800 * 1024)
+        assert scratch.location(first) == 'fast'
+        assert scratch.location(second) == 'disk'
+
+        # Released space is available again
+        scratch.release(first)
+        assert scratch.location(scratch.path("c.wav", expected_bytes=800 * 1024)) == 'fast'
+
+    def test_reports_bytes_written(self, scratch, tmp_path):
+        """Test that released and moved files are counted."""
+        make_wav(scratch.path("a.wav"), 1)
+        kept = scratch.move_out(make_wav(scratch.path("b.wav"), 1), tmp_path / "b.wav")
+        for path in list(scratch.roots['fast'].iterdir()):
+            scratch.release(path)
+
+        assert kept.exists()
+        assert scratch.bytes_written['fast'] == 2 * (44 + 2 * RATE)
+        assert "MB in" in scratch.summary()
+
+    def test_flac_chunks_combine_identically(self, scratch, tmp_path):
+        """Test that chunks kept as FLAC combine into the same audio as WAV."""
+        chunks = [make_wav(tmp_path / f"c{i}.wav", 1, value=i * 100) for i in range(3)]
+        compressed = []
+        for chunk in chunks:
+            copy = scratch.path(chunk.name)
+            copy.write_bytes(chunk.read_bytes())
+            compressed.append(scratch.compress(copy))
+        assert all(path.suffix == '.flac' for path in compressed)
+
+        for name, inputs in (("wav.wav", chunks), ("flac.wav", compressed)):
+            with ShardedWavWriter(tmp_path / name, max_seconds=0, max_bytes=0) as writer:
+                for path in inputs:
+                    writer.add_wav(path, pause_ms=100)
+        assert (tmp_path / "wav.wav").read_bytes() == (tmp_path / "flac.wav").read_bytes()
+
+    def test_close_removes_directories(self, scratch):
+        """Test that closing removes everything left in scratch."""
+        make_wav(scratch.path("left.wav"), 1)
+        scratch.close()
+        assert not any(root.exists() for root in scratch.roots.values())
+
+    def test_sweeps_crashed_processes(self, tmp_path):
+        """Test that directories of dead processes are removed."""
+        child = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"],
+                               capture_output=True, text=True)
+        dead = child.stdout.strip()
+        stale = tmp_path / f"{PREFIX}{_host()}-{dead}-deadbeef"
+        (stale / "sub").mkdir(parents=True)
+        alive = tmp_path / f"{PREFIX}{_host()}-1-cafe"
+        alive.mkdir()
+
+        assert sweep_stale(tmp_path) == 1
+        assert not stale.exists() and alive.exists()
+
+    def test_keeps_directories_of_other_hosts(self, tmp_path):
+        """Test that a shared scratch root keeps other machines' directories."""
+        child = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"],
+                               capture_output=True, text=True)
+        dead = child.stdout.strip()
+        other = tmp_path / f"{PREFIX}render-node-2-{dead}-deadbeef"
+        other.mkdir()
+
+        assert sweep_stale(tmp_path) == 0
+        assert other.exists()
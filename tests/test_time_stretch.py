@@ -0,0 +1,87 @@
+"""Tests for time-stretched speed variants."""
+
+import wave
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from lib.time_stretch import WSOLAStretcher, parse_speeds, stretch_wav, variant_path
+
+RATE = 16000
+
+
+def tone(seconds, frequency=220.0):
+    """A sine tone at half amplitude."""
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (0.5 * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+def peak_frequency(samples):
+    spectrum = np.abs(np.fft.rfft(samples * np.hanning(len(samples))))
+    return np.argmax(spectrum) * RATE / len(samples)
+
+
+def stretch(samples, rate, block):
+    """Feed samples to a stretcher in blocks of the given size."""
+    stretcher = WSOLAStretcher(rate, RATE)
+    output = [stretcher.process(samples[i:i + block]) for i in range(0, len(samples), block)]
+    output.append(stretcher.flush())
+    return np.concatenate(output)
+
+
+class TestWSOLAStretcher:
+    """Test the streaming WSOLA stretcher."""
+
+    @pytest.mark.parametrize("rate", [0.8, 1.0, 1.25, 1.5, 2.0])
+    def test_length_and_pitch(self, rate):
+        """Test that output lasts input / rate and keeps the input pitch."""
+        samples = tone(4)
+        output = stretch(samples, rate, block=4096)
+
+        assert len(output) == round(len(samples) / rate)
+        assert peak_frequency(output) == pytest.approx(220.0, abs=2)
+
+    def test_steady_level(self):
+        """Test that overlapping windows add up without level dips."""
+        output = stretch(tone(4), 1.25, block=4096)
+        middle = output[RATE // 2:-RATE // 2]
+        rms = np.sqrt(np.mean(middle.reshape(-1, 400) ** 2, axis=1))
+        assert rms.min() > 0.3 and rms.max() < 0.4
+
+    def test_block_size_does_not_matter(self):
+        """Test that streaming in small or large blocks gives the same audio."""
+        samples = tone(2)
+        np.testing.assert_allclose(stretch(samples, 1.5, block=500),
+                                   stretch(samples, 1.5, block=len(samples)), atol=1e-6)
+
+    def test_rejects_bad_rate(self):
+        """Test that a non-positive rate is refused."""
+        with pytest.raises(ValueError):
+            WSOLAStretcher(0, RATE)
+
+
+class TestStretchWav:
+    """Test file level stretching and naming."""
+
+    def test_stretch_wav(self, tmp_path):
+        """Test that a WAV file is stretched into a shorter WAV at the same rate."""
+        source = tmp_path / "book.wav"
+        with wave.open(str(source), 'wb') as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(RATE)
+            wav_file.writeframes((tone(3) * 32767).astype('<i2').tobytes())
+
+        output = stretch_wav(source, variant_path(source, 1.5), 1.5)
+
+        assert output == tmp_path / "book_x1.5.wav"
+        with wave.open(str(output), 'rb') as wav_file:
+            assert wav_file.getframerate() == RATE
+            assert wav_file.getnframes() == 2 * RATE
+
+    def test_variant_path_and_parse_speeds(self):
+        """Test variant file names and speed list parsing."""
+        assert variant_path(Path("out/ch01.mp3"), 1.25) == Path("out/ch01_x1.25.mp3")
+        assert parse_speeds("1.5, 1.25,1.5") == [1.25, 1.5]
+        assert parse_speeds("") == []
@@ -0,0 +1,99 @@
+"""Tests for the shared-directory work queue."""
+
+import json
+import multiprocessing
+import os
+import time
+
+from lib.work_queue import WorkQueue, run_worker
+
+
+def _record_job(payload, lease_lost):
+    """Handler used by worker processes: log which process did the job."""
+    time.sleep(0.01)
+    with open(payload["log"], "a") as log:
+        log.write(f"{payload['n']} {os.getpid()}\n")
+    return {"n": payload["n"]}
+
+
+def _worker_process(root):
+    run_worker(WorkQueue(root, lease_seconds=5), _record_job)
+
+
+class TestWorkQueue:
+    """Test claiming, leases and multi-process draining."""
+    
+    def test_claim_is_exclusive(self, tmp_path):
+        """Test that a job can only be claimed once."""
+        queue = WorkQueue(tmp_path)
+        queue.enqueue("job", {"n": 1})
+        
+        first = queue.claim("w1")
+        second = queue.claim("w2")
+        
+        assert first.payload == {"n": 1}
+        assert second is None
+        assert not queue.enqueue("job", {"n": 1})  # Already claimed
+        
+    def test_expired_lease_is_reclaimed(self, tmp_path):
+        """Test that a claim without heartbeat goes back to pending."""
+        queue = WorkQueue(tmp_path, lease_seconds=10)
+        queue.enqueue("job", {})
+        stale = queue.claim("w1")
+        old = time.time() - 60
+        os.utime(stale.claimed_path, (old, old))
+        
+        assert queue.reclaim_expired() == 1
+        fresh = queue.claim("w2")
+        
+        assert fresh is not None
+        assert not queue.heartbeat(stale)  # The stale worker lost its lease
+        assert not queue.complete(stale)
+        assert queue.complete(fresh)
+        
+    def test_job_killing_its_workers_is_parked(self, tmp_path):
+        """Test that expired leases count as attempts."""
+        queue = WorkQueue(tmp_path, lease_seconds=10, max_attempts=2)
+        queue.enqueue("job", {})
+        old = time.time() - 60
+        
+        for _ in range(2):
+            crashed = queue.claim("w")
+            os.utime(crashed.claimed_path, (old, old))
+            assert queue.reclaim_expired() == 1
+        
+        assert queue.counts() == {"pending": 0, "claimed": 0, "done": 0, "failed": 1}
+        assert queue.is_drained()
+        record = json.loads((tmp_path / "failed" / "job.json").read_text(encoding='utf-8'))
+        assert record["attempts"] == 2 and "lease expired" in record["error"]
+        
+    def test_failed_job_is_retried_then_parked(self, tmp_path):
+        """Test attempts accounting."""
+        queue = WorkQueue(tmp_path, max_attempts=2)
+        queue.enqueue("job", {})
+        
+        queue.fail(queue.claim("w"), "boom")
+        queue.fail(queue.claim("w"), "boom")
+        
+        assert queue.counts() == {"pending": 0, "claimed": 0, "done": 0, "failed": 1}
+        
+    def test_several_processes_drain_queue(self, tmp_path):
+        """Test that local worker processes share the jobs without duplicates."""
+        root = tmp_path / "queue"
+        log = tmp_path / "log.txt"
+        queue = WorkQueue(root)
+        for n in range(30):
+            queue.enqueue(f"job{n:02d}", {"n": n, "log": str(log)})
+        
+        processes = [multiprocessing.Process(target=_worker_process, args=(str(root),))
+                     for _ in range(3)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(30)
+        
+        done = [line.split()[0] for line in log.read_text().splitlines()]
+        assert sorted(map(int, done)) == list(range(30))
+        assert queue.counts()["done"] == 30
+        record = json.loads((root / "done" / "job07.json").read_text())
+        assert record["result"] == {"n": 7}